@@ -0,0 +1,124 @@
+"""partition sessions by expire_at
+
+Revision ID: 5b1d0c7e9a21
+Revises: 34f9af3bf79a
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1d0c7e9a21"
+down_revision: Union[str, None] = "34f9af3bf79a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, user_id, session_id, user_agent, last_active, expire_at"
+
+
+def create_sessions_table(name: str, partitioned: bool) -> None:
+    op.create_table(
+        name,
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("session_id", sa.UUID(), nullable=False),
+        sa.Column("user_agent", sa.String(length=512), nullable=False),
+        sa.Column("last_active", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expire_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f(f"fk_{name}_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        (
+            sa.PrimaryKeyConstraint("id", "expire_at", name=op.f(f"pk_{name}"))
+            if partitioned
+            else sa.PrimaryKeyConstraint("id", name=op.f(f"pk_{name}"))
+        ),
+        **({"postgresql_partition_by": "RANGE (expire_at)"} if partitioned else {}),
+    )
+
+
+def rename_sessions_table(new_name: str) -> None:
+    op.rename_table("sessions", new_name)
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT pk_sessions TO pk_{new_name}")
+    op.execute(
+        f"ALTER TABLE {new_name} RENAME CONSTRAINT fk_sessions_user_id_users "
+        f"TO fk_{new_name}_user_id_users"
+    )
+    for column in ("expire_at", "session_id", "user_id"):
+        op.execute(f"ALTER INDEX ix_sessions_{column} RENAME TO ix_{new_name}_{column}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rename_sessions_table("sessions_unpartitioned")
+    create_sessions_table("sessions", partitioned=True)
+    op.create_index(
+        op.f("ix_sessions_expire_at"), "sessions", ["expire_at"], unique=False
+    )
+    # Уникальность session_id на секционированной таблице потребовала бы
+    # включить в индекс expire_at; session_id — случайный UUID
+    op.create_index(
+        op.f("ix_sessions_session_id"), "sessions", ["session_id"], unique=False
+    )
+    op.create_index(op.f("ix_sessions_user_id"), "sessions", ["user_id"], unique=False)
+
+    # Дневные секции на все живые сессии и две недели вперёд; дальше
+    # их продлевает SessionPartitionMaintainer (в т.ч. недельными)
+    op.execute("""
+        DO $$
+        DECLARE
+            day date;
+        BEGIN
+            SET LOCAL TimeZone = 'UTC';
+            FOR day IN
+                SELECT generate_series(
+                    current_date,
+                    greatest(
+                        (SELECT max(expire_at)::date FROM sessions_unpartitioned),
+                        current_date + 14
+                    ),
+                    interval '1 day'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF sessions FOR VALUES FROM (%L) TO (%L)',
+                    'sessions_p' || to_char(day, 'YYYYMMDD'),
+                    day::timestamptz,
+                    (day + 1)::timestamptz
+                );
+            END LOOP;
+        END $$;
+        """)
+    # Истёкшие сессии не переносятся
+    op.execute(
+        f"INSERT INTO sessions ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM sessions_unpartitioned WHERE expire_at > now()"
+    )
+    op.drop_table("sessions_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    rename_sessions_table("sessions_partitioned")
+    create_sessions_table("sessions", partitioned=False)
+    op.create_index(
+        op.f("ix_sessions_expire_at"), "sessions", ["expire_at"], unique=False
+    )
+    op.create_index(
+        op.f("ix_sessions_session_id"), "sessions", ["session_id"], unique=True
+    )
+    op.create_index(op.f("ix_sessions_user_id"), "sessions", ["user_id"], unique=False)
+    op.execute(
+        f"INSERT INTO sessions ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM sessions_partitioned WHERE expire_at > now()"
+    )
+    # Секции удаляются вместе с родительской таблицей
+    op.drop_table("sessions_partitioned")
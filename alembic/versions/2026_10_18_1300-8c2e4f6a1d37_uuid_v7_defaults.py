@@ -0,0 +1,59 @@
+"""uuid v7 server defaults
+
+Revision ID: 8c2e4f6a1d37
+Revises: 5b1d0c7e9a21
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c2e4f6a1d37"
+down_revision: Union[str, None] = "5b1d0c7e9a21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Случайный UUIDv4, в первые 48 бит которого записано время в мс,
+# а версия исправлена с 4 на 7 (биты 52 и 53)
+CREATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+    SELECT encode(
+        set_bit(
+            set_bit(
+                overlay(
+                    uuid_send(gen_random_uuid())
+                    PLACING substring(
+                        int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint)
+                        FROM 3
+                    )
+                    FROM 1 FOR 6
+                ),
+                52, 1
+            ),
+            53, 1
+        ),
+        'hex'
+    )::uuid
+$$ LANGUAGE sql VOLATILE PARALLEL SAFE
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Существующие v4-идентификаторы остаются валидными: меняется только
+    # способ генерации новых
+    op.execute(CREATE_FUNCTION)
+    op.alter_column("users", "id", server_default=sa.text("uuid_generate_v7()"))
+    op.alter_column("sessions", "id", server_default=sa.text("uuid_generate_v7()"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column("sessions", "id", server_default=None)
+    op.alter_column("users", "id", server_default=None)
+    op.execute("DROP FUNCTION IF EXISTS uuid_generate_v7()")
@@ -0,0 +1,31 @@
+"""sessions default partition
+
+Revision ID: 3f7a9c2b5e14
+Revises: 8c2e4f6a1d37
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f7a9c2b5e14"
+down_revision: Union[str, None] = "8c2e4f6a1d37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Строки вне созданных секций (обслуживание секций выключено или
+    # отстало) попадают сюда, а не обрывают вставку ошибкой.
+    # SessionPartitionMaintainer переносит их в новые секции
+    op.execute(sa.text("CREATE TABLE sessions_default PARTITION OF sessions DEFAULT"))
+
+
+def downgrade() -> None:
+    # Строки DEFAULT-секции некуда вернуть без неё, они удаляются
+    op.execute(sa.text("DROP TABLE sessions_default"))
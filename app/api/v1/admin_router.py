@@ -0,0 +1,48 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, status
+
+from app.api.v1.auth_router import oaut2_scheme
+from app.services.auth_service import AuthService
+from app.services.user_service import UserService
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.post(
+    "/users/{user_id}/logout/",
+    responses={
+        204: {"description": "All user sessions revoked"},
+        401: {"description": "Invalid or expired token"},
+        403: {"description": "Not enough permissions"},
+    },
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def force_logout(
+    service: Annotated[AuthService, Depends()],
+    access_token: Annotated[str, Depends(oaut2_scheme)],
+    user_id: UUID,
+):
+    await service.get_admin_payload(access_token)
+    await service.force_logout(str(user_id))
+
+
+@router.post(
+    "/users/{user_id}/deactivate/",
+    responses={
+        204: {"description": "User deactivated and logged out"},
+        401: {"description": "Invalid or expired token"},
+        403: {"description": "Not enough permissions"},
+    },
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def deactivate_user(
+    service: Annotated[AuthService, Depends()],
+    users: Annotated[UserService, Depends()],
+    access_token: Annotated[str, Depends(oaut2_scheme)],
+    user_id: UUID,
+):
+    await service.get_admin_payload(access_token)
+    await users.set_active(user_id, is_active=False)
+    await service.force_logout(str(user_id))
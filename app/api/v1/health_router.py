@@ -1,8 +1,15 @@
 from fastapi import APIRouter
 
+from app.core.metrics import metrics
+
 router = APIRouter(prefix="/health", tags=["Health Check"])
 
 
 @router.get("/")
 async def health_check():
     return {"status": "ok"}
+
+
+@router.get("/metrics/")
+async def get_metrics():
+    return metrics.snapshot()
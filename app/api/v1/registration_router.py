@@ -3,7 +3,8 @@ from typing import TYPE_CHECKING, Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.database.session import get_session
-from app.repository.user import create_user, get_user_by_email
+from app.repository.fast import fetch_user_by_email
+from app.repository.user import create_user
 from app.schemas.user import UserCreate, UserResponse
 from app.services.mail_service import MailService
 
@@ -16,14 +17,16 @@ router = APIRouter(prefix="/registration", tags=["Registration"])
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def registration(
     session: Annotated["AsyncSession", Depends(get_session)],
+    mail: Annotated[MailService, Depends()],
     user_in: UserCreate,
 ):
-    user = await get_user_by_email(session, user_in.email)
+    user = await fetch_user_by_email(session, user_in.email)
 
     if user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="User already exists"
         )
 
-    await MailService.send_welcome_email(email=user_in.email, name=user_in.name)
-    return await create_user(session, user_in)
+    user = await create_user(session, user_in)
+    await mail.send_welcome_email(email=user_in.email, name=user_in.name)
+    return user
@@ -0,0 +1,84 @@
+"""Подбор стоимости хеширования паролей под целевую задержку проверки.
+
+python -m app.cli.calibrate_password --target-ms 250
+python -m app.cli.calibrate_password --scheme argon2id --target-ms 250
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable
+
+import bcrypt
+
+from app.core.settings import settings
+from app.services.utils import get_argon2_hasher
+
+SAMPLE_PASSWORD = "calibration-password"
+
+
+def measure(verify: Callable[[], object], samples: int) -> float:
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        verify()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def calibrate_bcrypt(target_ms: float, samples: int) -> int:
+    best = 4
+    for rounds in range(4, 32):
+        hashed = bcrypt.hashpw(SAMPLE_PASSWORD.encode(), bcrypt.gensalt(rounds))
+        elapsed = measure(
+            lambda: bcrypt.checkpw(SAMPLE_PASSWORD.encode(), hashed), samples
+        )
+        print(f"bcrypt rounds={rounds}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        best = rounds
+    return best
+
+
+def calibrate_argon2(target_ms: float, samples: int) -> int:
+    best = 1
+    for time_cost in range(1, 64):
+        hasher = get_argon2_hasher(time_cost=time_cost)
+        hashed = hasher.hash(SAMPLE_PASSWORD)
+        elapsed = measure(lambda: hasher.verify(hashed, SAMPLE_PASSWORD), samples)
+        print(
+            f"argon2id time_cost={time_cost} "
+            f"memory_cost={settings.password_hash.argon2_memory_cost}: "
+            f"{elapsed:.1f} ms"
+        )
+        if elapsed > target_ms:
+            break
+        best = time_cost
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scheme",
+        choices=["bcrypt", "argon2id"],
+        default=settings.password_hash.scheme,
+    )
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.scheme == "argon2id":
+        time_cost = calibrate_argon2(args.target_ms, args.samples)
+        print()
+        print("PASSWORD_HASH_SCHEME=argon2id")
+        print(f"PASSWORD_HASH_ARGON2_TIME_COST={time_cost}")
+    else:
+        rounds = calibrate_bcrypt(args.target_ms, args.samples)
+        print()
+        print("PASSWORD_HASH_SCHEME=bcrypt")
+        print(f"PASSWORD_HASH_BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
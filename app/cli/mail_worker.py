@@ -0,0 +1,47 @@
+"""Воркер исходящей почты: читает outbox из Redis и отправляет письма по SMTP.
+
+python -m app.cli.mail_worker
+python -m app.cli.mail_worker --concurrency 8
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.core.redis_scripts import redis_scripts
+from app.core.redis_service import init_redis
+from app.services.mail_service import deliver, mail_templates, smtp_pool
+from app.services.mail_worker import create_mail_worker
+
+
+async def run(concurrency: int | None) -> None:
+    mail_templates.compile_all()
+    redis = await init_redis()
+    await redis_scripts.load(redis)
+    worker = create_mail_worker(redis, deliver)
+    if concurrency:
+        worker.concurrency = concurrency
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await smtp_pool.close()
+        mail_templates.shutdown()
+        await redis.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Обслуживание секций sessions отдельным процессом вместо задачи в lifespan.
+
+python -m app.cli.maintain_partitions
+python -m app.cli.maintain_partitions --once
+"""
+
+import argparse
+import asyncio
+
+from app.core.redis_service import init_redis
+from app.services.session_partitions import session_partitions
+
+
+async def run(once: bool) -> None:
+    if once:
+        await session_partitions.maintain()
+        print(f"partitions={session_partitions.partitions}")
+        return
+
+    redis = await init_redis()
+    try:
+        await session_partitions.run(redis)
+    finally:
+        await redis.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="один проход без выбора лидера (cron)",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Удаление истёкших сессий отдельным процессом вместо задачи в lifespan.
+
+python -m app.cli.reap_sessions
+python -m app.cli.reap_sessions --once
+"""
+
+import argparse
+import asyncio
+
+from app.core.redis_service import init_redis
+from app.services.session_reaper import session_reaper
+
+
+async def run(once: bool) -> None:
+    if once:
+        deleted = await session_reaper.reap()
+        print(f"deleted={deleted} rows_per_second={session_reaper.rows_per_second:.0f}")
+        return
+
+    redis = await init_redis()
+    try:
+        await session_reaper.run(redis)
+    finally:
+        await redis.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="один проход без выбора лидера (cron)",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.once))
+
+
+if __name__ == "__main__":
+    main()
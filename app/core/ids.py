@@ -0,0 +1,39 @@
+import os
+import time
+import uuid
+from threading import Lock
+
+_lock = Lock()
+_last_ms = 0
+_counter = 0
+
+
+def _uuid7() -> uuid.UUID:
+    """UUIDv7 (RFC 9562): 48 бит unix-времени в мс, затем случайные биты.
+
+    Первые 12 случайных бит — счётчик внутри миллисекунды, поэтому
+    идентификаторы одного процесса строго возрастают.
+    """
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _counter = int.from_bytes(os.urandom(2)) & 0x07FF
+        else:
+            _counter += 1
+            if _counter > 0x0FFF:  # счётчик исчерпан — занимаем следующую мс
+                _last_ms += 1
+                _counter = 0
+        timestamp, counter = _last_ms, _counter
+
+    value = (timestamp & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= counter << 64
+    value |= 0b10 << 62
+    value |= int.from_bytes(os.urandom(8)) & 0x3FFF_FFFF_FFFF_FFFF
+    return uuid.UUID(int=value)
+
+
+# В Python 3.14 есть стандартная реализация
+uuid7 = getattr(uuid, "uuid7", _uuid7)
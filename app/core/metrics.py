@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable
+
+
+@dataclass
+class Counter:
+    value: int = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+class Summary:
+    """Count / sum / max наблюдений (секунды, штуки и т.п.)."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "sum": self.total,
+                "avg": self.total / self.count if self.count else 0.0,
+                "max": self.max,
+            }
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._counters: dict[str, Counter] = {}
+        self._summaries: dict[str, Summary] = {}
+        self._gauges: dict[str, Callable[[], Any]] = {}
+
+    def counter(self, name: str) -> Counter:
+        return self._counters.setdefault(name, Counter())
+
+    def summary(self, name: str) -> Summary:
+        if name not in self._summaries:
+            self._summaries[name] = Summary()
+        return self._summaries[name]
+
+    def gauge(self, name: str, callback: Callable[[], Any]) -> None:
+        self._gauges[name] = callback
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "counters": {
+                name: counter.snapshot() for name, counter in self._counters.items()
+            },
+            "summaries": {
+                name: summary.snapshot() for name, summary in self._summaries.items()
+            },
+            "gauges": {name: callback() for name, callback in self._gauges.items()},
+        }
+
+
+metrics = MetricsRegistry()
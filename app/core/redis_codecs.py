@@ -0,0 +1,107 @@
+import json
+from typing import Any, Protocol
+
+try:
+    import orjson
+except ImportError:  # orjson — опциональная зависимость
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack — опциональная зависимость
+    msgpack = None
+
+
+class Codec(Protocol):
+    # True — ответ Redis читается как bytes, без декодирования в str
+    binary: bool
+
+    def encode(self, value: Any) -> str | bytes | int | float: ...
+
+    def decode(self, value: str | bytes) -> Any: ...
+
+
+class RawCodec:
+    """Значение хранится как есть: маркеры, коды, счётчики."""
+
+    binary = False
+
+    def encode(self, value: Any) -> str | bytes | int | float:
+        return value
+
+    def decode(self, value: str | bytes) -> Any:
+        return value
+
+
+class JsonCodec:
+    binary = False
+
+    def encode(self, value: Any) -> str:
+        return json.dumps(value, ensure_ascii=True)
+
+    def decode(self, value: str | bytes) -> Any:
+        return json.loads(value)
+
+
+class OrjsonCodec:
+    """Тот же JSON, что у JsonCodec: значения читаются обоими кодеками."""
+
+    binary = True
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise RuntimeError("orjson Redis codec requires the 'orjson' extra")
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def decode(self, value: str | bytes) -> Any:
+        return orjson.loads(value)
+
+
+class MsgpackCodec:
+    binary = True
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise RuntimeError("msgpack Redis codec requires the 'msgpack' extra")
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, value: str | bytes) -> Any:
+        return msgpack.unpackb(value, raw=False)
+
+
+CODECS: dict[str, type[Codec]] = {
+    "raw": RawCodec,
+    "json": JsonCodec,
+    "orjson": OrjsonCodec,
+    "msgpack": MsgpackCodec,
+}
+
+
+def get_codec(name: str) -> Codec:
+    try:
+        return CODECS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown Redis codec {name!r}") from None
+
+
+class KeyCodecs:
+    """Кодек значения по префиксу ключа (до первого ':' включительно).
+
+    Ключи без зарегистрированного префикса используют кодек по умолчанию.
+    """
+
+    def __init__(self, default: Codec) -> None:
+        self.default = default
+        self._by_prefix: dict[str, Codec] = {}
+
+    def register(self, prefix: str, codec: Codec) -> None:
+        if not prefix.endswith(":"):
+            raise ValueError(f"Key prefix must end with ':', got {prefix!r}")
+        self._by_prefix[prefix] = codec
+
+    def for_key(self, name: str) -> Codec:
+        return self._by_prefix.get(name[: name.find(":") + 1], self.default)
@@ -0,0 +1,51 @@
+from uuid import uuid4
+
+from redis.asyncio import Redis
+
+from app.core.redis_scripts import redis_scripts
+
+# Продлевает блокировку, только если ею владеет этот процесс
+EXTEND_SCRIPT = redis_scripts.register(
+    "leader_lock.extend",
+    """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+""",
+)
+
+# Снимает блокировку, только если ею владеет этот процесс
+RELEASE_SCRIPT = redis_scripts.register(
+    "leader_lock.release",
+    """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""",
+)
+
+
+class LeaderLock:
+    """Выбор лидера среди воркеров через ключ в Redis с TTL.
+
+    Лидер продлевает ключ каждым acquire(); если он упал, ключ истекает
+    через ttl_ms и лидерство забирает следующий воркер.
+    """
+
+    def __init__(self, redis: Redis, name: str, ttl_ms: int) -> None:
+        self.redis = redis
+        self.name = name
+        self.ttl_ms = ttl_ms
+        self.token = uuid4().hex
+
+    async def acquire(self) -> bool:
+        if await self.redis.set(self.name, self.token, px=self.ttl_ms, nx=True):
+            return True
+        return bool(
+            await EXTEND_SCRIPT(self.redis, [self.name], [self.token, self.ttl_ms])
+        )
+
+    async def release(self) -> None:
+        await RELEASE_SCRIPT(self.redis, [self.name], [self.token])
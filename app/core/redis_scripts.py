@@ -0,0 +1,105 @@
+import hashlib
+import logging
+from typing import Any, Sequence
+
+from redis.asyncio import Redis
+from redis.exceptions import NoScriptError
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+script_reloads = metrics.counter("redis_scripts.reloads")
+
+
+class RedisScript:
+    """Lua-скрипт, вызываемый по SHA1 (EVALSHA).
+
+    Если кеш скриптов Redis сброшен (рестарт, failover, SCRIPT FLUSH),
+    скрипт загружается заново и вызов повторяется.
+    """
+
+    def __init__(self, name: str, source: str) -> None:
+        self.name = name
+        self.source = source
+        self.sha = hashlib.sha1(source.encode()).hexdigest()
+
+    async def __call__(
+        self, redis: Redis, keys: Sequence[str], args: Sequence[Any]
+    ) -> Any:
+        try:
+            return await redis.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            script_reloads.inc()
+            logger.info("Redis script %s is not cached, reloading", self.name)
+            await redis.script_load(self.source)
+            return await redis.evalsha(self.sha, len(keys), *keys, *args)
+
+
+class ScriptRegistry:
+    """Все Lua-скрипты приложения; load() загружает их в Redis при старте."""
+
+    def __init__(self) -> None:
+        self.scripts: dict[str, RedisScript] = {}
+
+    def register(self, name: str, source: str) -> RedisScript:
+        if name in self.scripts:
+            raise ValueError(f"Redis script {name!r} is already registered")
+        script = RedisScript(name, source)
+        self.scripts[name] = script
+        return script
+
+    async def load(self, redis: Redis) -> None:
+        async with redis.pipeline(transaction=False) as pipe:
+            for script in self.scripts.values():
+                pipe.script_load(script.source)
+            await pipe.execute()
+        logger.info("Loaded %d Redis scripts", len(self.scripts))
+
+
+redis_scripts = ScriptRegistry()
+
+# Сверяет значение ключа и удаляет его при совпадении; неудачные попытки
+# считаются в отдельном ключе, после ARGV[2] неудач ключ удаляется.
+# KEYS: ключ значения, ключ счётчика попыток; ARGV: ожидаемое значение, лимит
+# Возвращает 1 — совпало, 0 — не совпало, -1 — ключа нет, -2 — попытки исчерпаны
+COMPARE_AND_DELETE_SCRIPT = redis_scripts.register(
+    "compare_and_delete",
+    """
+local value = redis.call('GET', KEYS[1])
+if not value then
+    return -1
+end
+if value == ARGV[1] then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 1
+end
+local attempts = redis.call('INCR', KEYS[2])
+if attempts == 1 then
+    local ttl = redis.call('PTTL', KEYS[1])
+    if ttl > 0 then
+        redis.call('PEXPIRE', KEYS[2], ttl)
+    end
+end
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return -2
+end
+return 0
+""",
+)
+
+# Записывает значение с TTL и удаляет связанные с прежним значением ключи.
+# KEYS: ключ значения, связанные ключи...; ARGV: значение, ttl (мс)
+# Возвращает прежнее значение
+SET_REPLACE_SCRIPT = redis_scripts.register(
+    "set_replace",
+    """
+local previous = redis.call('GET', KEYS[1])
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+if #KEYS > 1 then
+    redis.call('DEL', unpack(KEYS, 2))
+end
+return previous
+""",
+)
@@ -1,11 +1,20 @@
 from datetime import timedelta
 import json
-from typing import Any
+from typing import Any, Mapping, Sequence
 
 from fastapi import Request
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.client import NEVER_DECODE
 
+from app.core.redis_codecs import KeyCodecs, get_codec
+from app.core.redis_scripts import RedisScript
 from app.core.settings import settings
+from app.core.single_flight import SingleFlight
+
+redis_get_flight = SingleFlight("redis.get")
+# Кодеки значений по префиксу ключа; модули регистрируют свои префиксы
+key_codecs = KeyCodecs(default=get_codec(settings.redis.codec))
 
 
 async def init_redis() -> Redis:
@@ -21,22 +30,130 @@ async def init_redis() -> Redis:
     return redis
 
 
+# dumps/loads — JSON для сообщений pub/sub и аргументов Lua-скриптов
+def dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=True)
+
+
+def loads(value: str | None) -> Any | None:
+    if value is None:
+        return None
+    return json.loads(value)
+
+
+class RedisPipeline:
+    """Пакет команд, отправляемый в Redis за один round trip."""
+
+    def __init__(self, pipeline: Pipeline) -> None:
+        self.pipeline = pipeline
+
+    def set(self, name: str, value: Any, ex: int | timedelta) -> "RedisPipeline":
+        value = key_codecs.for_key(name).encode(value)
+        self.pipeline.set(name=name, value=value, ex=ex)
+        return self
+
+    def get(self, name: str) -> "RedisPipeline":
+        self.pipeline.get(name=name)
+        return self
+
+    def hset(self, name: str, mapping: Mapping[str, str]) -> "RedisPipeline":
+        self.pipeline.hset(name=name, mapping=mapping)
+        return self
+
+    def hgetall(self, name: str) -> "RedisPipeline":
+        self.pipeline.hgetall(name)
+        return self
+
+    def incr(self, name: str) -> "RedisPipeline":
+        self.pipeline.incr(name)
+        return self
+
+    def expire(self, name: str, ex: int | timedelta) -> "RedisPipeline":
+        self.pipeline.expire(name=name, time=ex)
+        return self
+
+    def delete(self, *names: str) -> "RedisPipeline":
+        self.pipeline.delete(*names)
+        return self
+
+    def publish(self, channel: str, message: Any) -> "RedisPipeline":
+        self.pipeline.publish(channel, dumps(message))
+        return self
+
+    def xadd(
+        self, name: str, fields: Mapping[str, str], maxlen: int | None = None
+    ) -> "RedisPipeline":
+        self.pipeline.xadd(name, dict(fields), maxlen=maxlen, approximate=True)
+        return self
+
+    def script(
+        self, script: RedisScript, keys: Sequence[str], args: Sequence[Any]
+    ) -> "RedisPipeline":
+        # Внутри MULTI ошибка NOSCRIPT не откатила бы остальные команды,
+        # поэтому в pipeline скрипт передаётся целиком (EVAL)
+        self.pipeline.eval(script.source, len(keys), *keys, *args)
+        return self
+
+    async def execute(self) -> list[Any]:
+        return await self.pipeline.execute()
+
+
 class RedisService:
     def __init__(self, redis: Redis) -> None:
         self.redis = redis
 
-    async def set(self, name: str, value: Any, ex: int | timedelta) -> None:
-        await self.redis.set(
-            name=name, value=json.dumps(value, ensure_ascii=True), ex=ex
-        )
+    def pipeline(self, transaction: bool = False) -> RedisPipeline:
+        return RedisPipeline(self.redis.pipeline(transaction=transaction))
 
-    async def get(self, name: str) -> Any | None:
-        value = await self.redis.get(name=name)
+    async def set(
+        self, name: str, value: Any, ex: int | timedelta, nx: bool = False
+    ) -> bool:
+        value = key_codecs.for_key(name).encode(value)
+        return bool(await self.redis.set(name=name, value=value, ex=ex, nx=nx))
 
+    async def get(self, name: str) -> Any | None:
+        codec = key_codecs.for_key(name)
+        options = {NEVER_DECODE: True} if codec.binary else {}
+        # Одновременные GET одного ключа из разных запросов — один round trip
+        value = await redis_get_flight.do(
+            name, lambda: self.redis.execute_command("GET", name, **options)
+        )
         if value is None:
             return None
+        return codec.decode(value)
+
+    async def mget(self, names: list[str]) -> list[Any | None]:
+        if not names:
+            return []
+        codecs = [key_codecs.for_key(name) for name in names]
+        if not any(codec.binary for codec in codecs):
+            values = await self.redis.mget(names)
+            return [
+                None if value is None else codec.decode(value)
+                for codec, value in zip(codecs, values)
+            ]
+
+        values = await self.redis.execute_command(
+            "MGET", *names, **{NEVER_DECODE: True}
+        )
+        return [
+            (
+                None
+                if value is None
+                else codec.decode(value if codec.binary else value.decode())
+            )
+            for codec, value in zip(codecs, values)
+        ]
+
+    async def mset_ex(self, mapping: Mapping[str, Any], ex: int | timedelta) -> None:
+        """MSET с TTL для каждого ключа: SET ... EX в одном pipeline."""
+        if not mapping:
+            return
 
-        return json.loads(value)
+        pipeline = self.pipeline()
+        for name, value in mapping.items():
+            pipeline.set(name=name, value=value, ex=ex)
+        await pipeline.execute()
 
     async def keys(self) -> list[str] | list:
         return await self.redis.keys()
@@ -44,6 +161,28 @@ class RedisService:
     async def delete(self, name: str) -> None:
         await self.redis.delete(name)
 
+    async def exists(self, *names: str) -> int:
+        """Число существующих ключей: проверка без чтения и декодирования значения."""
+        return await self.redis.exists(*names)
+
+    async def hgetall(self, name: str) -> dict[str, str]:
+        return await self.redis.hgetall(name)
+
+    async def script(
+        self, script: RedisScript, keys: Sequence[str], args: Sequence[Any]
+    ) -> Any:
+        return await script(self.redis, keys, args)
+
+    async def publish(self, channel: str, message: Any) -> None:
+        await self.redis.publish(channel, dumps(message))
+
+    async def xadd(
+        self, name: str, fields: Mapping[str, str], maxlen: int | None = None
+    ) -> str:
+        return await self.redis.xadd(
+            name, dict(fields), maxlen=maxlen, approximate=True
+        )
+
 
 async def get_redis(request: Request) -> RedisService:
     redis = request.app.state.redis
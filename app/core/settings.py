@@ -17,10 +17,24 @@ class PostgresConfig:
     password: str = env("POSTGRES_PASSWORD")
     port: int = env.int("POSTGRES_PORT")
 
-    pool_size: int = 20
-    max_overflow: int = 5
+    pool_size: int = env.int("POSTGRES_POOL_SIZE", 20)
+    max_overflow: int = env.int("POSTGRES_MAX_OVERFLOW", 5)
+    pool_timeout: float = env.float("POSTGRES_POOL_TIMEOUT", 30)
+    # секунды, -1 — соединения не пересоздаются по возрасту
+    pool_recycle: int = env.int("POSTGRES_POOL_RECYCLE", -1)
+    pool_pre_ping: bool = env.bool("POSTGRES_POOL_PRE_PING", False)
+    statement_cache_size: int = env.int("POSTGRES_STATEMENT_CACHE_SIZE", 100)
+    # PgBouncer в режиме transaction pooling: без своего пула и prepared statements
+    pgbouncer: bool = env.bool("POSTGRES_PGBOUNCER", False)
     echo: bool = False
 
+    # Необязательная реплика для чтения (те же БД, пользователь и пароль)
+    replica_host: str | None = env("POSTGRES_REPLICA_HOST", None)
+    replica_port: int = env.int("POSTGRES_REPLICA_PORT", 5432)
+    replica_max_lag_ms: int = env.int("POSTGRES_REPLICA_MAX_LAG_MS", 1000)
+    replica_check_interval_ms: int = env.int("POSTGRES_REPLICA_CHECK_INTERVAL_MS", 2000)
+    read_your_writes_ms: int = env.int("POSTGRES_READ_YOUR_WRITES_MS", 5000)
+
     def __post_init__(self):
         self.naming_convention: dict[str, str] = {
             "ix": "ix_%(column_0_label)s",
@@ -43,6 +57,19 @@ class PostgresConfig:
             )
         )
 
+    @property
+    def get_replica_url(self):
+        return str(
+            PostgresDsn.build(
+                scheme="postgresql+asyncpg",
+                host=self.replica_host,
+                port=self.replica_port,
+                username=self.user,
+                password=self.password,
+                path=self.db_name,
+            )
+        )
+
 
 @dataclass
 class RedisConfig:
@@ -51,15 +78,20 @@ class RedisConfig:
     password: str = env("REDIS_PASSWORD")
     user: str = env("REDIS_USER")
     db: str = env("REDIS_DB")
+    # Кодек значений без собственного: json | orjson | msgpack
+    codec: str = env("REDIS_CODEC", "json")
 
 
 @dataclass
 class JWTConfig:
-    algorithm: str = "RS256"
+    algorithm: str = env("JWT_ALGORITHM", "RS256")  # RS256 | ES256 | EdDSA
+    key_id: str | None = env("JWT_KEY_ID", None)
     private_key: Path = CERTS_PATH / "private.pem"
     public_key: Path = CERTS_PATH / "public.pem"
     access_token_expire_ms: int = env.int("ACCESS_TOKEN_EXPIRE_MS")
     refresh_token_expire_ms: int = env.int("REFRESH_TOKEN_EXPIRE_MS")
+    access_token_cache_size: int = env.int("ACCESS_TOKEN_CACHE_SIZE", 10000)
+    refresh_grace_ms: int = env.int("REFRESH_GRACE_MS", 10000)
 
 
 @dataclass
@@ -68,16 +100,76 @@ class SMTPConfig:
     port: int = env.int("SMTP_PORT")
     username: str = env("SMTP_USERNAME")
     password: SecretStr = env("SMTP_PASSWORD")
+    use_tls: bool = env.bool("SMTP_USE_TLS", True)
+    start_tls: bool = env.bool("SMTP_START_TLS", False)
+    pool_size: int = env.int("SMTP_POOL_SIZE", 4)
+    # Серверы ограничивают число писем за одну SMTP-сессию
+    pool_max_messages: int = env.int("SMTP_POOL_MAX_MESSAGES", 100)
+    pool_idle_check_ms: int = env.int("SMTP_POOL_IDLE_CHECK_MS", 30000)
     confirmation_email_code_length: int = env.int("CONFIRMATION_EMAIL_CODE_LENGTH")
     confirmation_email_code_ttl: int = env.int("CONFIRMATION_EMAIL_CODE_TTL")
     confirmation_email_code_rate_limit: int = env.int(
         "CONFIRMATION_EMAIL_CODE_RATE_LIMIT"
     )
+    # После стольких неверных попыток код удаляется, нужно запросить новый
+    confirmation_email_code_max_attempts: int = env.int(
+        "CONFIRMATION_EMAIL_CODE_MAX_ATTEMPTS", 5
+    )
+    mail_worker_concurrency: int = env.int("MAIL_WORKER_CONCURRENCY", 4)
+    mail_batch_size: int = env.int("MAIL_BATCH_SIZE", 20)
+    # true — шаблоны писем перечитываются с диска при изменении (разработка)
+    mail_templates_reload: bool = env.bool("MAIL_TEMPLATES_RELOAD", False)
+    mail_render_thread_threshold: int = env.int("MAIL_RENDER_THREAD_THRESHOLD", 65536)
+    mail_send_timeout_ms: int = env.int("MAIL_SEND_TIMEOUT_MS", 30000)
+    mail_max_attempts: int = env.int("MAIL_MAX_ATTEMPTS", 5)
+    mail_retry_backoff_ms: int = env.int("MAIL_RETRY_BACKOFF_MS", 1000)
+    mail_retry_backoff_max_ms: int = env.int("MAIL_RETRY_BACKOFF_MAX_MS", 300000)
+    # Письма упавшего воркера забираются другими через это время
+    mail_claim_idle_ms: int = env.int("MAIL_CLAIM_IDLE_MS", 60000)
+
+
+@dataclass
+class PasswordHashConfig:
+    executor: str = env("PASSWORD_HASH_EXECUTOR", "thread")  # thread | process
+    max_workers: int = env.int("PASSWORD_HASH_MAX_WORKERS", 4)
+    max_pending: int = env.int("PASSWORD_HASH_MAX_PENDING", 64)
+    timeout_ms: int = env.int("PASSWORD_HASH_TIMEOUT_MS", 5000)
+    scheme: str = env("PASSWORD_HASH_SCHEME", "bcrypt")  # bcrypt | argon2id
+    bcrypt_rounds: int = env.int("PASSWORD_HASH_BCRYPT_ROUNDS", 12)
+    argon2_time_cost: int = env.int("PASSWORD_HASH_ARGON2_TIME_COST", 3)
+    argon2_memory_cost: int = env.int("PASSWORD_HASH_ARGON2_MEMORY_COST", 65536)
+    argon2_parallelism: int = env.int("PASSWORD_HASH_ARGON2_PARALLELISM", 4)
 
 
 @dataclass
 class AppConfig:
     user_session_limit: int = env.int("USER_SESSION_LIMIT")
+    revocation_filter_enabled: bool = env.bool("REVOCATION_FILTER_ENABLED", True)
+    user_cache_size: int = env.int("USER_CACHE_SIZE", 10000)
+    user_cache_local_ttl_ms: int = env.int("USER_CACHE_LOCAL_TTL_MS", 5000)
+    user_cache_ttl_ms: int = env.int("USER_CACHE_TTL_MS", 300000)
+    session_store: str = env("SESSION_STORE", "postgres")  # postgres | redis
+    session_persist_interval_ms: int = env.int("SESSION_PERSIST_INTERVAL_MS", 1000)
+    session_persist_batch_size: int = env.int("SESSION_PERSIST_BATCH_SIZE", 500)
+    # После стольких неудачных попыток пачка записывается по одному изменению
+    session_persist_max_attempts: int = env.int("SESSION_PERSIST_MAX_ATTEMPTS", 3)
+    # false — удалением истёкших сессий занимается app.cli.reap_sessions
+    session_reaper_enabled: bool = env.bool("SESSION_REAPER_ENABLED", True)
+    session_reaper_interval_ms: int = env.int("SESSION_REAPER_INTERVAL_MS", 60000)
+    session_reaper_batch_size: int = env.int("SESSION_REAPER_BATCH_SIZE", 1000)
+    session_reaper_batch_pause_ms: int = env.int("SESSION_REAPER_BATCH_PAUSE_MS", 50)
+    # Секционирование sessions по expire_at: 1 — по дням, 7 — по неделям
+    session_partitions_enabled: bool = env.bool("SESSION_PARTITIONS_ENABLED", True)
+    session_partition_days: int = env.int("SESSION_PARTITION_DAYS", 1)
+    session_partition_premake: int = env.int("SESSION_PARTITION_PREMAKE", 3)
+    session_partition_retention_ms: int = env.int("SESSION_PARTITION_RETENTION_MS", 0)
+    session_partition_check_interval_ms: int = env.int(
+        "SESSION_PARTITION_CHECK_INTERVAL_MS", 3600000
+    )
+    # Ожидание блокировки sessions при DETACH (секция DEFAULT мешает CONCURRENTLY)
+    session_partition_lock_timeout_ms: int = env.int(
+        "SESSION_PARTITION_LOCK_TIMEOUT_MS", 5000
+    )
 
 
 @dataclass(frozen=True)
@@ -87,6 +179,7 @@ class Config:
     redis: RedisConfig = field(default_factory=RedisConfig)
     smtp: SMTPConfig = field(default_factory=SMTPConfig)
     app: AppConfig = field(default_factory=AppConfig)
+    password_hash: PasswordHashConfig = field(default_factory=PasswordHashConfig)
 
 
 settings = Config()
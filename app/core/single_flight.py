@@ -0,0 +1,86 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+@dataclass
+class _Call:
+    waiters: list[tuple[asyncio.Future, Any]] = field(default_factory=list)
+
+
+class SingleFlight:
+    """Склеивает одновременные одинаковые вызовы в один.
+
+    Первый вызов с ключом выполняет func, остальные ждут его результат.
+    adapt(result, context) позволяет выдать каждому ожидающему свою копию
+    результата (например, привязать ORM-объект к его сессии); вызывается
+    синхронно, сразу после получения результата.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._calls: dict[Hashable, _Call] = {}
+        self._executed = metrics.counter(f"{name}.calls")
+        self._coalesced = metrics.counter(f"{name}.coalesced")
+        metrics.gauge(f"{name}.in_flight", lambda: len(self._calls))
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[T]],
+        adapt: Callable[[T, Any], T] | None = None,
+        context: Any = None,
+    ) -> T:
+        call = self._calls.get(key)
+        if call is not None:
+            self._coalesced.inc()
+            future = asyncio.get_running_loop().create_future()
+            call.waiters.append((future, context))
+            try:
+                return await future
+            except _LeaderCancelled:
+                # Отменили вызывающего лидера, а не нас — повторяем сами
+                return await self.do(key, func, adapt, context)
+
+        call = self._calls[key] = _Call()
+        self._executed.inc()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            self._finish(call, exception=_LeaderCancelled())
+            raise
+        except Exception as exc:
+            self._finish(call, exception=exc)
+            raise
+        finally:
+            del self._calls[key]
+
+        self._finish(call, result=result, adapt=adapt)
+        return result
+
+    @staticmethod
+    def _finish(
+        call: _Call,
+        result: Any = None,
+        exception: BaseException | None = None,
+        adapt: Callable[[Any, Any], Any] | None = None,
+    ) -> None:
+        for future, context in call.waiters:
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+                continue
+            try:
+                future.set_result(
+                    adapt(result, context) if adapt is not None else result
+                )
+            except Exception as exc:
+                future.set_exception(exc)
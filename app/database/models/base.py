@@ -1,9 +1,10 @@
 import uuid
 
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from app.core.ids import uuid7
 from app.core.settings import settings
 
 
@@ -14,6 +15,11 @@ class Base(DeclarativeBase):
     )
     __abstract__ = True
 
+    # UUIDv7 растут со временем: вставки идут в правый край B-дерева.
+    # server_default нужен для строк, вставленных в обход ORM
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid7,
+        server_default=text("uuid_generate_v7()"),
     )
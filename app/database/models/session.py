@@ -2,9 +2,9 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy import DateTime, ForeignKey, PrimaryKeyConstraint, String
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 
 from app.database.models.base import Base
 
@@ -14,17 +14,28 @@ if TYPE_CHECKING:
 
 class Session(Base):
     __tablename__ = "sessions"
+    # Таблица секционирована по expire_at (см. app.services.session_partitions):
+    # ключ секционирования обязан входить в PK и уникальные индексы
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "expire_at"),
+        {"postgresql_partition_by": "RANGE (expire_at)"},
+    )
+
+    @declared_attr.directive
+    def __mapper_args__(cls):
+        # Для ORM сессия по-прежнему определяется одним id
+        return {"primary_key": [cls.__table__.c.id]}
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("users.id", ondelete="CASCADE"),
         index=True,
     )
-    session_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), unique=True, index=True
-    )
+    session_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), index=True)
     user_agent: Mapped[str] = mapped_column(String(512))
     last_active: Mapped[datetime] = mapped_column(DateTime(timezone=True))
-    expire_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    expire_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, index=True
+    )
 
     user: Mapped["User"] = relationship(back_populates="sessions")
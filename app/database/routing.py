@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from app.core.metrics import metrics
+from app.core.settings import settings
+from app.database.session import (
+    ReplicaState,
+    primary_pinned,
+    read_only_scope,
+    replica_engine,
+)
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+replica_fallbacks = metrics.counter("db_replica.fallbacks")
+
+
+def pin_primary() -> None:
+    """Остаток текущего запроса читает только с primary (read-your-writes)."""
+    primary_pinned.set(True)
+
+
+def replica_read(
+    func: Callable[..., Awaitable[T]],
+) -> Callable[..., Awaitable[T]]:
+    """Помечает функцию репозитория как read-only: её запросы идут на реплику.
+
+    Если реплика отвалилась посреди запроса, она помечается недоступной,
+    а чтение повторяется на primary.
+    """
+
+    @wraps(func)
+    async def wrapper(session: "AsyncSession", *args: Any, **kwargs: Any) -> T:
+        if replica_engine is None or not ReplicaState.available:
+            return await func(session, *args, **kwargs)
+
+        owns_transaction = not session.in_transaction()
+        token = read_only_scope.set(True)
+        try:
+            return await func(session, *args, **kwargs)
+        except (OperationalError, DBAPIError, OSError) as exc:
+            if isinstance(exc, DBAPIError) and not exc.connection_invalidated:
+                raise
+            if not owns_transaction:
+                raise
+            logger.warning("Replica read failed, falling back to primary: %s", exc)
+            ReplicaState.available = False
+            replica_fallbacks.inc()
+            await session.rollback()
+        finally:
+            read_only_scope.reset(token)
+
+        return await func(session, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaMonitor:
+    """Периодически проверяет доступность и отставание реплики."""
+
+    def __init__(self, max_lag: float, interval: float) -> None:
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag: float | None = None
+        self._task: asyncio.Task | None = None
+        metrics.gauge("db_replica.available", lambda: ReplicaState.available)
+        metrics.gauge("db_replica.lag_seconds", lambda: self.lag)
+
+    async def check(self) -> None:
+        try:
+            async with replica_engine.connect() as connection:
+                self.lag = float((await connection.execute(REPLICA_LAG_QUERY)).scalar())
+        except (DBAPIError, OSError, asyncio.TimeoutError):
+            self.lag = None
+            ReplicaState.available = False
+            return
+
+        available = self.lag <= self.max_lag
+        if available != ReplicaState.available:
+            logger.info("Replica available=%s, lag=%.3fs", available, self.lag)
+        ReplicaState.available = available
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if replica_engine is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        ReplicaState.available = False
+
+
+replica_monitor = ReplicaMonitor(
+    max_lag=settings.postgres.replica_max_lag_ms / 1000,
+    interval=settings.postgres.replica_check_interval_ms / 1000,
+)
@@ -1,23 +1,157 @@
-from typing import AsyncGenerator
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator
+from uuid import uuid4
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from app.core.metrics import Counter, Summary, metrics
+from app.core.settings import PostgresConfig, settings
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """QueuePool, который замеряет ожидание свободного соединения.
+
+    Метрики у каждого пула свои (primary и реплика), их подключает
+    register_pool_metrics.
+    """
+
+    checkout_wait: Summary | None = None
+    checkout_timeouts: Counter | None = None
+
+    def instrument(self, name: str) -> None:
+        self.checkout_wait = metrics.summary(f"{name}.checkout_wait_seconds")
+        self.checkout_timeouts = metrics.counter(f"{name}.checkout_timeouts")
+
+    def recreate(self) -> "InstrumentedPool":
+        # engine.dispose() заменяет пул новым экземпляром: метрики переходят к нему
+        pool = super().recreate()
+        pool.checkout_wait = self.checkout_wait
+        pool.checkout_timeouts = self.checkout_timeouts
+        return pool
+
+    def _do_get(self) -> Any:
+        if self.checkout_wait is None:
+            return super()._do_get()
+
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_timeouts.inc()
+            raise
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - started)
+
+
+def engine_options(config: PostgresConfig) -> dict[str, Any]:
+    if config.pgbouncer:
+        # PgBouncer сам держит пул; prepared statements в transaction pooling
+        # не переживают смену серверного соединения
+        return {
+            "poolclass": NullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+        }
+
+    return {
+        "poolclass": InstrumentedPool,
+        "pool_size": config.pool_size,
+        "max_overflow": config.max_overflow,
+        "pool_timeout": config.pool_timeout,
+        "pool_recycle": config.pool_recycle,
+        "pool_pre_ping": config.pool_pre_ping,
+        "connect_args": {"statement_cache_size": config.statement_cache_size},
+    }
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app.core.settings import settings
+def register_pool_metrics(name: str, engine: AsyncEngine) -> None:
+    if not isinstance(engine.pool, InstrumentedPool):
+        return
+
+    engine.pool.instrument(name)
+    # engine.pool, а не сам пул: после dispose() он другой
+    metrics.gauge(f"{name}.size", lambda: engine.pool.size())
+    metrics.gauge(f"{name}.checked_out", lambda: engine.pool.checkedout())
+    metrics.gauge(f"{name}.checked_in", lambda: engine.pool.checkedin())
+    metrics.gauge(f"{name}.overflow", lambda: engine.pool.overflow())
+
 
 engine = create_async_engine(
     url=settings.postgres.get_url,
-    pool_size=settings.postgres.pool_size,
-    max_overflow=settings.postgres.max_overflow,
     echo=settings.postgres.echo,
+    **engine_options(settings.postgres),
 )
+register_pool_metrics("db_pool", engine)
+
+replica_engine: AsyncEngine | None = None
+if settings.postgres.replica_host:
+    replica_engine = create_async_engine(
+        url=settings.postgres.get_replica_url,
+        echo=settings.postgres.echo,
+        **engine_options(settings.postgres),
+    )
+    register_pool_metrics("db_replica_pool", replica_engine)
+
+
+class ReplicaState:
+    # Переключается монитором реплики (app.database.routing.ReplicaMonitor)
+    available: bool = False
+
+
+# Включается на время read-only функций репозитория
+read_only_scope: ContextVar[bool] = ContextVar("read_only_scope", default=False)
+# Включается на остаток запроса, которому нужны только что записанные данные
+primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
+
+
+class RoutingSession(Session):
+    """Отправляет read-only чтения на реплику, всё остальное — на primary."""
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Engine:
+        if (
+            replica_engine is not None
+            and ReplicaState.available
+            and read_only_scope.get()
+            and not primary_pinned.get()
+            and not self._flushing
+        ):
+            return replica_engine.sync_engine
+        return engine.sync_engine
+
 
 session_factory = async_sessionmaker(
     bind=engine,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
     autoflush=False,
 )
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    # AsyncSession берёт соединение из пула только на первом запросе к БД:
+    # запросы, завершившиеся раньше (отозванный токен, неверный JWT), пул не трогают
     async with session_factory() as session:
         yield session
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """Завершает текущую транзакцию и возвращает соединение в пул.
+
+    Сессией можно пользоваться дальше: следующий запрос возьмёт соединение
+    заново. Загруженные объекты остаются доступны (expire_on_commit=False).
+    """
+    if session.in_transaction():
+        await session.commit()
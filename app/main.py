@@ -4,7 +4,15 @@ from fastapi import FastAPI
 from fastapi_limiter import FastAPILimiter
 
 from app.api import api_router
+from app.core.redis_scripts import redis_scripts
 from app.core.redis_service import init_redis
+from app.core.settings import settings
+from app.database.routing import replica_monitor
+from app.services.password_hasher import password_hasher
+from app.services.revocation import revocation_filter
+from app.services.session_partitions import session_partitions
+from app.services.session_reaper import session_reaper
+from app.services.session_store import session_persister
 from fastapi.middleware.cors import CORSMiddleware
 
 
@@ -12,10 +20,25 @@ from fastapi.middleware.cors import CORSMiddleware
 async def lifespan(app: FastAPI):
     redis = await init_redis()
     await FastAPILimiter.init(redis)
+    await redis_scripts.load(redis)
     app.state.redis = redis
+    revocation_filter.start(redis)
+    replica_monitor.start()
+    if settings.app.session_store == "redis":
+        session_persister.start(redis)
+    if settings.app.session_reaper_enabled:
+        session_reaper.start(redis)
+    if settings.app.session_partitions_enabled:
+        session_partitions.start(redis)
     yield
+    await session_partitions.stop()
+    await session_reaper.stop()
+    await session_persister.stop()
+    await replica_monitor.stop()
+    await revocation_filter.stop()
     await redis.close()
     await FastAPILimiter.close()
+    password_hasher.shutdown()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -0,0 +1,78 @@
+"""Быстрый путь чтения для горячих запросов (вход, /me, проверка email).
+
+Заранее построенные Core-запросы выполняются напрямую на соединении сессии,
+в обход ORM: без сущностей, identity map и отслеживания изменений. Строки
+отображаются в неизменяемые записи со __slots__. Запись через ORM-модели
+и миграции не меняются.
+
+Если чтение само открыло транзакцию, оно сразу её завершает: соединение
+не простаивает, пока запрос проверяет пароль или ходит в SMTP.
+"""
+
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+from sqlalchemy import Row, Select, bindparam, select
+
+from app.database.models import User
+from app.database.session import release_connection
+from app.repository.records import UserCredentialsRecord, UserRecord
+from app.database.routing import replica_read
+from app.repository.single_flight import single_flight
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+users = User.__table__
+
+USER_COLUMNS = (
+    users.c.id,
+    users.c.name,
+    users.c.email,
+    users.c.role,
+    users.c.is_active,
+    users.c.is_verified,
+)
+
+SELECT_USER_BY_ID = select(*USER_COLUMNS).where(users.c.id == bindparam("user_id"))
+SELECT_USER_BY_EMAIL = select(*USER_COLUMNS).where(users.c.email == bindparam("email"))
+SELECT_CREDENTIALS_BY_EMAIL = select(
+    users.c.id,
+    users.c.password,
+    users.c.role,
+    users.c.is_active,
+).where(users.c.email == bindparam("email"))
+
+
+async def fetch_one(
+    session: "AsyncSession", statement: Select, params: dict[str, Any]
+) -> Row | None:
+    owns_transaction = not session.in_transaction()
+    connection = await session.connection()
+    row = (await connection.execute(statement, params)).first()
+    if owns_transaction:
+        await release_connection(session)
+    return row
+
+
+@single_flight
+@replica_read
+async def fetch_user_by_id(
+    session: "AsyncSession", user_id: str | UUID
+) -> UserRecord | None:
+    row = await fetch_one(session, SELECT_USER_BY_ID, {"user_id": user_id})
+    return UserRecord(*row) if row else None
+
+
+@single_flight
+async def fetch_user_by_email(session: "AsyncSession", email: str) -> UserRecord | None:
+    row = await fetch_one(session, SELECT_USER_BY_EMAIL, {"email": email})
+    return UserRecord(*row) if row else None
+
+
+@single_flight
+async def fetch_user_credentials(
+    session: "AsyncSession", email: str
+) -> UserCredentialsRecord | None:
+    row = await fetch_one(session, SELECT_CREDENTIALS_BY_EMAIL, {"email": email})
+    return UserCredentialsRecord(*row) if row else None
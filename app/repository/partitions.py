@@ -0,0 +1,145 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+@dataclass(slots=True, frozen=True)
+class Partition:
+    name: str
+    lower: datetime
+    upper: datetime
+    detach_pending: bool
+
+
+async def is_partitioned(connection: "AsyncConnection", table: str) -> bool:
+    statement = text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass(:table))"
+    )
+    return (await connection.execute(statement, {"table": table})).scalar_one()
+
+
+async def get_partitions(connection: "AsyncConnection", table: str) -> list[Partition]:
+    """Диапазонные секции таблицы, отсортированные по нижней границе."""
+    # Границы приводятся к UTC, чтобы не зависеть от TimeZone сессии
+    await connection.execute(text("SET LOCAL TimeZone = 'UTC'"))
+    statement = text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), i.inhdetachpending "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    )
+    partitions = []
+    for name, bound, detach_pending in await connection.execute(
+        statement, {"table": table}
+    ):
+        match = BOUND_PATTERN.search(bound)
+        if match is None:
+            continue  # DEFAULT-секция
+        lower, upper = (datetime.fromisoformat(value) for value in match.groups())
+        partitions.append(Partition(name, lower, upper, detach_pending))
+    return sorted(partitions, key=lambda partition: partition.lower)
+
+
+async def get_default_partition(
+    connection: "AsyncConnection", table: str
+) -> str | None:
+    statement = text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table) "
+        "AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'"
+    )
+    return (await connection.execute(statement, {"table": table})).scalar()
+
+
+async def create_partition(
+    connection: "AsyncConnection",
+    table: str,
+    name: str,
+    lower: datetime,
+    upper: datetime,
+    key: str,
+    default: str | None = None,
+) -> int:
+    """Создаёт секцию [lower, upper); возвращает число строк, перенесённых в неё.
+
+    Секцию нельзя создать, пока DEFAULT-секция хранит строки её диапазона:
+    тогда секция создаётся отдельной таблицей, строки переносятся в неё
+    и она присоединяется (ATTACH) в той же транзакции.
+    """
+    bound = f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    in_range = f'"{key}" >= :lower AND "{key}" < :upper'
+    params = {"lower": lower, "upper": upper}
+    if (
+        default is not None
+        and (
+            await connection.execute(
+                text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE {in_range})'),
+                params,
+            )
+        ).scalar_one()
+    ):
+        await connection.execute(
+            text(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING ALL)')
+        )
+        moved = await connection.execute(
+            text(
+                f'WITH moved AS (DELETE FROM "{default}" WHERE {in_range} RETURNING *) '
+                f'INSERT INTO "{name}" SELECT * FROM moved'
+            ),
+            params,
+        )
+        await connection.execute(
+            text(f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" {bound}')
+        )
+        return moved.rowcount
+
+    await connection.execute(
+        text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" {bound}')
+    )
+    return 0
+
+
+async def delete_before(
+    connection: "AsyncConnection", name: str, key: str, before: datetime
+) -> int:
+    statement = text(f'DELETE FROM "{name}" WHERE "{key}" < :before')
+    return (await connection.execute(statement, {"before": before})).rowcount
+
+
+async def detach_partition(
+    connection: "AsyncConnection",
+    table: str,
+    name: str,
+    pending: bool = False,
+    concurrently: bool = True,
+) -> None:
+    """DETACH CONCURRENTLY не блокирует запись в таблицу; нужен autocommit.
+
+    pending — прошлый DETACH CONCURRENTLY прервался, его нужно завершить.
+    Postgres не выполняет DETACH CONCURRENTLY при DEFAULT-секции: тогда
+    нужен concurrently=False, обычный DETACH в короткой транзакции.
+    """
+    mode = "FINALIZE" if pending else "CONCURRENTLY" if concurrently else ""
+    await connection.execute(
+        text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}" {mode}')
+    )
+
+
+async def set_lock_timeout(connection: "AsyncConnection", timeout_ms: int) -> None:
+    """lock_timeout до конца текущей транзакции."""
+    await connection.execute(
+        text("SELECT set_config('lock_timeout', :value, true)"),
+        {"value": f"{timeout_ms}ms"},
+    )
+
+
+async def drop_table(connection: "AsyncConnection", name: str) -> None:
+    await connection.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from uuid import UUID
+
+from app.database.models.user import UserRole
+
+
+@dataclass(slots=True, frozen=True)
+class UserRecord:
+    """Неизменяемый снимок пользователя без пароля — для кешей и чтения."""
+
+    id: UUID
+    name: str
+    email: str
+    role: UserRole
+    is_active: bool
+    is_verified: bool
+
+    @classmethod
+    def from_hash(cls, fields: dict[str, str]) -> "UserRecord":
+        return cls(
+            id=UUID(fields["id"]),
+            name=fields["name"],
+            email=fields["email"],
+            role=UserRole(fields["role"]),
+            is_active=fields["is_active"] == "1",
+            is_verified=fields["is_verified"] == "1",
+        )
+
+    def to_hash(self) -> dict[str, str]:
+        return {
+            "id": str(self.id),
+            "name": self.name,
+            "email": self.email,
+            "role": self.role.value,
+            "is_active": "1" if self.is_active else "0",
+            "is_verified": "1" if self.is_verified else "0",
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class UserCredentialsRecord:
+    """Поля пользователя, нужные для входа."""
+
+    id: UUID
+    password: bytes
+    role: UserRole
+    is_active: bool
@@ -1,14 +1,29 @@
+from datetime import datetime
 from typing import TYPE_CHECKING, Sequence
 from uuid import UUID
 
-from sqlalchemy import asc, delete, select
+from sqlalchemy import (
+    Row,
+    String,
+    asc,
+    cast,
+    delete,
+    desc,
+    func,
+    insert,
+    select,
+    true,
+    update,
+)
 
-from app.database.models import Session
+from app.database.models import Session, User
+from app.database.routing import replica_read
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
 
+@replica_read
 async def get_session_by_session_id(
     session: "AsyncSession", session_id: str
 ) -> Session | None:
@@ -17,6 +32,7 @@ async def get_session_by_session_id(
     return result.scalar_one_or_none()
 
 
+@replica_read
 async def get_sessions_by_user_id(
     session: "AsyncSession",
     user_id: str | UUID,
@@ -38,3 +54,167 @@ async def delete_session_by_session_id(
     statement = delete(Session).where(Session.session_id == session_id)
     await session.execute(statement)
     await session.commit()
+
+
+async def delete_sessions_by_user_id(
+    session: "AsyncSession",
+    user_id: str | UUID,
+    exclude_session_id: str | None = None,
+) -> Sequence[UUID]:
+    statement = (
+        delete(Session).where(Session.user_id == user_id).returning(Session.session_id)
+    )
+    if exclude_session_id is not None:
+        statement = statement.where(Session.session_id != exclude_session_id)
+
+    session_ids = (await session.execute(statement)).scalars().all()
+    await session.commit()
+    return session_ids
+
+
+async def admit_session(
+    session: "AsyncSession",
+    family_id: UUID,
+    user_id: str | UUID,
+    session_id: str | UUID,
+    user_agent: str,
+    last_active: datetime,
+    expire_at: datetime,
+    limit: int,
+) -> Sequence[UUID]:
+    """Добавляет сессию и вытесняет самые старые сверх лимита одним запросом.
+
+    family_id становится PK строки: он не меняется при ротации session_id
+    и связывает все refresh-токены одной сессии.
+    Возвращает session_id вытесненных сессий.
+    """
+    # Все CTE выполняются на одном снимке, поэтому параллельные входы одного
+    # пользователя сериализуются блокировкой до конца транзакции
+    await session.execute(
+        select(
+            func.pg_advisory_xact_lock(func.hashtextextended(cast(user_id, String), 0))
+        )
+    )
+
+    oldest = (
+        select(Session.id)
+        .where(Session.user_id == user_id)
+        .order_by(desc(Session.last_active))
+        .offset(limit - 1)
+    )
+    evicted = (
+        delete(Session)
+        .where(Session.id.in_(oldest))
+        .returning(Session.session_id)
+        .cte("evicted")
+    )
+    inserted = (
+        insert(Session)
+        .values(
+            id=family_id,
+            user_id=user_id,
+            session_id=session_id,
+            user_agent=user_agent,
+            last_active=last_active,
+            expire_at=expire_at,
+        )
+        .returning(Session.session_id)
+        .cte("inserted")
+    )
+    statement = select(evicted.c.session_id).add_cte(inserted)
+
+    evicted_session_ids = (await session.execute(statement)).scalars().all()
+    await session.commit()
+    return evicted_session_ids
+
+
+async def rotate_session(
+    session: "AsyncSession",
+    user_id: str | UUID,
+    old_session_id: str | UUID,
+    new_session_id: str | UUID,
+    user_agent: str,
+    last_active: datetime,
+    expire_at: datetime,
+    family_id: str | UUID | None,
+) -> Row | None:
+    """Ротация refresh-токена одним запросом.
+
+    Меняет session_id и возвращает family_id, id/role/is_active пользователя.
+    Если old_session_id уже нет, а семейство family_id живо — токен
+    предъявлен повторно: сессия семейства удаляется в том же запросе,
+    её текущий session_id возвращается в replayed_session_id.
+    None — сессия неизвестна. Транзакцию фиксирует вызывающий.
+    """
+    rotated = (
+        update(Session)
+        .where(
+            Session.session_id == old_session_id,
+            Session.user_id == user_id,
+            Session.expire_at > func.now(),
+            User.id == Session.user_id,
+        )
+        .values(
+            session_id=new_session_id,
+            last_active=last_active,
+            user_agent=user_agent,
+            expire_at=expire_at,
+        )
+        .returning(
+            Session.id.label("family_id"),
+            User.id.label("user_id"),
+            User.role,
+            User.is_active,
+        )
+        .cte("rotated")
+    )
+    # На общем снимке строка семейства при успешной ротации ещё хранит
+    # old_session_id, поэтому ветки взаимоисключающие
+    replayed = (
+        delete(Session)
+        .where(
+            Session.id == family_id,
+            Session.user_id == user_id,
+            Session.session_id != old_session_id,
+        )
+        .returning(Session.session_id)
+        .cte("replayed")
+    )
+    statement = select(
+        rotated.c.family_id,
+        rotated.c.user_id,
+        rotated.c.role,
+        rotated.c.is_active,
+        replayed.c.session_id.label("replayed_session_id"),
+    ).select_from(rotated.join(replayed, true(), full=True))
+
+    return (await session.execute(statement)).one_or_none()
+
+
+async def delete_expired_sessions(
+    session: "AsyncSession", expired_before: datetime, limit: int
+) -> int:
+    """Удаляет не больше limit истёкших сессий, самые старые первыми.
+
+    Выборка идёт по ix_sessions_expire_at; SKIP LOCKED не ждёт строки,
+    которые сейчас ротируются или удаляются другими запросами.
+    """
+    expired = (
+        select(Session.id)
+        .where(Session.expire_at < expired_before)
+        .order_by(asc(Session.expire_at))
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.execute(delete(Session).where(Session.id.in_(expired)))
+    await session.commit()
+    return result.rowcount
+
+
+async def get_oldest_expire_at(
+    session: "AsyncSession", expired_before: datetime
+) -> datetime | None:
+    statement = select(func.min(Session.expire_at)).where(
+        Session.expire_at < expired_before
+    )
+    return (await session.execute(statement)).scalar_one_or_none()
@@ -0,0 +1,35 @@
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, TypeVar
+
+from app.core.single_flight import SingleFlight
+from app.database.session import primary_pinned
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar("T")
+
+repository_flight = SingleFlight("repository")
+
+
+def single_flight(
+    func: Callable[..., Awaitable[T]],
+) -> Callable[..., Awaitable[T]]:
+    """Одновременные чтения с одинаковыми аргументами выполняют один запрос.
+
+    Только для быстрого пути (app.repository.fast): его неизменяемые записи
+    можно отдать всем ожидающим, ORM-объекты привязаны к своей сессии.
+    """
+
+    @wraps(func)
+    async def wrapper(session: "AsyncSession", *args: Any, **kwargs: Any) -> T:
+        # Запрос, закреплённый за primary, не должен получить ответ с реплики
+        key = (
+            func.__qualname__,
+            primary_pinned.get(),
+            *(str(arg) for arg in args),
+            *((name, str(value)) for name, value in sorted(kwargs.items())),
+        )
+        return await repository_flight.do(key, lambda: func(session, *args, **kwargs))
+
+    return wrapper
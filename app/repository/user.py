@@ -1,10 +1,12 @@
 from typing import TYPE_CHECKING
+from uuid import UUID
 
 from sqlalchemy import select, update
 
 from app.database.models import User
+from app.database.routing import replica_read
 from app.schemas.user import UserCreate
-from app.services.utils import hash_pasword
+from app.services.password_hasher import password_hasher
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
@@ -16,6 +18,7 @@ async def get_user_by_email(session: "AsyncSession", email: str) -> User | None:
     return result.scalar_one_or_none()
 
 
+@replica_read
 async def get_user_by_id(session: "AsyncSession", user_id: str) -> User | None:
     statement = select(User).where(User.id == user_id)
     result = await session.execute(statement)
@@ -27,7 +30,7 @@ async def create_user(session: "AsyncSession", user_in: UserCreate) -> User:
     user = User(
         name=user_in.name,
         email=user_in.email.lower(),
-        password=hash_pasword(user_in.password),
+        password=await password_hasher.hash(user_in.password),
     )
 
     session.add(user)
@@ -35,3 +38,23 @@ async def create_user(session: "AsyncSession", user_in: UserCreate) -> User:
     return user
 
 
+async def set_user_active(
+    session: "AsyncSession", user_id: str | UUID, is_active: bool
+) -> None:
+    statement = update(User).where(User.id == user_id).values(is_active=is_active)
+    await session.execute(statement)
+    await session.commit()
+
+
+async def set_user_verified(session: "AsyncSession", user_id: str | UUID) -> None:
+    statement = update(User).where(User.id == user_id).values(is_verified=True)
+    await session.execute(statement)
+    await session.commit()
+
+
+async def update_user_password(
+    session: "AsyncSession", user_id: str | UUID, password: bytes
+) -> None:
+    """Без commit: сохраняется вместе с остальной транзакцией вызывающего."""
+    statement = update(User).where(User.id == user_id).values(password=password)
+    await session.execute(statement)
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field, UUID4
+from uuid import UUID
+
+from pydantic import BaseModel, EmailStr, Field
 
 
 class UserBase(BaseModel):
@@ -11,4 +13,4 @@ class UserCreate(UserBase):
 
 
 class UserResponse(UserBase):
-    id: UUID4
+    id: UUID  # новые пользователи получают UUIDv7, старые — UUIDv4
@@ -1,23 +1,40 @@
+import asyncio
+import time
 from datetime import timedelta
-from typing import Annotated, Any
+from typing import Annotated, Any, Iterable
+from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import and_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.redis_service import RedisService, get_redis
+from app.core.redis_service import RedisService, dumps, get_redis
 from app.core.settings import settings
-from app.database.models import Session, User
+from app.database.models.user import UserRole
+from app.database.routing import pin_primary
 from app.database.session import get_session
-from app.repository.session import (
-    delete_session_by_session_id,
-    get_session_by_session_id,
-    get_sessions_by_user_id,
-)
-from app.repository.user import get_user_by_email, get_user_by_id
+from app.repository.records import UserRecord
+from app.repository.fast import fetch_user_credentials
+from app.repository.user import update_user_password
 from app.schemas.token import TokenPairSchema
+from app.services.password_hasher import password_hasher
+from app.services.revocation import (
+    BATCH_REVOKE_SCRIPT,
+    BLACKLIST_PREFIX,
+    BUMP_EPOCH_SCRIPT,
+    EPOCH_REVOCATION_PREFIX,
+    REVOCATION_CHANNEL,
+    USER_EPOCH_PREFIX,
+    epoch_revokes,
+    revocation_filter,
+)
+from app.services.session_store import SessionStore, get_session_store
 from app.services.token_service import TokenService
-from app.services.utils import check_password
+from app.services.user_service import UserService
+
+REFRESH_GRACE_PREFIX = "refresh_grace:"
+REFRESH_PENDING = "pending"
+REFRESH_WAIT_TIMEOUT = 2.0
+REFRESH_WAIT_INTERVAL = 0.05
 
 
 class AuthService:
@@ -25,12 +42,16 @@ class AuthService:
         self,
         redis: Annotated[RedisService, Depends(get_redis)],
         db_session: Annotated[AsyncSession, Depends(get_session)],
+        users: Annotated[UserService, Depends()],
+        sessions: Annotated[SessionStore, Depends(get_session_store)],
     ) -> None:
         self.db_session = db_session
         self.redis = redis
+        self.users = users
+        self.sessions = sessions
 
-    async def get_active_user(self, user_id: str) -> User:
-        user = await get_user_by_id(self.db_session, user_id)
+    async def get_active_user(self, user_id: str) -> UserRecord:
+        user = await self.users.get_user(user_id)
 
         if not user:
             raise HTTPException(
@@ -48,8 +69,8 @@ class AuthService:
     async def login(
         self, email: str, password: str, user_agent: str
     ) -> TokenPairSchema:
-        user = await get_user_by_email(self.db_session, email)
-        if not user or not check_password(password, user.password):
+        user = await fetch_user_credentials(self.db_session, email)
+        if not user or not await password_hasher.verify(password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials",
@@ -61,63 +82,110 @@ class AuthService:
                 detail="User inactive",
             )
 
-        token_service = TokenService(user)  # Инициализируем структуру JWT
-
-        sessions = await get_sessions_by_user_id(
-            self.db_session, user.id
-        )  # Получаем все сессии пользователя в порядке возрастания last_active
+        if password_hasher.needs_rehash(user.password):
+            # Пересчитываем хеш под текущие схему/стоимость
+            await update_user_password(
+                self.db_session, user.id, await password_hasher.hash(password)
+            )
+            await self.db_session.commit()
 
-        if len(sessions) == settings.app.user_session_limit:
-            await self.db_session.delete(
-                sessions[0]
-            )  # Удаляем самую старую, с точки зрения активности, сессию из БД, если их на текущий момент 5
+        token_service = TokenService(
+            user.id, user.role, epoch=await self.get_user_epoch(user.id)
+        )  # Инициализируем структуру JWT
 
-        new_session = Session(
+        evicted_session_ids = await self.sessions.admit(
+            family_id=token_service.family_id,
             user_id=user.id,
             session_id=token_service.sid,
             user_agent=user_agent,
             last_active=token_service.iat,
             expire_at=token_service.refresh_exp,
-        )
-
-        self.db_session.add(new_session)
-        await self.db_session.commit()
+            limit=settings.app.user_session_limit,
+        )  # Самые старые по last_active сессии сверх лимита удаляются тем же запросом
+        await self.revoke_access_tokens(evicted_session_ids)
 
         return TokenPairSchema(
             access_token=token_service.access_token,
             refresh_token=token_service.refresh_token,
         )
 
+    async def revoke_access_tokens(self, session_ids: Iterable[str | UUID]) -> None:
+        session_ids = [str(session_id) for session_id in session_ids]
+        if not session_ids:
+            return
+
+        ttl_ms = settings.jwt.access_token_expire_ms
+        expire_at = time.time() + ttl_ms / 1000
+        for session_id in session_ids:
+            revocation_filter.add(session_id, expire_at)
+
+        await self.redis.script(
+            BATCH_REVOKE_SCRIPT,
+            keys=[f"{BLACKLIST_PREFIX}{session_id}" for session_id in session_ids],
+            args=[
+                "revoked",
+                ttl_ms,
+                REVOCATION_CHANNEL,
+                dumps({"sids": session_ids, "exp": expire_at}),
+            ],
+        )
+
     async def logout(self, access_token: str) -> None:
         payload = TokenService.decode_jwt(access_token)
+        TokenService.forget_access_token(access_token)
 
         session_id = payload["sid"]
 
-        await self.redis.set(
-            name=f"blacklist_access_token:{session_id}",
-            value="revoked",
-            ex=timedelta(milliseconds=settings.jwt.access_token_expire_ms),
+        await self.revoke_access_tokens([session_id])
+        await self.sessions.delete(session_id)
+
+    async def get_user_epoch(self, user_id: str) -> int:
+        epoch = await self.redis.get(name=f"{USER_EPOCH_PREFIX}{user_id}")
+        return int(epoch or 0)
+
+    async def revoke_user_sessions(
+        self, user_id: str, except_session_id: str | None = None
+    ) -> None:
+        """Отзывает все сессии пользователя, кроме except_session_id.
+
+        Access-токены отзываются увеличением эпохи пользователя, а сессии
+        удаляются одним DELETE — стоимость не зависит от числа сессий.
+        """
+        ttl_ms = settings.jwt.access_token_expire_ms
+        expire_at = time.time() + ttl_ms / 1000
+        exempt_session_id = str(except_session_id or "")
+
+        epoch = await self.redis.script(
+            BUMP_EPOCH_SCRIPT,
+            keys=[
+                f"{USER_EPOCH_PREFIX}{user_id}",
+                f"{EPOCH_REVOCATION_PREFIX}{user_id}",
+            ],
+            args=[
+                str(user_id),
+                exempt_session_id,
+                ttl_ms,
+                expire_at,
+                REVOCATION_CHANNEL,
+            ],
         )
+        revocation_filter.add_epoch(str(user_id), epoch, exempt_session_id, expire_at)
 
-        await delete_session_by_session_id(self.db_session, session_id)
+        session_ids = await self.sessions.delete_user_sessions(
+            user_id, exclude_session_id=except_session_id
+        )
+        # Чёрный список по sid остаётся полным: его читают и без учёта эпох
+        await self.revoke_access_tokens(session_ids)
 
     async def logout_others(self, access_token: str) -> None:
         payload = TokenService.decode_jwt(access_token)
 
-        session_id = payload["sid"]
-        user_id = payload["sub"]
-        statement = select(Session).where(
-            and_(Session.user_id == user_id, Session.session_id != session_id)
+        await self.revoke_user_sessions(
+            user_id=payload["sub"], except_session_id=payload["sid"]
         )
-        sessions = (await self.db_session.execute(statement)).scalars().all()
-        for session in sessions:
-            await self.redis.set(
-                name=f"blacklist_access_token:{session.session_id}",
-                value="revoked",
-                ex=timedelta(milliseconds=settings.jwt.access_token_expire_ms),
-            )
-            await self.db_session.delete(session)
-        await self.db_session.commit()
+
+    async def force_logout(self, user_id: str) -> None:
+        await self.revoke_user_sessions(user_id=user_id)
 
     async def refresh_tokens(
         self, refresh_token: str, user_agent: str
@@ -130,37 +198,86 @@ class AuthService:
                 detail="Invalid or expired token",
             )
 
+        if not settings.jwt.refresh_grace_ms:
+            return await self.rotate_refresh_token(payload, user_agent)
+
+        # Первый запрос с этим refresh-токеном занимает ключ и выполняет ротацию,
+        # параллельные запросы в пределах окна получают ту же пару токенов
+        grace_key = f"{REFRESH_GRACE_PREFIX}{payload['sid']}"
+        grace_ttl = timedelta(milliseconds=settings.jwt.refresh_grace_ms)
+        claimed = await self.redis.set(
+            name=grace_key, value=REFRESH_PENDING, ex=grace_ttl, nx=True
+        )
+        if not claimed:
+            return await self.wait_for_refresh_result(grace_key)
+
+        try:
+            token_pair = await self.rotate_refresh_token(payload, user_agent)
+        except BaseException:
+            await self.redis.delete(name=grace_key)
+            raise
+
+        await self.redis.set(
+            name=grace_key, value=token_pair.model_dump(), ex=grace_ttl
+        )
+        return token_pair
+
+    async def wait_for_refresh_result(self, grace_key: str) -> TokenPairSchema:
+        deadline = time.monotonic() + REFRESH_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            value = await self.redis.get(name=grace_key)
+            if value is None:
+                break  # ротация не удалась или окно истекло
+            if value != REFRESH_PENDING:
+                return TokenPairSchema(**value)
+            await asyncio.sleep(REFRESH_WAIT_INTERVAL)
+
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+        )
+
+    async def rotate_refresh_token(
+        self, payload: dict[str, Any], user_agent: str
+    ) -> TokenPairSchema:
         user_id = payload["sub"]
-        old_session_id = payload["sid"]
+        token_service = TokenService(user_id, epoch=await self.get_user_epoch(user_id))
 
-        session = await get_session_by_session_id(self.db_session, old_session_id)
-        if not session:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        rotated = await self.sessions.rotate(
+            user_id=user_id,
+            old_session_id=payload["sid"],
+            new_session_id=token_service.sid,
+            user_agent=user_agent,
+            last_active=token_service.iat,
+            expire_at=token_service.refresh_exp,
+            family_id=payload.get("fam"),
+        )
 
-        user = await self.get_active_user(user_id)
-        token_service = TokenService(user)
-
-        statement = (
-            update(Session)
-            .where(Session.session_id == old_session_id)
-            .values(
-                session_id=token_service.sid,
-                last_active=token_service.iat,
-                user_agent=user_agent,
-                expire_at=token_service.refresh_exp,
+        if rotated is None or rotated.replayed_session_id is not None:
+            if rotated is not None:
+                # Повторное предъявление старого refresh-токена: семейство
+                # уже удалено, отзываем его access-токены
+                await self.revoke_access_tokens([rotated.replayed_session_id])
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
             )
-        )
 
-        await self.db_session.execute(statement)
-        await self.db_session.commit()
+        if not rotated.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User inactive",
+            )
 
+        token_service.role = rotated.role
+        token_service.family_id = rotated.family_id
         return TokenPairSchema(
             access_token=token_service.access_token,
             refresh_token=token_service.refresh_token,
         )
 
     async def get_access_token_payload(self, access_token: str) -> dict[str, Any]:
-        payload = TokenService.decode_jwt(access_token)
+        payload = TokenService.decode_access_token(access_token)
 
         if payload["purpose"] != "access_token":
             raise HTTPException(
@@ -169,8 +286,28 @@ class AuthService:
             )
 
         session_id = payload["sid"]
-        token_is_revoked = await self.redis.get(
-            name=f"blacklist_access_token:{session_id}"
+        user_id = payload["sub"]
+        token_epoch = payload.get("epc", 0)
+
+        # Токен выдан только что (логин/refresh): реплика может ещё не видеть
+        # записанную сессию, поэтому весь запрос читает с primary
+        if time.time() - payload["iat"] < settings.postgres.read_your_writes_ms / 1000:
+            pin_primary()
+
+        epoch_revoked = revocation_filter.is_epoch_revoked(
+            user_id, token_epoch, session_id
+        )
+        if epoch_revoked is None:
+            record = await self.redis.hgetall(
+                name=f"{EPOCH_REVOCATION_PREFIX}{user_id}"
+            )
+            epoch_revoked = bool(record) and epoch_revokes(
+                int(record["epoch"]), record["sid"], token_epoch, session_id
+            )
+
+        token_is_revoked = epoch_revoked or (
+            revocation_filter.might_be_revoked(session_id)
+            and await self.redis.exists(f"{BLACKLIST_PREFIX}{session_id}")
         )
         if token_is_revoked:
             raise HTTPException(
@@ -179,7 +316,17 @@ class AuthService:
             )
         return payload
 
-    async def get_current_user(self, access_token: str) -> User:
+    async def get_admin_payload(self, access_token: str) -> dict[str, Any]:
+        payload = await self.get_access_token_payload(access_token)
+
+        if payload["role"] != UserRole.admin.value:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions",
+            )
+        return payload
+
+    async def get_current_user(self, access_token: str) -> UserRecord:
         payload = await self.get_access_token_payload(access_token)
         user_id = payload["sub"]
         user = await self.get_active_user(user_id)
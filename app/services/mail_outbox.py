@@ -0,0 +1,50 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.redis_service import RedisPipeline
+
+# Исходящие письма: HTTP-запросы только добавляют записи, отправляет mail_worker
+MAIL_STREAM = "mail:outbox"
+MAIL_GROUP = "mail-workers"
+# Письма, ждущие повтора: ZSET, score — unix time следующей попытки
+MAIL_RETRY_QUEUE = "mail:retry"
+# Письма, исчерпавшие попытки, вместе с последней ошибкой
+MAIL_DEAD_LETTER_STREAM = "mail:dead"
+
+
+@dataclass(slots=True)
+class MailJob:
+    template: str
+    subject: str
+    recipient: str
+    body: dict[str, Any] = field(default_factory=dict)
+    attempt: int = 0
+
+    def to_fields(self) -> dict[str, str]:
+        return {
+            "template": self.template,
+            "subject": self.subject,
+            "recipient": self.recipient,
+            "body": json.dumps(self.body, ensure_ascii=False),
+            "attempt": str(self.attempt),
+        }
+
+    @classmethod
+    def from_fields(cls, fields: dict[str, str]) -> "MailJob":
+        return cls(
+            template=fields["template"],
+            subject=fields["subject"],
+            recipient=fields["recipient"],
+            body=json.loads(fields["body"]),
+            attempt=int(fields.get("attempt", 0)),
+        )
+
+
+def enqueue_mail(pipeline: RedisPipeline, job: MailJob) -> RedisPipeline:
+    """Добавляет письмо в outbox в составе pipeline вызывающего.
+
+    Поток не обрезается по MAXLEN: обрезка удалила бы и не отправленные
+    письма. Записи удаляет воркер (XDEL) после отправки или переноса.
+    """
+    return pipeline.xadd(MAIL_STREAM, job.to_fields())
@@ -1,22 +1,36 @@
-from datetime import timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
 from typing import TYPE_CHECKING, Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.responses import JSONResponse
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
+from fastapi_mail import ConnectionConfig
 from httpx import delete
 from pydantic import EmailStr
 
-from app.core.redis_service import RedisService, get_redis
+from app.core.redis_scripts import COMPARE_AND_DELETE_SCRIPT, SET_REPLACE_SCRIPT
+from app.core.redis_codecs import RawCodec
+from app.core.redis_service import RedisService, get_redis, key_codecs
 from app.core.settings import settings
 from app.database.session import get_session
-from app.repository.user import get_user_by_email
+from app.repository.fast import fetch_user_by_email
+from app.repository.user import set_user_verified
+from app.services.mail_outbox import MailJob, enqueue_mail
+from app.services.mail_templates import MailTemplates
+from app.services.smtp_pool import SMTPPool
+from app.services.user_service import UserService
 from app.services.utils import generate_confirmation_email_code
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
+CONFIRMATION_CODE_PREFIX = "confirmation_code:"
+# Число неверных попыток ввода текущего кода; живёт столько же, сколько код
+CONFIRMATION_ATTEMPTS_PREFIX = "confirmation_code_attempts:"
+
+key_codecs.register(CONFIRMATION_CODE_PREFIX, RawCodec())
+
 conf = ConnectionConfig(
     MAIL_USERNAME=settings.smtp.username,
     MAIL_PASSWORD=settings.smtp.password,
@@ -24,12 +38,62 @@ conf = ConnectionConfig(
     MAIL_PORT=settings.smtp.port,
     MAIL_SERVER=settings.smtp.host,
     MAIL_FROM_NAME="FastAPI",
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
+    MAIL_STARTTLS=settings.smtp.start_tls,
+    MAIL_SSL_TLS=settings.smtp.use_tls,
     TEMPLATE_FOLDER=Path(__file__).parent.parent / "templates",
 )
 
-fm = FastMail(conf)
+mail_templates = MailTemplates(
+    folder=conf.TEMPLATE_FOLDER,
+    reload=settings.smtp.mail_templates_reload,
+    thread_threshold=settings.smtp.mail_render_thread_threshold,
+)
+
+smtp_pool = SMTPPool(
+    hostname=settings.smtp.host,
+    port=settings.smtp.port,
+    username=settings.smtp.username,
+    password=settings.smtp.password,
+    use_tls=settings.smtp.use_tls,
+    start_tls=settings.smtp.start_tls,
+    size=settings.smtp.pool_size,
+    max_messages=settings.smtp.pool_max_messages,
+    idle_check=settings.smtp.pool_idle_check_ms / 1000,
+    send_timeout=settings.smtp.mail_send_timeout_ms / 1000,
+)
+
+
+def build_message(job: MailJob, html: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((conf.MAIL_FROM_NAME, conf.MAIL_FROM))
+    message["To"] = job.recipient
+    message["Subject"] = job.subject
+    message.set_content(html, subtype="html")
+    return message
+
+
+async def render_jobs(jobs: list[MailJob]) -> list[str]:
+    """Рендерит пачку писем, группируя их по шаблону."""
+    by_template: dict[str, list[int]] = {}
+    for index, job in enumerate(jobs):
+        by_template.setdefault(job.template, []).append(index)
+
+    bodies = [""] * len(jobs)
+    for template, indexes in by_template.items():
+        rendered = await mail_templates.render_batch(
+            template, [jobs[index].body for index in indexes]
+        )
+        for index, html in zip(indexes, rendered):
+            bodies[index] = html
+    return bodies
+
+
+async def deliver(jobs: list[MailJob]) -> list[Exception | None]:
+    """Отправляет пачку писем по одному соединению из пула; для mail_worker."""
+    bodies = await render_jobs(jobs)
+    return await smtp_pool.send_batch(
+        [build_message(job, html) for job, html in zip(jobs, bodies)]
+    )
 
 
 class MailService:
@@ -38,25 +102,24 @@ class MailService:
         self,
         redis: Annotated[RedisService, Depends(get_redis)],
         db_session: Annotated["AsyncSession", Depends(get_session)],
+        users: Annotated[UserService, Depends()],
     ) -> None:
         self.redis = redis
         self.db_session = db_session
+        self.users = users
 
-    @staticmethod
-    async def send_welcome_email(email: EmailStr, name: str) -> None:
-
-        message = MessageSchema(
+    async def send_welcome_email(self, email: EmailStr, name: str) -> None:
+        job = MailJob(
+            template="welcome_email.html",
             subject="Добро пожаловать!",
-            recipients=[email],
-            template_body={"name": name},
-            subtype=MessageType.html,
+            recipient=email,
+            body={"name": name},
         )
-
-        await fm.send_message(message, template_name="welcome_email.html")
+        await enqueue_mail(self.redis.pipeline(), job).execute()
 
     async def send_confirmation_email(self, email: EmailStr) -> JSONResponse:
 
-        user = await get_user_by_email(self.db_session, email)
+        user = await fetch_user_by_email(self.db_session, email)
         if not user:
             raise HTTPException(status_code=status.HTTP_200_OK)
 
@@ -68,43 +131,64 @@ class MailService:
 
         code = generate_confirmation_email_code()
 
-        message = MessageSchema(
+        job = MailJob(
+            template="confirmation_email.html",
             subject="Подтверждение регистрации",
-            recipients=[email],
-            template_body={
+            recipient=email,
+            body={
                 "name": user.name,
                 "confirmation_code": code,
             },
-            subtype=MessageType.html,
         )
 
-        await fm.send_message(message, template_name="confirmation_email.html")
-
-        await self.redis.delete(
-            name=f"confirmation_code:{email}"
-        )  # делаем предыдущий код не валидным (если был)
-        await self.redis.set(
-            name=f"confirmation_code:{email}",
-            value=code,
-            ex=timedelta(milliseconds=settings.smtp.confirmation_email_code_ttl),
+        # Новый код заменяет предыдущий вместе со счётчиком попыток;
+        # код и письмо с ним — одной транзакцией
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.script(
+            SET_REPLACE_SCRIPT,
+            keys=[
+                f"{CONFIRMATION_CODE_PREFIX}{email}",
+                f"{CONFIRMATION_ATTEMPTS_PREFIX}{email}",
+            ],
+            args=[str(code), settings.smtp.confirmation_email_code_ttl],
         )
+        await enqueue_mail(pipeline, job).execute()
 
         return JSONResponse(
             status_code=200, content={"message": "confirmation code has been sent"}
         )
 
-    async def is_valid_confirmation_code(self, email: EmailStr, code: int) -> bool:
-        value = await self.redis.get(name=f"confirmation_code:{email}")
-        if value is None:
+    async def consume_confirmation_code(self, email: EmailStr, code: int) -> None:
+        """Проверяет код и удаляет его при совпадении — один атомарный вызов."""
+        result = await self.redis.script(
+            COMPARE_AND_DELETE_SCRIPT,
+            keys=[
+                f"{CONFIRMATION_CODE_PREFIX}{email}",
+                f"{CONFIRMATION_ATTEMPTS_PREFIX}{email}",
+            ],
+            args=[str(code), settings.smtp.confirmation_email_code_max_attempts],
+        )
+        if result == -1:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="The confirmation code has expired",
             )
-        return value == code
+        if result == -2:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Too many attempts, request a new confirmation code",
+            )
+        if result != 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid confirmation code or email",
+            )
 
     async def confirm(self, email: EmailStr, code: int) -> JSONResponse:
 
-        user = await get_user_by_email(self.db_session, email)
+        # Быстрый путь сразу возвращает соединение в пул: проверка кода
+        # в Redis идёт без удерживаемого соединения
+        user = await fetch_user_by_email(self.db_session, email)
 
         if not user:
             raise HTTPException(
@@ -118,17 +202,10 @@ class MailService:
                 detail="Email is already confirmed",
             )
 
-        if not (await self.is_valid_confirmation_code(email, code)):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid confirmation code or email",
-            )
+        await self.consume_confirmation_code(email, code)
 
-        user.is_verified = True
-        await self.redis.delete(name=f"confirmation_code:{email}")
-        await self.db_session.commit()
+        await set_user_verified(self.db_session, user.id)
+        await self.users.invalidate(user.id)
         return JSONResponse(
             status_code=200, content={"message": "Email successfully confirmed"}
         )
-
-
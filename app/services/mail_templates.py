@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Mapping, Sequence
+
+from jinja2 import Environment, FileSystemLoader, nodes, select_autoescape
+from markupsafe import Markup, escape
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Разделитель, которым при предрендере помечаются места подстановки
+PLACEHOLDER = "\x00"
+
+
+@dataclass(slots=True)
+class CompiledTemplate:
+    name: str
+    mtime: float
+    size: int
+    render_context: Callable[[Mapping[str, Any]], str]
+    # Предрендеренная оболочка: статические куски между подстановками
+    parts: list[str] | None = None
+    names: list[str] | None = None
+
+    def render(self, context: Mapping[str, Any]) -> str:
+        if self.parts is None:
+            return self.render_context(context)
+        chunks = [self.parts[0]]
+        for name, part in zip(self.names, self.parts[1:]):
+            chunks.append(escape(context.get(name, "")))
+            chunks.append(part)
+        return "".join(chunks)
+
+
+def is_plain_substitution(template: nodes.Template) -> bool:
+    """Шаблон состоит только из текста и {{ переменных }} без фильтров и логики."""
+    for node in template.body:
+        if not isinstance(node, nodes.Output):
+            return False
+        for child in node.nodes:
+            if not isinstance(child, (nodes.TemplateData, nodes.Name)):
+                return False
+    return True
+
+
+class MailTemplates:
+    """Скомпилированные шаблоны писем.
+
+    Каждый шаблон компилируется один раз. Шаблон из одних подстановок
+    {{ name }} предрендерится в оболочку, и письмо собирается склейкой
+    строк без Jinja. Прочие шаблоны крупнее thread_threshold байт
+    рендерятся в пуле потоков, чтобы не занимать event loop. С reload=True
+    изменённые на диске шаблоны перекомпилируются (для разработки).
+    """
+
+    def __init__(
+        self, folder: Path, reload: bool, thread_threshold: int, max_workers: int = 2
+    ) -> None:
+        self.folder = folder
+        self.reload = reload
+        self.thread_threshold = thread_threshold
+        self.environment = Environment(
+            loader=FileSystemLoader(folder),
+            autoescape=select_autoescape(["html", "xml"]),
+            auto_reload=reload,
+        )
+        self._compiled: dict[str, CompiledTemplate] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="mail-templates"
+        )
+        self._reloads = metrics.counter("mail_templates.reloads")
+        self._threaded = metrics.counter("mail_templates.threaded_renders")
+
+    def compile(self, name: str) -> CompiledTemplate:
+        path = self.folder / name
+        source = path.read_text(encoding="utf-8")
+        template = self.environment.get_template(name)
+        compiled = CompiledTemplate(
+            name=name,
+            mtime=path.stat().st_mtime,
+            size=len(source),
+            render_context=template.render,
+        )
+
+        tree = self.environment.parse(source)
+        if is_plain_substitution(tree):
+            names = {node.name for node in tree.find_all(nodes.Name)}
+            shell = template.render(
+                {name: Markup(f"{PLACEHOLDER}{name}{PLACEHOLDER}") for name in names}
+            )
+            pieces = shell.split(PLACEHOLDER)
+            compiled.parts = pieces[0::2]
+            compiled.names = pieces[1::2]
+
+        self._compiled[name] = compiled
+        return compiled
+
+    def compile_all(self) -> None:
+        for path in sorted(self.folder.glob("*.html")):
+            self.compile(path.name)
+        logger.info("Compiled %d mail templates", len(self._compiled))
+
+    def get(self, name: str) -> CompiledTemplate:
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            return self.compile(name)
+        if self.reload and (self.folder / name).stat().st_mtime != compiled.mtime:
+            self._reloads.inc()
+            return self.compile(name)
+        return compiled
+
+    async def render(self, name: str, context: Mapping[str, Any]) -> str:
+        return (await self.render_batch(name, [context]))[0]
+
+    async def render_batch(
+        self, name: str, contexts: Sequence[Mapping[str, Any]]
+    ) -> list[str]:
+        """Рендерит один шаблон для многих писем; в пул потоков — одним вызовом."""
+        compiled = self.get(name)
+        if compiled.parts is not None or compiled.size < self.thread_threshold:
+            return [compiled.render(context) for context in contexts]
+
+        self._threaded.inc()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            lambda: [compiled.render(context) for context in contexts],
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
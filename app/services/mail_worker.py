@@ -0,0 +1,244 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import time
+from typing import Any, Awaitable, Callable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+
+from app.core.metrics import metrics
+from app.core.redis_scripts import redis_scripts
+from app.core.settings import settings
+from app.services.mail_outbox import (
+    MAIL_DEAD_LETTER_STREAM,
+    MAIL_GROUP,
+    MAIL_RETRY_QUEUE,
+    MAIL_STREAM,
+    MailJob,
+)
+
+logger = logging.getLogger(__name__)
+
+# Возвращает в outbox письма, чьё время повтора наступило.
+# KEYS: очередь повторов, outbox; ARGV: текущее unix time, максимум писем
+MOVE_DUE_SCRIPT = redis_scripts.register(
+    "mail_worker.move_due",
+    """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, item in ipairs(due) do
+    redis.call('ZREM', KEYS[1], item)
+    local fields = {}
+    for name, value in pairs(cjson.decode(item).fields) do
+        table.insert(fields, name)
+        table.insert(fields, value)
+    end
+    redis.call('XADD', KEYS[2], '*', unpack(fields))
+end
+return #due
+""",
+)
+
+
+class MailWorker:
+    """Отправляет письма из outbox (Redis Stream, consumer group).
+
+    Письма отправляются пачками до batch_size по одному соединению,
+    не больше concurrency пачек одновременно. Неудачная попытка переносится
+    в очередь повторов с экспоненциальной задержкой, после max_attempts
+    письмо уходит в dead-letter stream. Запись удаляется из outbox только
+    вместе с этим переносом, поэтому письмо не теряется; письма упавшего
+    воркера забирает другой через claim_idle.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        deliver: Callable[[list[MailJob]], Awaitable[list[Exception | None]]],
+        concurrency: int,
+        batch_size: int,
+        max_attempts: int,
+        backoff: float,
+        backoff_max: float,
+        claim_idle: float,
+    ) -> None:
+        self.redis = redis
+        self.deliver = deliver
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.claim_idle = claim_idle
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._stopping = asyncio.Event()
+        self._in_flight: set[asyncio.Task] = set()
+        self._sent = metrics.counter("mail.sent")
+        self._retried = metrics.counter("mail.retried")
+        self._dead = metrics.counter("mail.dead_lettered")
+        self._send_seconds = metrics.summary("mail.send_seconds")
+        metrics.gauge("mail.in_flight", lambda: len(self._in_flight))
+
+    def retry_delay(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def ensure_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(
+                MAIL_STREAM, MAIL_GROUP, id="0", mkstream=True
+            )
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    async def move_due_retries(self) -> None:
+        await MOVE_DUE_SCRIPT(
+            self.redis,
+            keys=[MAIL_RETRY_QUEUE, MAIL_STREAM],
+            args=[time.time(), self.concurrency * 10],
+        )
+
+    async def claim_stale(self, count: int) -> list[tuple[str, dict[str, str]]]:
+        result = await self.redis.xautoclaim(
+            MAIL_STREAM,
+            MAIL_GROUP,
+            self.consumer,
+            min_idle_time=int(self.claim_idle * 1000),
+            count=count,
+        )
+        return [entry for entry in result[1] if entry[1]]
+
+    async def read(self, count: int) -> list[tuple[str, dict[str, str]]]:
+        response = await self.redis.xreadgroup(
+            MAIL_GROUP, self.consumer, {MAIL_STREAM: ">"}, count=count, block=1000
+        )
+        return [entry for _, entries in response for entry in entries]
+
+    async def handle(self, entries: list[tuple[str, dict[str, str]]]) -> None:
+        """Отправляет пачку записей одним вызовом deliver (одно SMTP-соединение)."""
+        batch: list[tuple[str, MailJob]] = []
+        for entry_id, fields in entries:
+            try:
+                batch.append((entry_id, MailJob.from_fields(fields)))
+            except (KeyError, ValueError) as exc:
+                await self.finish(entry_id, dead_letter={**fields, "error": repr(exc)})
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            # deliver возвращает ошибку каждого письма и ограничивает время
+            # отправки одного письма; исключение возможно только до отправки
+            # (рендер), поэтому ни одно письмо пачки ещё не принято сервером
+            errors = await self.deliver([job for _, job in batch])
+        except asyncio.CancelledError:
+            raise  # записи остаются в pending и будут забраны повторно
+        except Exception as exc:
+            errors = [exc] * len(batch)
+        self._send_seconds.observe(time.perf_counter() - started)
+
+        for (entry_id, job), error in zip(batch, errors):
+            if error is None:
+                self._sent.inc()
+                await self.finish(entry_id)
+            else:
+                await self.fail(entry_id, job, error)
+
+    async def fail(self, entry_id: str, job: MailJob, exc: Exception) -> None:
+        job.attempt += 1
+        if job.attempt >= self.max_attempts:
+            logger.error("Mail to %s dead-lettered: %r", job.recipient, exc)
+            await self.finish(
+                entry_id, dead_letter={**job.to_fields(), "error": repr(exc)}
+            )
+            return
+
+        delay = self.retry_delay(job.attempt)
+        logger.warning(
+            "Mail to %s failed (attempt %d), retry in %.1fs: %r",
+            job.recipient,
+            job.attempt,
+            delay,
+            exc,
+        )
+        retry = json.dumps({"id": entry_id, "fields": job.to_fields()})
+        await self.finish(entry_id, retry=(retry, time.time() + delay))
+
+    async def finish(
+        self,
+        entry_id: str,
+        retry: tuple[str, float] | None = None,
+        dead_letter: dict[str, str] | None = None,
+    ) -> None:
+        pipeline = self.redis.pipeline(transaction=True)
+        if retry is not None:
+            member, due = retry
+            pipeline.zadd(MAIL_RETRY_QUEUE, {member: due})
+            self._retried.inc()
+        if dead_letter is not None:
+            pipeline.xadd(MAIL_DEAD_LETTER_STREAM, dead_letter)
+            self._dead.inc()
+        pipeline.xack(MAIL_STREAM, MAIL_GROUP, entry_id)
+        pipeline.xdel(MAIL_STREAM, entry_id)
+        await pipeline.execute()
+
+    def spawn(self, entries: list[tuple[str, dict[str, Any]]]) -> None:
+        for start in range(0, len(entries), self.batch_size):
+            task = asyncio.create_task(
+                self.handle(entries[start : start + self.batch_size])
+            )
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def run(self) -> None:
+        await self.ensure_group()
+        logger.info(
+            "Mail worker %s started, concurrency=%d", self.consumer, self.concurrency
+        )
+        next_claim = 0.0
+        while not self._stopping.is_set():
+            free = self.concurrency - len(self._in_flight)
+            if free <= 0:
+                await asyncio.wait(self._in_flight, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            try:
+                await self.move_due_retries()
+                entries = []
+                if time.monotonic() >= next_claim:
+                    entries = await self.claim_stale(free * self.batch_size)
+                    next_claim = time.monotonic() + self.claim_idle / 2
+                if not entries:
+                    entries = await self.read(free * self.batch_size)
+            except RedisError as exc:
+                logger.warning("Mail outbox read failed: %s", exc)
+                await asyncio.sleep(1)
+                continue
+            self.spawn(entries)
+
+        if self._in_flight:
+            await asyncio.wait(self._in_flight)
+
+    def stop(self) -> None:
+        """Перестаёт читать outbox; run() завершится после текущих писем."""
+        self._stopping.set()
+
+
+def create_mail_worker(
+    redis: Redis,
+    deliver: Callable[[list[MailJob]], Awaitable[list[Exception | None]]],
+) -> MailWorker:
+    return MailWorker(
+        redis,
+        deliver,
+        concurrency=settings.smtp.mail_worker_concurrency,
+        batch_size=settings.smtp.mail_batch_size,
+        max_attempts=settings.smtp.mail_max_attempts,
+        backoff=settings.smtp.mail_retry_backoff_ms / 1000,
+        backoff_max=settings.smtp.mail_retry_backoff_max_ms / 1000,
+        claim_idle=settings.smtp.mail_claim_idle_ms / 1000,
+    )
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+
+from app.core.metrics import metrics
+from app.core.settings import settings
+from app.services.utils import (
+    check_password,
+    hash_pasword,
+    password_needs_rehash,
+)
+
+
+def _timed_call(func: Callable[..., Any], *args: Any) -> tuple[Any, float, float]:
+    # Выполняется внутри пула: возвращаем моменты старта и завершения,
+    # чтобы отделить время ожидания в очереди от времени хеширования.
+    started = time.monotonic()
+    result = func(*args)
+    return result, started, time.monotonic()
+
+
+class PasswordHasher:
+    """Хеширование и проверка паролей в отдельном пуле, а не в event loop."""
+
+    def __init__(
+        self,
+        executor: str,
+        max_workers: int,
+        max_pending: int,
+        timeout: float,
+    ) -> None:
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor}")
+
+        self.executor_kind = executor
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+
+        self._executor: Executor | None = None
+        self._pending = 0
+
+        self._queue_wait = metrics.summary("password_hash.queue_wait_seconds")
+        self._hash_time = metrics.summary("password_hash.hash_seconds")
+        self._rejected = metrics.counter("password_hash.rejected")
+        self._timeouts = metrics.counter("password_hash.timeouts")
+        metrics.gauge("password_hash.pending", lambda: self._pending)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hash",
+                )
+        return self._executor
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            self._rejected.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Service is busy, try again later",
+            )
+
+        self._pending += 1
+        submitted = time.monotonic()
+        loop = asyncio.get_running_loop()
+        try:
+            result, started, finished = await asyncio.wait_for(
+                loop.run_in_executor(self.executor, _timed_call, func, *args),
+                timeout=self.timeout,
+            )
+        except TimeoutError:
+            self._timeouts.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Service is busy, try again later",
+            )
+        finally:
+            self._pending -= 1
+
+        self._queue_wait.observe(started - submitted)
+        self._hash_time.observe(finished - started)
+        return result
+
+    async def hash(self, password: str) -> bytes:
+        return await self._run(hash_pasword, password)
+
+    async def verify(self, password: str, hashed_password: bytes) -> bool:
+        return await self._run(check_password, password, hashed_password)
+
+    @staticmethod
+    def needs_rehash(hashed_password: bytes) -> bool:
+        return password_needs_rehash(hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor=settings.password_hash.executor,
+    max_workers=settings.password_hash.max_workers,
+    max_pending=settings.password_hash.max_pending,
+    timeout=settings.password_hash.timeout_ms / 1000,
+)
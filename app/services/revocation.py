@@ -0,0 +1,231 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.metrics import metrics
+from app.core.redis_codecs import RawCodec
+from app.core.redis_scripts import redis_scripts
+from app.core.redis_service import key_codecs
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+BLACKLIST_PREFIX = "blacklist_access_token:"
+USER_EPOCH_PREFIX = "user_epoch:"
+EPOCH_REVOCATION_PREFIX = "user_epoch_revoked:"
+REVOCATION_CHANNEL = "auth:revocations"
+
+# Чёрный список проверяется через EXISTS, эпоха — счётчик INCR
+key_codecs.register(BLACKLIST_PREFIX, RawCodec())
+key_codecs.register(USER_EPOCH_PREFIX, RawCodec())
+
+# Атомарно увеличивает эпоху пользователя и публикует отзыв.
+# KEYS: user_epoch:{id}, user_epoch_revoked:{id}
+# ARGV: id пользователя, sid сессии-исключения, ttl записи (мс), unix time истечения, канал
+BUMP_EPOCH_SCRIPT = redis_scripts.register(
+    "revocation.bump_epoch",
+    """
+local epoch = redis.call('INCR', KEYS[1])
+redis.call('HSET', KEYS[2], 'epoch', epoch, 'sid', ARGV[2])
+redis.call('PEXPIRE', KEYS[2], ARGV[3])
+redis.call('PUBLISH', ARGV[5], cjson.encode({
+    type = 'epoch', user_id = ARGV[1], epoch = epoch, sid = ARGV[2], exp = tonumber(ARGV[4])
+}))
+return epoch
+""",
+)
+
+# Заносит сессии в чёрный список access-токенов и публикует отзыв.
+# KEYS: blacklist_access_token:{sid}...; ARGV: значение, ttl (мс), канал, сообщение
+BATCH_REVOKE_SCRIPT = redis_scripts.register(
+    "revocation.batch_revoke",
+    """
+for _, key in ipairs(KEYS) do
+    redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+end
+redis.call('PUBLISH', ARGV[3], ARGV[4])
+return #KEYS
+""",
+)
+
+
+def epoch_revokes(
+    revoked_epoch: int, exempt_session_id: str, token_epoch: int, session_id: str
+) -> bool:
+    """Токены с эпохой ниже отозванной недействительны, кроме сессии-инициатора."""
+    return token_epoch < revoked_epoch and session_id != exempt_session_id
+
+
+class RevocationFilter:
+    """Локальная копия чёрного списка access-токенов для одного воркера.
+
+    Заполняется из Redis при старте и поддерживается в актуальном состоянии
+    сообщениями из канала REVOCATION_CHANNEL. Пока копия не синхронизирована,
+    might_be_revoked() отвечает True и проверка уходит в Redis.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.ready = False
+        self._revoked: dict[str, float] = {}
+        self._epochs: dict[str, tuple[int, str, float]] = {}
+        # Обработчики прочих событий канала по полю type (например, инвалидация кешей)
+        self.handlers: dict[str, Callable[[dict[str, Any]], None]] = {}
+        self._task: asyncio.Task | None = None
+        self._skipped = metrics.counter("revocation_filter.redis_lookups_skipped")
+        self._lookups = metrics.counter("revocation_filter.redis_lookups")
+        metrics.gauge("revocation_filter.size", lambda: len(self._revoked))
+        metrics.gauge("revocation_filter.ready", lambda: self.ready)
+
+    def add(self, session_id: str, expire_at: float) -> None:
+        self._revoked[session_id] = expire_at
+
+    def might_be_revoked(self, session_id: str) -> bool:
+        if not self.ready:
+            self._lookups.inc()
+            return True
+
+        expire_at = self._revoked.get(session_id)
+        if expire_at is None or expire_at <= time.time():
+            self._skipped.inc()
+            return False
+
+        self._lookups.inc()
+        return True
+
+    def add_epoch(
+        self, user_id: str, epoch: int, exempt_session_id: str, expire_at: float
+    ) -> None:
+        current = self._epochs.get(user_id)
+        if current is None or current[0] <= epoch:
+            self._epochs[user_id] = (epoch, exempt_session_id, expire_at)
+
+    def is_epoch_revoked(
+        self, user_id: str, token_epoch: int, session_id: str
+    ) -> bool | None:
+        """None — локальная копия не готова, ответ нужно брать из Redis."""
+        if not self.ready:
+            return None
+
+        record = self._epochs.get(user_id)
+        if record is None or record[2] <= time.time():
+            return False
+
+        revoked_epoch, exempt_session_id, _ = record
+        return epoch_revokes(revoked_epoch, exempt_session_id, token_epoch, session_id)
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        self._revoked = {
+            sid: expire_at
+            for sid, expire_at in self._revoked.items()
+            if expire_at > now
+        }
+        self._epochs = {
+            user_id: record
+            for user_id, record in self._epochs.items()
+            if record[2] > now
+        }
+
+    def handle_message(self, data: str) -> None:
+        message = json.loads(data)
+        handler = self.handlers.get(message.get("type"))
+        if handler is not None:
+            handler(message)
+        elif message.get("type") == "epoch":
+            self.add_epoch(
+                message["user_id"], message["epoch"], message["sid"], message["exp"]
+            )
+        else:
+            for session_id in message.get("sids") or [message["sid"]]:
+                self.add(session_id, message["exp"])
+
+    async def load(self, redis: Redis) -> None:
+        revoked: dict[str, float] = {}
+        keys = [
+            key async for key in redis.scan_iter(f"{BLACKLIST_PREFIX}*", count=1000)
+        ]
+        now = time.time()
+
+        for start in range(0, len(keys), 1000):
+            chunk = keys[start : start + 1000]
+            async with redis.pipeline(transaction=False) as pipe:
+                for key in chunk:
+                    pipe.pttl(key)
+                ttls = await pipe.execute()
+
+            for key, ttl in zip(chunk, ttls):
+                if ttl > 0:
+                    revoked[key.removeprefix(BLACKLIST_PREFIX)] = now + ttl / 1000
+
+        # Сообщения, пришедшие во время загрузки, уже лежат в _revoked
+        revoked.update(self._revoked)
+        self._revoked = revoked
+
+        keys = [
+            key
+            async for key in redis.scan_iter(f"{EPOCH_REVOCATION_PREFIX}*", count=1000)
+        ]
+        for start in range(0, len(keys), 1000):
+            chunk = keys[start : start + 1000]
+            async with redis.pipeline(transaction=False) as pipe:
+                for key in chunk:
+                    pipe.hgetall(key)
+                    pipe.pttl(key)
+                results = await pipe.execute()
+
+            for key, record, ttl in zip(chunk, results[::2], results[1::2]):
+                if record and ttl > 0:
+                    self.add_epoch(
+                        key.removeprefix(EPOCH_REVOCATION_PREFIX),
+                        int(record["epoch"]),
+                        record["sid"],
+                        now + ttl / 1000,
+                    )
+
+    async def _listen(self, redis: Redis) -> None:
+        while True:
+            try:
+                async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    # Подписываемся до загрузки, чтобы не потерять отзывы между ними
+                    await pubsub.subscribe(REVOCATION_CHANNEL)
+                    await self.load(redis)
+                    self.ready = True
+                    last_purge = time.monotonic()
+
+                    while True:
+                        message = await pubsub.get_message(timeout=1.0)
+                        if message is not None:
+                            self.handle_message(message["data"])
+
+                        if time.monotonic() - last_purge > 60:
+                            self.purge_expired()
+                            last_purge = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError, ValueError, KeyError):
+                logger.exception("Revocation filter lost sync, falling back to Redis")
+                self.ready = False
+                await asyncio.sleep(1)
+
+    def start(self, redis: Redis) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._listen(redis))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.ready = False
+
+
+revocation_filter = RevocationFilter(enabled=settings.app.revocation_filter_enabled)
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.metrics import metrics
+from app.core.redis_lock import LeaderLock
+from app.core.settings import settings
+from app.database.session import engine
+from app.repository.partitions import (
+    create_partition,
+    delete_before,
+    detach_partition,
+    drop_table,
+    get_default_partition,
+    get_partitions,
+    is_partitioned,
+    set_lock_timeout,
+)
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_TABLE = "sessions"
+PARTITION_KEY = "expire_at"
+SESSION_PARTITIONS_LOCK = "session_partitions:lock"
+# Понедельник: недельные секции начинаются с начала ISO-недели
+PARTITION_EPOCH = datetime(1970, 1, 5, tzinfo=timezone.utc)
+
+
+def partition_name(lower: datetime) -> str:
+    return f"{SESSIONS_TABLE}_p{lower:%Y%m%d}"
+
+
+def align(moment: datetime, interval: timedelta) -> datetime:
+    return PARTITION_EPOCH + (moment - PARTITION_EPOCH) // interval * interval
+
+
+class SessionPartitionMaintainer:
+    """Создаёт секции sessions заранее и удаляет целиком истёкшие.
+
+    Вставка в секционированную таблицу без подходящей секции падает,
+    поэтому секции создаются на срок жизни refresh-токена плюс premake
+    интервалов вперёд. Секция, все строки которой истекли больше
+    retention назад, отсоединяется (DETACH CONCURRENTLY) и удаляется —
+    без DELETE, мёртвых строк и нагрузки на VACUUM.
+    Строки, попавшие в DEFAULT-секцию, переносятся в создаваемые секции,
+    а истёкшие удаляются из неё обычным DELETE. При DEFAULT-секции
+    DETACH CONCURRENTLY невозможен: секция отсоединяется обычным DETACH
+    в своей транзакции, ожидание блокировки ограничено lock_timeout_ms.
+    Пока миграция секционирования не применена, ничего не делает.
+    """
+
+    def __init__(
+        self,
+        interval: timedelta,
+        premake: int,
+        retention: timedelta,
+        check_interval: float,
+        lock_timeout_ms: int,
+    ) -> None:
+        self.interval = interval
+        self.premake = premake
+        self.retention = retention
+        self.check_interval = check_interval
+        self.lock_timeout_ms = lock_timeout_ms
+        self.partitions = 0
+        self._task: asyncio.Task | None = None
+        self._created = metrics.counter("session_partitions.created")
+        self._dropped = metrics.counter("session_partitions.dropped")
+        self._errors = metrics.counter("session_partitions.errors")
+        metrics.gauge("session_partitions.count", lambda: self.partitions)
+
+    async def maintain(self) -> None:
+        now = datetime.now(timezone.utc)
+        horizon = (
+            now
+            + timedelta(milliseconds=settings.jwt.refresh_token_expire_ms)
+            + self.interval * self.premake
+        )
+
+        async with engine.begin() as connection:
+            if not await is_partitioned(connection, SESSIONS_TABLE):
+                return
+            partitions = await get_partitions(connection, SESSIONS_TABLE)
+            default = await get_default_partition(connection, SESSIONS_TABLE)
+
+            # Новые секции продолжают последнюю: интервал можно сменить
+            # без пересечения диапазонов
+            lower = align(now, self.interval)
+            if partitions:
+                lower = max(lower, partitions[-1].upper)
+            while lower < horizon:
+                upper = lower + self.interval
+                moved = await create_partition(
+                    connection,
+                    SESSIONS_TABLE,
+                    partition_name(lower),
+                    lower,
+                    upper,
+                    key=PARTITION_KEY,
+                    default=default,
+                )
+                self._created.inc()
+                logger.info(
+                    "Created partition %s (%d rows moved from default)",
+                    partition_name(lower),
+                    moved,
+                )
+                lower = upper
+
+            if default is not None:
+                await delete_before(
+                    connection, default, PARTITION_KEY, now - self.retention
+                )
+
+        expired = [
+            partition
+            for partition in partitions
+            if partition.upper <= now - self.retention
+        ]
+        for partition in expired:
+            if default is None or partition.detach_pending:
+                async with engine.connect() as connection:
+                    connection = await connection.execution_options(
+                        isolation_level="AUTOCOMMIT"
+                    )
+                    await detach_partition(
+                        connection,
+                        SESSIONS_TABLE,
+                        partition.name,
+                        pending=partition.detach_pending,
+                    )
+                    await drop_table(connection, partition.name)
+            else:
+                # ACCESS EXCLUSIVE на sessions держится только на время DETACH
+                async with engine.begin() as connection:
+                    await set_lock_timeout(connection, self.lock_timeout_ms)
+                    await detach_partition(
+                        connection, SESSIONS_TABLE, partition.name, concurrently=False
+                    )
+                    await drop_table(connection, partition.name)
+            self._dropped.inc()
+            logger.info("Dropped partition %s", partition.name)
+
+        async with engine.connect() as connection:
+            self.partitions = len(await get_partitions(connection, SESSIONS_TABLE))
+
+    async def run(self, redis: Redis) -> None:
+        lock = LeaderLock(
+            redis, SESSION_PARTITIONS_LOCK, ttl_ms=int(self.check_interval * 3000)
+        )
+        try:
+            while True:
+                try:
+                    if await lock.acquire():
+                        await self.maintain()
+                except (RedisError, SQLAlchemyError, OSError) as exc:
+                    self._errors.inc()
+                    logger.warning("Session partition maintenance failed: %s", exc)
+                await asyncio.sleep(self.check_interval)
+        finally:
+            try:
+                await lock.release()
+            except RedisError:
+                pass
+
+    def start(self, redis: Redis) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(redis))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+session_partitions = SessionPartitionMaintainer(
+    interval=timedelta(days=settings.app.session_partition_days),
+    premake=settings.app.session_partition_premake,
+    retention=timedelta(milliseconds=settings.app.session_partition_retention_ms),
+    check_interval=settings.app.session_partition_check_interval_ms / 1000,
+    lock_timeout_ms=settings.app.session_partition_lock_timeout_ms,
+)
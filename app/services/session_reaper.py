@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.metrics import metrics
+from app.core.redis_lock import LeaderLock
+from app.core.settings import settings
+from app.database.session import engine, session_factory
+from app.repository.partitions import is_partitioned
+from app.repository.session import delete_expired_sessions, get_oldest_expire_at
+from app.services.session_partitions import SESSIONS_TABLE
+
+logger = logging.getLogger(__name__)
+
+SESSION_REAPER_LOCK = "session_reaper:lock"
+
+
+class SessionReaper:
+    """Фоновое удаление истёкших строк sessions ограниченными пачками.
+
+    Работает только на воркере-лидере. Между пачками выдерживается пауза,
+    чтобы удаление не конкурировало с входами и ротациями за диск и WAL.
+    Секционированную таблицу не трогает: истёкшие секции удаляет
+    SessionPartitionMaintainer без DELETE.
+    """
+
+    def __init__(self, interval: float, batch_size: int, batch_pause: float) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.rows_per_second = 0.0
+        self.lag_seconds = 0.0
+        self._task: asyncio.Task | None = None
+        self._lock: LeaderLock | None = None
+        self._deleted = metrics.counter("session_reaper.deleted")
+        self._errors = metrics.counter("session_reaper.errors")
+        self._batch_seconds = metrics.summary("session_reaper.batch_seconds")
+        metrics.gauge("session_reaper.rows_per_second", lambda: self.rows_per_second)
+        # Возраст самой старой не удалённой истёкшей сессии
+        metrics.gauge("session_reaper.lag_seconds", lambda: self.lag_seconds)
+
+    async def reap(self, lock: LeaderLock | None = None) -> int:
+        """Удаляет все истёкшие на момент вызова сессии; возвращает их число.
+
+        С lock блокировка продлевается перед каждой следующей пачкой, и,
+        потеряв её, reap останавливается: удаление продолжит новый лидер.
+        """
+        async with engine.connect() as connection:
+            if await is_partitioned(connection, SESSIONS_TABLE):
+                logger.debug("Table %s is partitioned, skipping reap", SESSIONS_TABLE)
+                self.rows_per_second = self.lag_seconds = 0.0
+                return 0
+
+        now = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        total = 0
+        while True:
+            batch_started = time.perf_counter()
+            async with session_factory() as db_session:
+                deleted = await delete_expired_sessions(
+                    db_session, now, self.batch_size
+                )
+            self._batch_seconds.observe(time.perf_counter() - batch_started)
+            self._deleted.inc(deleted)
+            total += deleted
+            if deleted < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause)
+            if lock is not None and not await lock.acquire():
+                logger.warning("Session reaper lost leadership, stopping")
+                break
+
+        elapsed = time.perf_counter() - started
+        self.rows_per_second = total / elapsed if elapsed else 0.0
+        async with session_factory() as db_session:
+            oldest = await get_oldest_expire_at(db_session, now)
+        self.lag_seconds = (now - oldest).total_seconds() if oldest else 0.0
+        if total:
+            logger.info(
+                "Reaped %d expired sessions (%.0f rows/s)", total, self.rows_per_second
+            )
+        return total
+
+    async def run(self, redis: Redis) -> None:
+        self._lock = LeaderLock(
+            redis, SESSION_REAPER_LOCK, ttl_ms=int(self.interval * 3000)
+        )
+        try:
+            while True:
+                try:
+                    if await self._lock.acquire():
+                        await self.reap(self._lock)
+                except (RedisError, SQLAlchemyError, OSError) as exc:
+                    self._errors.inc()
+                    logger.warning("Session reaper failed: %s", exc)
+                await asyncio.sleep(self.interval)
+        finally:
+            try:
+                await self._lock.release()
+            except RedisError:
+                pass
+
+    def start(self, redis: Redis) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(redis))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+session_reaper = SessionReaper(
+    interval=settings.app.session_reaper_interval_ms / 1000,
+    batch_size=settings.app.session_reaper_batch_size,
+    batch_pause=settings.app.session_reaper_batch_pause_ms / 1000,
+)
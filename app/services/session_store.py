@@ -0,0 +1,625 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Annotated, Any, Awaitable, Callable, Sequence, TypeVar
+from uuid import UUID
+
+from fastapi import Depends
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import metrics
+from app.core.redis_lock import LeaderLock
+from app.core.redis_scripts import redis_scripts
+from app.core.redis_service import RedisService, get_redis
+from app.core.settings import settings
+from app.database.models import Session
+from app.database.models.user import UserRole
+from app.database.session import get_session, session_factory
+from app.repository.session import (
+    admit_session,
+    delete_session_by_session_id,
+    delete_sessions_by_user_id,
+    rotate_session,
+)
+from app.services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+# session:{family_id} — хеш активной сессии: sid, user_id, user_agent,
+# last_active, expire_at (unix ms); живёт до expire_at
+SESSION_PREFIX = "session:"
+# session_sid:{session_id} -> family_id текущего refresh-токена сессии
+SESSION_SID_PREFIX = "session_sid:"
+# user_sessions:{user_id} — ZSET family_id по last_active, для лимита сессий;
+# expire_at у всех сессий = время записи + refresh TTL, поэтому индекс
+# продлевается до expire_at последней изменённой сессии
+USER_SESSIONS_PREFIX = "user_sessions:"
+# Очередь изменений для записи в Postgres (JSON: op=upsert|delete)
+SESSION_PERSIST_QUEUE = "session_store:persist"
+# Пачка, которую сейчас записывает лидер, и её номер и число попыток (хеш)
+SESSION_PERSIST_PROCESSING = "session_store:persist_processing"
+SESSION_PERSIST_BATCH = "session_store:persist_batch"
+# Изменения, которые не удалось записать и по одному
+SESSION_PERSIST_DEAD_LETTER = "session_store:persist_dead"
+SESSION_PERSIST_LOCK = "session_store:persist_lock"
+
+# KEYS: user_sessions:{user_id}, session:{family_id}, session_sid:{sid}, очередь
+# ARGV: family_id, user_id, sid, user_agent, last_active, expire_at, limit
+ADMIT_SCRIPT = redis_scripts.register(
+    "session_store.admit",
+    f"""
+local evicted = {{}}
+for _, family_id in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+    if redis.call('EXISTS', '{SESSION_PREFIX}' .. family_id) == 0 then
+        redis.call('ZREM', KEYS[1], family_id)
+    end
+end
+local excess = redis.call('ZCARD', KEYS[1]) - tonumber(ARGV[7]) + 1
+if excess > 0 then
+    for _, family_id in ipairs(redis.call('ZRANGE', KEYS[1], 0, excess - 1)) do
+        local sid = redis.call('HGET', '{SESSION_PREFIX}' .. family_id, 'sid')
+        redis.call('DEL', '{SESSION_PREFIX}' .. family_id)
+        if sid then
+            redis.call('DEL', '{SESSION_SID_PREFIX}' .. sid)
+            table.insert(evicted, sid)
+        end
+        redis.call('ZREM', KEYS[1], family_id)
+        redis.call('RPUSH', KEYS[4], cjson.encode({{op = 'delete', id = family_id}}))
+    end
+end
+redis.call('HSET', KEYS[2], 'sid', ARGV[3], 'user_id', ARGV[2],
+    'user_agent', ARGV[4], 'last_active', ARGV[5], 'expire_at', ARGV[6])
+redis.call('PEXPIREAT', KEYS[2], ARGV[6])
+redis.call('SET', KEYS[3], ARGV[1], 'PXAT', ARGV[6])
+redis.call('ZADD', KEYS[1], ARGV[5], ARGV[1])
+redis.call('PEXPIREAT', KEYS[1], ARGV[6])
+redis.call('RPUSH', KEYS[4], cjson.encode({{
+    op = 'upsert', id = ARGV[1], user_id = ARGV[2], session_id = ARGV[3],
+    user_agent = ARGV[4], last_active = tonumber(ARGV[5]), expire_at = tonumber(ARGV[6])
+}}))
+return evicted
+""",
+)
+
+# KEYS: session_sid:{old_sid}, session:{family_id из токена}, session_sid:{new_sid},
+#       user_sessions:{user_id}, очередь
+# ARGV: user_id, old_sid, new_sid, user_agent, last_active, expire_at, now, family_id
+# Возвращает {'rotated', family_id}, {'replayed', sid} или nil
+ROTATE_SCRIPT = redis_scripts.register(
+    "session_store.rotate",
+    f"""
+local family_id = redis.call('GET', KEYS[1])
+if family_id then
+    local key = '{SESSION_PREFIX}' .. family_id
+    local owner, expire_at = unpack(redis.call('HMGET', key, 'user_id', 'expire_at'))
+    if owner ~= ARGV[1] or not expire_at or tonumber(expire_at) <= tonumber(ARGV[7]) then
+        return nil
+    end
+    redis.call('HSET', key, 'sid', ARGV[3], 'user_agent', ARGV[4],
+        'last_active', ARGV[5], 'expire_at', ARGV[6])
+    redis.call('PEXPIREAT', key, ARGV[6])
+    redis.call('DEL', KEYS[1])
+    redis.call('SET', KEYS[3], family_id, 'PXAT', ARGV[6])
+    redis.call('ZADD', KEYS[4], ARGV[5], family_id)
+    redis.call('PEXPIREAT', KEYS[4], ARGV[6])
+    redis.call('RPUSH', KEYS[5], cjson.encode({{
+        op = 'upsert', id = family_id, user_id = ARGV[1], session_id = ARGV[3],
+        user_agent = ARGV[4], last_active = tonumber(ARGV[5]), expire_at = tonumber(ARGV[6])
+    }}))
+    return {{'rotated', family_id}}
+end
+if ARGV[8] ~= '' then
+    local owner, sid = unpack(redis.call('HMGET', KEYS[2], 'user_id', 'sid'))
+    if owner == ARGV[1] and sid and sid ~= ARGV[2] then
+        redis.call('DEL', KEYS[2], '{SESSION_SID_PREFIX}' .. sid)
+        redis.call('ZREM', KEYS[4], ARGV[8])
+        redis.call('RPUSH', KEYS[5], cjson.encode({{op = 'delete', id = ARGV[8]}}))
+        return {{'replayed', sid}}
+    end
+end
+return nil
+""",
+)
+
+# KEYS: session_sid:{sid}, очередь
+DELETE_SCRIPT = redis_scripts.register(
+    "session_store.delete",
+    f"""
+local family_id = redis.call('GET', KEYS[1])
+if not family_id then
+    return 0
+end
+local key = '{SESSION_PREFIX}' .. family_id
+local user_id = redis.call('HGET', key, 'user_id')
+redis.call('DEL', key, KEYS[1])
+if user_id then
+    redis.call('ZREM', '{USER_SESSIONS_PREFIX}' .. user_id, family_id)
+end
+redis.call('RPUSH', KEYS[2], cjson.encode({{op = 'delete', id = family_id}}))
+return 1
+""",
+)
+
+# KEYS: user_sessions:{user_id}, очередь
+# ARGV: sid сессии, которую нужно оставить ('' — удалить все)
+DELETE_USER_SCRIPT = redis_scripts.register(
+    "session_store.delete_user",
+    f"""
+local deleted = {{}}
+for _, family_id in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+    local key = '{SESSION_PREFIX}' .. family_id
+    local sid = redis.call('HGET', key, 'sid')
+    if not sid or sid ~= ARGV[1] then
+        redis.call('DEL', key)
+        if sid then
+            redis.call('DEL', '{SESSION_SID_PREFIX}' .. sid)
+            table.insert(deleted, sid)
+        end
+        redis.call('ZREM', KEYS[1], family_id)
+        redis.call('RPUSH', KEYS[2], cjson.encode({{op = 'delete', id = family_id}}))
+    end
+end
+return deleted
+""",
+)
+
+
+def to_ms(value: datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def from_ms(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+
+
+# Забирает пачку из очереди в processing; если там осталась незавершённая
+# пачка (лидер упал или потерял блокировку), возвращает её снова.
+# KEYS: очередь, processing, хеш пачки; ARGV: размер пачки
+# Возвращает {номер пачки, попытка, изменения}
+CLAIM_BATCH_SCRIPT = redis_scripts.register(
+    "session_store.claim_batch",
+    """
+local items = redis.call('LRANGE', KEYS[2], 0, -1)
+if #items > 0 then
+    local attempt = redis.call('HINCRBY', KEYS[3], 'attempt', 1)
+    return {tonumber(redis.call('HGET', KEYS[3], 'id')), attempt, items}
+end
+items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items == 0 then
+    return {0, 0, items}
+end
+redis.call('LTRIM', KEYS[1], #items, -1)
+redis.call('RPUSH', KEYS[2], unpack(items))
+local id = redis.call('HINCRBY', KEYS[3], 'id', 1)
+redis.call('HSET', KEYS[3], 'attempt', 1)
+return {id, 1, items}
+""",
+)
+
+# Завершает пачку, если она всё ещё текущая: подтверждение от лидера,
+# потерявшего блокировку, не удалит чужую пачку.
+# KEYS: processing, хеш пачки, dead-letter; ARGV: номер пачки, незаписанные...
+ACK_BATCH_SCRIPT = redis_scripts.register(
+    "session_store.ack_batch",
+    """
+if redis.call('HGET', KEYS[2], 'id') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+if #ARGV > 1 then
+    redis.call('RPUSH', KEYS[3], unpack(ARGV, 2))
+end
+return 1
+""",
+)
+
+
+@dataclass(slots=True, frozen=True)
+class RotatedSession:
+    """Результат ротации refresh-токена.
+
+    replayed_session_id — токен предъявлен повторно и семейство удалено;
+    is_active=False — пользователь заблокирован, ротация не применена.
+    """
+
+    family_id: UUID | None
+    role: UserRole | None
+    is_active: bool
+    replayed_session_id: UUID | str | None = None
+
+
+T = TypeVar("T")
+
+# UPDATE, переносящий строку в другую секцию (новый expire_at), при
+# конкурентном изменении той же строки падает с serialization_failure
+# вместо ожидания блокировки; такую транзакцию нужно повторить
+SERIALIZATION_FAILURE = "40001"
+SERIALIZATION_RETRIES = 3
+
+serialization_retries = metrics.counter("session_store.serialization_retries")
+
+
+class PostgresSessionStore:
+    """Сессии хранятся только в таблице sessions."""
+
+    def __init__(self, db_session: AsyncSession) -> None:
+        self.db_session = db_session
+
+    async def _retry(self, operation: Callable[[], Awaitable[T]]) -> T:
+        for attempt in range(1, SERIALIZATION_RETRIES + 1):
+            try:
+                return await operation()
+            except DBAPIError as exc:
+                sqlstate = getattr(exc.orig, "sqlstate", None)
+                if (
+                    sqlstate != SERIALIZATION_FAILURE
+                    or attempt == SERIALIZATION_RETRIES
+                ):
+                    raise
+                await self.db_session.rollback()
+                serialization_retries.inc()
+                logger.info("Session update conflicted, retrying (%d)", attempt)
+
+    async def admit(
+        self,
+        family_id: UUID,
+        user_id: str | UUID,
+        session_id: str | UUID,
+        user_agent: str,
+        last_active: datetime,
+        expire_at: datetime,
+        limit: int,
+    ) -> Sequence[str | UUID]:
+        return await self._retry(
+            lambda: admit_session(
+                self.db_session,
+                family_id=family_id,
+                user_id=user_id,
+                session_id=session_id,
+                user_agent=user_agent,
+                last_active=last_active,
+                expire_at=expire_at,
+                limit=limit,
+            )
+        )
+
+    async def rotate(
+        self,
+        user_id: str | UUID,
+        old_session_id: str | UUID,
+        new_session_id: str | UUID,
+        user_agent: str,
+        last_active: datetime,
+        expire_at: datetime,
+        family_id: str | UUID | None,
+    ) -> RotatedSession | None:
+        return await self._retry(
+            lambda: self._rotate(
+                user_id=user_id,
+                old_session_id=old_session_id,
+                new_session_id=new_session_id,
+                user_agent=user_agent,
+                last_active=last_active,
+                expire_at=expire_at,
+                family_id=family_id,
+            )
+        )
+
+    async def _rotate(
+        self,
+        user_id: str | UUID,
+        old_session_id: str | UUID,
+        new_session_id: str | UUID,
+        user_agent: str,
+        last_active: datetime,
+        expire_at: datetime,
+        family_id: str | UUID | None,
+    ) -> RotatedSession | None:
+        rotated = await rotate_session(
+            self.db_session,
+            user_id=user_id,
+            old_session_id=old_session_id,
+            new_session_id=new_session_id,
+            user_agent=user_agent,
+            last_active=last_active,
+            expire_at=expire_at,
+            family_id=family_id,
+        )
+        if rotated is None:
+            return None
+
+        if rotated.family_id is None:
+            # Семейство удалено в том же запросе, фиксируем удаление
+            await self.db_session.commit()
+            return RotatedSession(
+                None, None, False, replayed_session_id=rotated.replayed_session_id
+            )
+
+        if not rotated.is_active:
+            await self.db_session.rollback()
+        else:
+            await self.db_session.commit()
+        return RotatedSession(rotated.family_id, rotated.role, rotated.is_active)
+
+    async def delete(self, session_id: str | UUID) -> None:
+        await self._retry(
+            lambda: delete_session_by_session_id(self.db_session, session_id)
+        )
+
+    async def delete_user_sessions(
+        self, user_id: str | UUID, exclude_session_id: str | UUID | None = None
+    ) -> Sequence[str | UUID]:
+        return await self._retry(
+            lambda: delete_sessions_by_user_id(
+                self.db_session, user_id, exclude_session_id=exclude_session_id
+            )
+        )
+
+
+class RedisSessionStore:
+    """Активные сессии хранятся в Redis, Postgres обновляется в фоне.
+
+    Каждое изменение применяется одним Lua-скриптом и тем же скриптом
+    ставится в очередь SESSION_PERSIST_QUEUE; SessionPersister пачками
+    переносит очередь в таблицу sessions (аудит и восстановление).
+    """
+
+    def __init__(self, redis: RedisService, users: UserService) -> None:
+        self.redis = redis
+        self.users = users
+
+    async def admit(
+        self,
+        family_id: UUID,
+        user_id: str | UUID,
+        session_id: str | UUID,
+        user_agent: str,
+        last_active: datetime,
+        expire_at: datetime,
+        limit: int,
+    ) -> Sequence[str | UUID]:
+        return await self.redis.script(
+            ADMIT_SCRIPT,
+            keys=[
+                f"{USER_SESSIONS_PREFIX}{user_id}",
+                f"{SESSION_PREFIX}{family_id}",
+                f"{SESSION_SID_PREFIX}{session_id}",
+                SESSION_PERSIST_QUEUE,
+            ],
+            args=[
+                str(family_id),
+                str(user_id),
+                str(session_id),
+                user_agent,
+                to_ms(last_active),
+                to_ms(expire_at),
+                limit,
+            ],
+        )
+
+    async def rotate(
+        self,
+        user_id: str | UUID,
+        old_session_id: str | UUID,
+        new_session_id: str | UUID,
+        user_agent: str,
+        last_active: datetime,
+        expire_at: datetime,
+        family_id: str | UUID | None,
+    ) -> RotatedSession | None:
+        # Роль и статус берутся из кеша пользователей; заблокированному
+        # пользователю сессию не продлеваем
+        user = await self.users.get_user(user_id)
+        if user is None:
+            return None
+        if not user.is_active:
+            return RotatedSession(None, user.role, False)
+
+        result = await self.redis.script(
+            ROTATE_SCRIPT,
+            keys=[
+                f"{SESSION_SID_PREFIX}{old_session_id}",
+                f"{SESSION_PREFIX}{family_id or ''}",
+                f"{SESSION_SID_PREFIX}{new_session_id}",
+                f"{USER_SESSIONS_PREFIX}{user_id}",
+                SESSION_PERSIST_QUEUE,
+            ],
+            args=[
+                str(user_id),
+                str(old_session_id),
+                str(new_session_id),
+                user_agent,
+                to_ms(last_active),
+                to_ms(expire_at),
+                int(time.time() * 1000),
+                str(family_id or ""),
+            ],
+        )
+        if result is None:
+            return None
+
+        outcome, value = result
+        if outcome == "replayed":
+            return RotatedSession(None, None, False, replayed_session_id=value)
+        return RotatedSession(UUID(value), user.role, True)
+
+    async def delete(self, session_id: str | UUID) -> None:
+        await self.redis.script(
+            DELETE_SCRIPT,
+            keys=[f"{SESSION_SID_PREFIX}{session_id}", SESSION_PERSIST_QUEUE],
+            args=[],
+        )
+
+    async def delete_user_sessions(
+        self, user_id: str | UUID, exclude_session_id: str | UUID | None = None
+    ) -> Sequence[str | UUID]:
+        return await self.redis.script(
+            DELETE_USER_SCRIPT,
+            keys=[f"{USER_SESSIONS_PREFIX}{user_id}", SESSION_PERSIST_QUEUE],
+            args=[str(exclude_session_id or "")],
+        )
+
+
+SessionStore = PostgresSessionStore | RedisSessionStore
+
+
+async def get_session_store(
+    redis: Annotated[RedisService, Depends(get_redis)],
+    db_session: Annotated[AsyncSession, Depends(get_session)],
+    users: Annotated[UserService, Depends()],
+) -> SessionStore:
+    if settings.app.session_store == "redis":
+        return RedisSessionStore(redis, users)
+    return PostgresSessionStore(db_session)
+
+
+# Ошибки записи пачки: сбой Redis/Postgres или испорченное изменение в очереди
+PERSIST_ERRORS = (RedisError, SQLAlchemyError, OSError, ValueError, KeyError)
+
+
+class SessionPersister:
+    """Фоновая запись очереди изменений сессий в Postgres.
+
+    Работает только на воркере-лидере, блокировка продлевается перед
+    каждой пачкой. Пачка атомарно переносится из очереди в processing
+    и удаляется оттуда только после записи в БД: при сбое она будет
+    записана повторно, запись по id идемпотентна. Пачка, не записанная
+    за max_attempts попыток, записывается по одному изменению, а
+    не поддающиеся записи уходят в SESSION_PERSIST_DEAD_LETTER.
+    """
+
+    def __init__(self, interval: float, batch_size: int, max_attempts: int) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.queue_length = 0
+        self._task: asyncio.Task | None = None
+        self._lock: LeaderLock | None = None
+        self._persisted = metrics.counter("session_store.persisted")
+        self._errors = metrics.counter("session_store.persist_errors")
+        self._dead = metrics.counter("session_store.persist_dead_lettered")
+        self._batch_seconds = metrics.summary("session_store.persist_batch_seconds")
+        metrics.gauge("session_store.queue_length", lambda: self.queue_length)
+
+    async def persist(self, operations: list[dict[str, Any]]) -> None:
+        # Несколько изменений одной сессии схлопываются в последнее
+        latest = {operation["id"]: operation for operation in operations}
+        upserts = [
+            {
+                "id": operation["id"],
+                "user_id": operation["user_id"],
+                "session_id": operation["session_id"],
+                "user_agent": operation["user_agent"],
+                "last_active": from_ms(operation["last_active"]),
+                "expire_at": from_ms(operation["expire_at"]),
+            }
+            for operation in latest.values()
+            if operation["op"] == "upsert"
+        ]
+
+        # Ротация меняет expire_at, а с ним и секцию строки, поэтому upsert
+        # сделан как удаление по id и вставка: ON CONFLICT (id) невозможен,
+        # id уникален только вместе с expire_at
+        async with session_factory() as db_session:
+            await db_session.execute(
+                delete(Session).where(Session.id.in_(list(latest)))
+            )
+            if upserts:
+                await db_session.execute(insert(Session).values(upserts))
+            await db_session.commit()
+
+    async def persist_each(self, raw: list[str]) -> list[str]:
+        """Записывает изменения по одному; возвращает те, что записать не удалось."""
+        dead = []
+        for item in raw:
+            try:
+                await self.persist([json.loads(item)])
+            except PERSIST_ERRORS as exc:
+                logger.error("Session change dead-lettered: %r (%s)", item, exc)
+                dead.append(item)
+        return dead
+
+    async def flush(self, redis: Redis) -> int:
+        """Переносит в Postgres одну пачку; возвращает её размер."""
+        batch_id, attempt, raw = await CLAIM_BATCH_SCRIPT(
+            redis,
+            keys=[
+                SESSION_PERSIST_QUEUE,
+                SESSION_PERSIST_PROCESSING,
+                SESSION_PERSIST_BATCH,
+            ],
+            args=[self.batch_size],
+        )
+        if not raw:
+            self.queue_length = 0
+            return 0
+
+        started = time.perf_counter()
+        dead = []
+        if attempt > self.max_attempts:
+            dead = await self.persist_each(raw)
+        else:
+            await self.persist([json.loads(item) for item in raw])
+        await ACK_BATCH_SCRIPT(
+            redis,
+            keys=[
+                SESSION_PERSIST_PROCESSING,
+                SESSION_PERSIST_BATCH,
+                SESSION_PERSIST_DEAD_LETTER,
+            ],
+            args=[batch_id, *dead],
+        )
+        self._batch_seconds.observe(time.perf_counter() - started)
+        self._persisted.inc(len(raw) - len(dead))
+        self._dead.inc(len(dead))
+        self.queue_length = await redis.llen(SESSION_PERSIST_QUEUE)
+        return len(raw)
+
+    async def _run(self, redis: Redis) -> None:
+        while True:
+            try:
+                # Блокировка продлевается перед каждой пачкой; потеряв её,
+                # лидер перестаёт разбирать очередь
+                while await self._lock.acquire():
+                    if await self.flush(redis) < self.batch_size:
+                        break
+            except PERSIST_ERRORS as exc:
+                self._errors.inc()
+                logger.warning("Session persist failed: %s", exc)
+            await asyncio.sleep(self.interval)
+
+    def start(self, redis: Redis) -> None:
+        if self._task is None:
+            self._lock = LeaderLock(
+                redis, SESSION_PERSIST_LOCK, ttl_ms=int(self.interval * 5000)
+            )
+            self._task = asyncio.create_task(self._run(redis))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Остаток очереди допишет следующий лидер
+        try:
+            await self._lock.release()
+        except RedisError:
+            pass
+
+
+session_persister = SessionPersister(
+    interval=settings.app.session_persist_interval_ms / 1000,
+    batch_size=settings.app.session_persist_batch_size,
+    max_attempts=settings.app.session_persist_max_attempts,
+)
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import ssl
+import time
+from email.message import EmailMessage
+
+from aiosmtplib import (
+    SMTP,
+    SMTPException,
+    SMTPRecipientsRefused,
+    SMTPResponseException,
+)
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Отказ сервера по конкретному письму: соединение остаётся рабочим
+MESSAGE_ERRORS = (SMTPResponseException, SMTPRecipientsRefused)
+# Ошибки, после которых соединение больше не используется
+CONNECTION_ERRORS = (SMTPException, OSError, asyncio.TimeoutError)
+
+
+class PooledConnection:
+    def __init__(self, client: SMTP) -> None:
+        self.client = client
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """Пул авторизованных SMTP-соединений.
+
+    TLS-рукопожатие и AUTH выполняются один раз на соединение, а не на
+    письмо. Соединение, простоявшее дольше idle_check, проверяется NOOP;
+    после max_messages писем оно закрывается (серверы ограничивают число
+    писем на сессию). Разорванное соединение заменяется новым.
+    send_timeout ограничивает отправку одного письма.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = True,
+        start_tls: bool = False,
+        size: int = 4,
+        max_messages: int = 100,
+        idle_check: float = 30.0,
+        timeout: float = 30.0,
+        send_timeout: float | None = None,
+        tls_context: ssl.SSLContext | None = None,
+    ) -> None:
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_check = idle_check
+        self.timeout = timeout
+        self.send_timeout = send_timeout
+        self.tls_context = tls_context
+        self._idle: list[PooledConnection] = []
+        self._slots = asyncio.Semaphore(size)
+        self._connects = metrics.counter("smtp_pool.connects")
+        self._discarded = metrics.counter("smtp_pool.discarded")
+        self._messages = metrics.counter("smtp_pool.messages")
+        metrics.gauge("smtp_pool.idle", lambda: len(self._idle))
+
+    async def connect(self) -> PooledConnection:
+        client = SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+            tls_context=self.tls_context,
+        )
+        await client.connect()  # с username/password сразу выполняет AUTH
+        self._connects.inc()
+        return PooledConnection(client)
+
+    async def is_healthy(self, connection: PooledConnection) -> bool:
+        if not connection.client.is_connected:
+            return False
+        if time.monotonic() - connection.last_used < self.idle_check:
+            return True
+        try:
+            await connection.client.noop()
+        except CONNECTION_ERRORS:
+            return False
+        return True
+
+    async def discard(self, connection: PooledConnection, broken: bool = False) -> None:
+        self._discarded.inc()
+        if broken:
+            # Сессия в неизвестном состоянии (обрыв, таймаут): QUIT не ждём
+            connection.client.close()
+            return
+        try:
+            if connection.client.is_connected:
+                await connection.client.quit()
+        except CONNECTION_ERRORS:
+            connection.client.close()
+
+    async def checkout(self) -> PooledConnection:
+        while self._idle:
+            connection = self._idle.pop()
+            if await self.is_healthy(connection):
+                return connection
+            await self.discard(connection)
+        return await self.connect()
+
+    async def checkin(self, connection: PooledConnection) -> None:
+        connection.last_used = time.monotonic()
+        if connection.sent >= self.max_messages:
+            await self.discard(connection)
+        else:
+            self._idle.append(connection)
+
+    async def _send(self, connection: PooledConnection, message: EmailMessage) -> None:
+        await asyncio.wait_for(
+            connection.client.send_message(message), self.send_timeout
+        )
+        connection.sent += 1
+        self._messages.inc()
+
+    async def send(self, message: EmailMessage) -> None:
+        await self.send_batch([message], raise_errors=True)
+
+    async def send_batch(
+        self, messages: list[EmailMessage], raise_errors: bool = False
+    ) -> list[Exception | None]:
+        """Отправляет письма по одному соединению; возвращает ошибку каждого.
+
+        Отказ сервера по конкретному письму не рвёт соединение. При обрыве
+        письмо повторяется один раз на новом соединении. Если не удались
+        повтор или подключение, ошибку получают это и все оставшиеся письма;
+        уже принятые сервером письма остаются успешными.
+        """
+        results: list[Exception | None] = []
+        connection: PooledConnection | None = None
+        async with self._slots:
+            try:
+                connection = await self.checkout()
+                for number, message in enumerate(messages, 1):
+                    for attempt in (1, 2):
+                        try:
+                            await self._send(connection, message)
+                            results.append(None)
+                        except MESSAGE_ERRORS as exc:
+                            if raise_errors:
+                                raise
+                            results.append(exc)
+                        except CONNECTION_ERRORS:
+                            await self.discard(connection, broken=True)
+                            connection = None
+                            if attempt == 2:
+                                raise
+                            connection = await self.connect()
+                            continue
+                        break
+                    if connection.sent >= self.max_messages and number < len(messages):
+                        await self.discard(connection)
+                        connection = None
+                        connection = await self.connect()
+            except Exception as exc:
+                if connection is not None:
+                    await self.discard(connection, broken=True)
+                if raise_errors:
+                    raise
+                results.extend([exc] * (len(messages) - len(results)))
+                return results
+            except BaseException:
+                if connection is not None:
+                    await self.discard(connection, broken=True)
+                raise
+            await self.checkin(connection)
+        return results
+
+    async def close(self) -> None:
+        while self._idle:
+            await self.discard(self._idle.pop())
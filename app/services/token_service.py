@@ -1,29 +1,51 @@
+import hashlib
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import Any
-from uuid import uuid4
+from uuid import UUID
 
 import jwt
 from fastapi import HTTPException, status
 
+from app.core.cache import TTLCache
+from app.core.ids import uuid7
 from app.core.settings import settings
-from app.database.models import User
+from app.database.models.user import UserRole
+
+
+def load_key(algorithm: str, path: Path) -> Any:
+    # Разбираем PEM один раз: PyJWT принимает готовые объекты ключей cryptography
+    return jwt.get_algorithm_by_name(algorithm).prepare_key(path.read_bytes())
 
 
 class TokenService:
 
     algorithm = settings.jwt.algorithm
-    private_key = settings.jwt.private_key.read_text()
-    public_key = settings.jwt.public_key.read_text()
+    key_id = settings.jwt.key_id or None
+    private_key = load_key(algorithm, settings.jwt.private_key)
+    public_key = load_key(algorithm, settings.jwt.public_key)
+    headers = {"kid": key_id} if key_id else None
+    verified_access_tokens = TTLCache(
+        "access_token_cache", settings.jwt.access_token_cache_size
+    )
     access_token_expire_ms = settings.jwt.access_token_expire_ms
     refresh_token_expire_ms = settings.jwt.refresh_token_expire_ms
 
-    def __init__(self, user: User) -> None:
+    def __init__(
+        self,
+        user_id: UUID | str,
+        role: UserRole | None = None,
+        epoch: int = 0,
+        family_id: UUID | None = None,
+    ) -> None:
         self._access_token = None
         self._refresh_token = None
-        self.sub = user.id
-        self.role = user.role.value
+        self.sub = user_id
+        self.role = role  # при ротации известна только после UPDATE ... RETURNING
+        self.epoch = epoch
+        self.family_id = family_id or uuid7()
         self.iat = datetime.now(timezone.utc)
-        self.sid = uuid4()
+        self.sid = uuid7()
         self.access_exp = self.iat + timedelta(
             milliseconds=self.access_token_expire_ms,
         )
@@ -50,12 +72,13 @@ class TokenService:
             payload=to_encode,
             key=self.private_key,
             algorithm=self.algorithm,
+            headers=self.headers,
         )
 
     @classmethod
     def decode_jwt(cls, token: str) -> dict[str, Any]:
         try:
-            payload = jwt.decode(
+            decoded = jwt.decode_complete(
                 jwt=token,
                 key=cls.public_key,
                 algorithms=[cls.algorithm],
@@ -65,14 +88,47 @@ class TokenService:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or expired token",
             )
+
+        kid = decoded["header"].get("kid")
+        if kid is not None and kid != cls.key_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+            )
+        return decoded["payload"]
+
+    @staticmethod
+    def token_digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    @classmethod
+    def decode_access_token(cls, token: str) -> dict[str, Any]:
+        """decode_jwt с кешем уже проверенных access-токенов.
+
+        Кешируется только результат проверки подписи и срока действия,
+        отзыв токена проверяется вызывающей стороной на каждый запрос.
+        """
+        digest = cls.token_digest(token)
+        payload = cls.verified_access_tokens.get(digest)
+        if payload is not None:
+            return payload
+
+        payload = cls.decode_jwt(token)
+        if payload.get("purpose") == "access_token":
+            cls.verified_access_tokens.set(digest, payload, expire_at=payload["exp"])
         return payload
 
+    @classmethod
+    def forget_access_token(cls, token: str) -> None:
+        cls.verified_access_tokens.pop(cls.token_digest(token))
+
     @property
     def access_token(self) -> str:
         if self._access_token is None:
             payload = {
                 "purpose": "access_token",
-                "role": self.role,
+                "role": self.role.value,
+                "epc": self.epoch,
             }
             self._access_token = self.encode_jwt(payload)
         return self._access_token
@@ -83,6 +139,7 @@ class TokenService:
 
             payload = {
                 "purpose": "refresh_token",
+                "fam": str(self.family_id),
             }
             self._refresh_token = self.encode_jwt(payload)
         return self._refresh_token
@@ -0,0 +1,123 @@
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, Annotated
+from uuid import UUID
+
+from fastapi import Depends
+
+from app.core.cache import TTLCache
+from app.core.redis_scripts import redis_scripts
+from app.core.redis_service import RedisService, get_redis
+from app.core.settings import settings
+from app.database.session import get_session, primary_pinned
+from app.repository.records import UserRecord
+from app.repository.fast import fetch_user_by_id
+from app.repository.user import set_user_active
+from app.services.revocation import REVOCATION_CHANNEL, revocation_filter
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+USER_CACHE_PREFIX = "user:"
+# Счётчик инвалидаций кеша пользователя: запись из Postgres попадает
+# в Redis, только если с момента чтения инвалидаций не было
+USER_CACHE_GENERATION_PREFIX = "user_generation:"
+
+# KEYS: user:{id}, user_generation:{id}
+# ARGV: поколение до чтения из Postgres, ttl (мс), поле, значение, ...
+FILL_SCRIPT = redis_scripts.register(
+    "user_cache.fill",
+    """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+""",
+)
+
+
+class UserService:
+    """Чтение пользователя через два уровня кеша: локальный LRU и хеш в Redis.
+
+    Изменения пользователя инвалидируют оба уровня и рассылаются остальным
+    воркерам через канал отзывов. Если сообщение потерялось, устаревшая
+    локальная запись живёт не дольше user_cache_local_ttl_ms.
+    """
+
+    local_cache = TTLCache("user_cache", settings.app.user_cache_size)
+
+    def __init__(
+        self,
+        redis: Annotated[RedisService, Depends(get_redis)],
+        db_session: Annotated["AsyncSession", Depends(get_session)],
+    ) -> None:
+        self.redis = redis
+        self.db_session = db_session
+
+    async def get_user(self, user_id: str | UUID) -> UserRecord | None:
+        user_id = str(user_id)
+        user = self.local_cache.get(user_id)
+        if user is not None:
+            return user
+
+        key = f"{USER_CACHE_PREFIX}{user_id}"
+        generation_key = f"{USER_CACHE_GENERATION_PREFIX}{user_id}"
+        fields, generation = (
+            await self.redis.pipeline().hgetall(key).get(generation_key).execute()
+        )
+        if fields:
+            user = UserRecord.from_hash(fields)
+        else:
+            # Поколение есть — пользователя недавно меняли: реплика может ещё
+            # отдавать старую строку, и проверку поколения она пройдёт
+            pinned = primary_pinned.set(primary_pinned.get() or generation is not None)
+            try:
+                user = await fetch_user_by_id(self.db_session, user_id)
+            finally:
+                primary_pinned.reset(pinned)
+            if user is None:
+                return None
+
+            # invalidate() между чтением и записью увеличит поколение,
+            # и устаревшая запись в кеш не попадёт
+            await self.redis.script(
+                FILL_SCRIPT,
+                keys=[key, generation_key],
+                args=[
+                    generation or "0",
+                    settings.app.user_cache_ttl_ms,
+                    *(item for pair in user.to_hash().items() for item in pair),
+                ],
+            )
+
+        self.local_cache.set(
+            user_id,
+            user,
+            expire_at=time.time() + settings.app.user_cache_local_ttl_ms / 1000,
+        )
+        return user
+
+    async def invalidate(self, user_id: str | UUID) -> None:
+        user_id = str(user_id)
+        self.local_cache.pop(user_id)
+
+        generation_key = f"{USER_CACHE_GENERATION_PREFIX}{user_id}"
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.delete(f"{USER_CACHE_PREFIX}{user_id}")
+        pipeline.incr(generation_key)
+        pipeline.expire(
+            generation_key, ex=timedelta(milliseconds=settings.app.user_cache_ttl_ms)
+        )
+        pipeline.publish(REVOCATION_CHANNEL, {"type": "user", "user_id": user_id})
+        await pipeline.execute()
+
+    async def set_active(self, user_id: str | UUID, is_active: bool) -> None:
+        await set_user_active(self.db_session, user_id, is_active)
+        await self.invalidate(user_id)
+
+
+revocation_filter.handlers["user"] = lambda message: UserService.local_cache.pop(
+    message["user_id"]
+)
@@ -4,21 +4,87 @@ import bcrypt
 
 from app.core.settings import settings
 
+try:
+    from argon2 import PasswordHasher as Argon2Hasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # argon2-cffi — опциональная зависимость
+    Argon2Hasher = None
+
+    class VerificationError(Exception):
+        pass
+
+    class InvalidHashError(Exception):
+        pass
+
+
+ARGON2_PREFIX = b"$argon2"
+
+
+def get_argon2_hasher(
+    time_cost: int = settings.password_hash.argon2_time_cost,
+    memory_cost: int = settings.password_hash.argon2_memory_cost,
+    parallelism: int = settings.password_hash.argon2_parallelism,
+) -> "Argon2Hasher":
+    if Argon2Hasher is None:
+        raise RuntimeError(
+            "argon2id password scheme requires the 'argon2' extra (argon2-cffi)"
+        )
+    return Argon2Hasher(
+        time_cost=time_cost,
+        memory_cost=memory_cost,
+        parallelism=parallelism,
+    )
+
+
+# При схеме argon2id без argon2-cffi приложение падает при старте
+_argon2 = get_argon2_hasher() if settings.password_hash.scheme == "argon2id" else None
+
+
+def argon2_hasher() -> "Argon2Hasher":
+    """Хешер argon2 с текущими настройками; без argon2-cffi — RuntimeError."""
+    global _argon2
+    if _argon2 is None:
+        _argon2 = get_argon2_hasher()
+    return _argon2
+
 
 def hash_pasword(password: str) -> bytes:
+    if settings.password_hash.scheme == "argon2id":
+        return argon2_hasher().hash(password).encode()
+
     return bcrypt.hashpw(
         password.encode(),
-        bcrypt.gensalt(),
+        bcrypt.gensalt(rounds=settings.password_hash.bcrypt_rounds),
     )
 
 
 def check_password(password: str, hashed_password: bytes) -> bool:
+    if hashed_password.startswith(ARGON2_PREFIX):
+        try:
+            return argon2_hasher().verify(hashed_password.decode(), password)
+        except (VerificationError, InvalidHashError):
+            return False
+
     return bcrypt.checkpw(
         password.encode(),
         hashed_password,
     )
 
 
+def password_needs_rehash(hashed_password: bytes) -> bool:
+    """Схема или стоимость хеша отличаются от текущих настроек."""
+    if settings.password_hash.scheme == "argon2id":
+        if not hashed_password.startswith(ARGON2_PREFIX + b"id$"):
+            return True
+        return argon2_hasher().check_needs_rehash(hashed_password.decode())
+
+    if hashed_password.startswith(ARGON2_PREFIX):
+        return True
+
+    # $2b$12$... — стоимость bcrypt хранится во втором поле хеша
+    return int(hashed_password[4:6]) != settings.password_hash.bcrypt_rounds
+
+
 def generate_confirmation_email_code() -> int:
     random = SystemRandom()
     code = "".join(
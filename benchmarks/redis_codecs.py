@@ -0,0 +1,128 @@
+"""Кодеки значений Redis на реальных формах ключей.
+
+Для каждого кодека (json, orjson, msgpack — если установлены, raw — для
+скаляров) печатает размер значения и время encode + decode. С --redis
+дополнительно меряет round trip SET/GET через RedisService на настроенном
+Redis и сравнивает проверку чёрного списка GET + decode с EXISTS.
+
+    uv run --extra orjson --extra msgpack python -m benchmarks.redis_codecs
+    uv run --extra orjson --extra msgpack python -m benchmarks.redis_codecs --redis
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Callable
+
+from app.core.ids import uuid7
+from app.core.redis_codecs import CODECS, Codec, JsonCodec, RawCodec, get_codec
+from app.core.redis_service import RedisService, init_redis, key_codecs
+from app.database.models.user import UserRole
+from app.schemas.token import TokenPairSchema
+from app.services.token_service import TokenService
+
+BENCH_PREFIX = "bench_codec:"
+
+
+def sample_values() -> dict[str, tuple[Any, bool]]:
+    """Значения, которые приложение кладёт в Redis; True — скаляр (подходит raw)."""
+    token_service = TokenService(uuid7(), role=UserRole.user, epoch=3)
+    token_pair = TokenPairSchema(
+        access_token=token_service.access_token,
+        refresh_token=token_service.refresh_token,
+    )
+    return {
+        "refresh_grace (token pair)": (token_pair.model_dump(), False),
+        "refresh_grace (pending)": ("pending", True),
+        "confirmation_code": (482913, True),
+        "blacklist marker": ("revoked", True),
+        "user_epoch": (17, True),
+    }
+
+
+def available_codecs() -> dict[str, Codec]:
+    codecs = {}
+    for name in CODECS:
+        try:
+            codecs[name] = get_codec(name)
+        except RuntimeError as exc:
+            print(f"skip {name}: {exc}")
+    return codecs
+
+
+def measure(func: Callable[[], Any], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def bench_local(codecs: dict[str, Codec], iterations: int) -> None:
+    print(f"{'value':<28}{'codec':<9}{'bytes':>7}{'encode+decode, us':>20}")
+    for label, (value, scalar) in sample_values().items():
+        for name, codec in codecs.items():
+            if isinstance(codec, RawCodec) and not scalar:
+                continue
+            encoded = codec.encode(value)
+            if not isinstance(encoded, bytes):
+                encoded = str(encoded).encode()
+            size = len(encoded)
+            elapsed = measure(lambda: codec.decode(codec.encode(value)), iterations)
+            print(f"{label:<28}{name:<9}{size:>7}{elapsed:>20.2f}")
+
+
+async def bench_redis(codecs: dict[str, Codec], iterations: int) -> None:
+    redis = await init_redis()
+    service = RedisService(redis)
+    token_pair = sample_values()["refresh_grace (token pair)"][0]
+    try:
+        print(f"\n{'codec':<9}{'SET+GET token pair, us':>24}")
+        for name, codec in codecs.items():
+            if isinstance(codec, RawCodec):
+                continue
+            key_codecs.register(BENCH_PREFIX, codec)
+            key = f"{BENCH_PREFIX}{name}"
+            started = time.perf_counter()
+            for _ in range(iterations):
+                await service.set(key, token_pair, ex=60)
+                assert await service.get(key) == token_pair
+            elapsed = (time.perf_counter() - started) / iterations * 1e6
+            print(f"{name:<9}{elapsed:>24.1f}")
+            await service.delete(key)
+
+        # Прежняя проверка чёрного списка: GET и json.loads маркера
+        key = f"{BENCH_PREFIX}blacklist"
+        key_codecs.register(BENCH_PREFIX, JsonCodec())
+        await service.set(key, "revoked", ex=60)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await service.get(key)
+        get_elapsed = (time.perf_counter() - started) / iterations * 1e6
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await service.exists(key)
+        exists_elapsed = (time.perf_counter() - started) / iterations * 1e6
+        print(
+            f"\nblacklist check: GET+decode {get_elapsed:.1f} us, "
+            f"EXISTS {exists_elapsed:.1f} us"
+        )
+        await service.delete(key)
+    finally:
+        await redis.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--redis", action="store_true")
+    parser.add_argument("--redis-iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    codecs = available_codecs()
+    bench_local(codecs, args.iterations)
+    if args.redis:
+        asyncio.run(bench_redis(codecs, args.redis_iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""ORM-репозиторий против быстрого Core-пути на горячих чтениях.
+
+Создаёт временного пользователя в настроенной базе, выполняет оба варианта
+запроса N раз и печатает время и пик выделенной памяти на вызов
+(tracemalloc: максимум выделенного за вызов сверх памяти до него).
+
+    uv run python -m benchmarks.repository_fast_path --iterations 5000
+"""
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+import uuid
+from typing import Awaitable, Callable
+
+from app.database.models import User
+from app.database.session import engine, session_factory
+from app.repository.fast import fetch_user_by_email, fetch_user_by_id
+from app.repository.user import get_user_by_email, get_user_by_id
+
+
+async def measure(
+    name: str, iterations: int, call: Callable[[], Awaitable[object]]
+) -> None:
+    for _ in range(100):  # прогрев кеша скомпилированных запросов
+        await call()
+
+    gc.collect()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await call()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    peak_total = 0
+    for _ in range(200):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        await call()
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - current
+    tracemalloc.stop()
+
+    print(
+        f"{name:<24} {iterations / elapsed:>10.0f} ops/s "
+        f"{elapsed / iterations * 1e6:>8.1f} us/op "
+        f"{peak_total / 200:>10.0f} B/op peak"
+    )
+
+
+async def main(iterations: int) -> None:
+    email = f"bench-{uuid.uuid4().hex}@example.com"
+    async with session_factory() as session:
+        user = User(name="bench", email=email, password=b"x")
+        session.add(user)
+        await session.commit()
+        user_id = user.id
+
+    try:
+        async with session_factory() as session:
+
+            async def orm_by_id():
+                result = await get_user_by_id(session, user_id)
+                session.expunge_all()  # иначе identity map отдаёт объект без построения
+                return result
+
+            async def orm_by_email():
+                result = await get_user_by_email(session, email)
+                session.expunge_all()
+                return result
+
+            await measure("orm get_user_by_id", iterations, orm_by_id)
+            await measure(
+                "fast fetch_user_by_id",
+                iterations,
+                lambda: fetch_user_by_id(session, user_id),
+            )
+            await measure("orm get_user_by_email", iterations, orm_by_email)
+            await measure(
+                "fast fetch_user_by_email",
+                iterations,
+                lambda: fetch_user_by_email(session, email),
+            )
+    finally:
+        async with session_factory() as session:
+            await session.delete(await session.get(User, user_id))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
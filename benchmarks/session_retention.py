@@ -0,0 +1,137 @@
+"""Удаление истёкших сессий: DELETE по индексу против DROP секций.
+
+Создаёт в настроенной базе две временные таблицы с одинаковыми данными
+(обычную и секционированную по дням, с DEFAULT-секцией, как sessions), удаляет из обеих строки, истёкшие
+больше чем --expired-days назад, и печатает время, объём WAL и число
+мёртвых строк, оставшихся после DELETE.
+
+    uv run python -m benchmarks.session_retention --rows 1000000 --days 14
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database.session import engine
+
+PLAIN = "bench_sessions_plain"
+PARTITIONED = "bench_sessions_partitioned"
+
+COLUMNS = """
+    id uuid NOT NULL,
+    user_id uuid NOT NULL,
+    session_id uuid NOT NULL,
+    user_agent varchar(512) NOT NULL,
+    last_active timestamptz NOT NULL,
+    expire_at timestamptz NOT NULL
+"""
+
+
+async def execute(connection: AsyncConnection, sql: str) -> None:
+    await connection.execute(text(sql))
+
+
+async def scalar(connection: AsyncConnection, sql: str):
+    return (await connection.execute(text(sql))).scalar()
+
+
+async def prepare(connection: AsyncConnection, rows: int, days: int) -> None:
+    await execute(connection, f"CREATE TABLE {PLAIN} ({COLUMNS}, PRIMARY KEY (id))")
+    await execute(
+        connection,
+        f"CREATE TABLE {PARTITIONED} ({COLUMNS}, PRIMARY KEY (id, expire_at)) "
+        "PARTITION BY RANGE (expire_at)",
+    )
+    await execute(
+        connection,
+        f"CREATE TABLE {PARTITIONED}_default PARTITION OF {PARTITIONED} DEFAULT",
+    )
+    for day in range(-days, 2):
+        await execute(
+            connection,
+            f"CREATE TABLE {PARTITIONED}_{day + days} PARTITION OF {PARTITIONED} "
+            f"FOR VALUES FROM (date_trunc('day', now()) + interval '{day} day') "
+            f"TO (date_trunc('day', now()) + interval '{day + 1} day')",
+        )
+    for table in (PLAIN, PARTITIONED):
+        await execute(
+            connection,
+            f"INSERT INTO {table} "
+            "SELECT gen_random_uuid(), gen_random_uuid(), gen_random_uuid(), 'bench', "
+            f"now(), date_trunc('day', now()) - interval '{days} day' "
+            f"+ random() * interval '{days} day' "
+            f"FROM generate_series(1, {rows})",
+        )
+        for column in ("user_id", "session_id", "expire_at"):
+            await execute(connection, f"CREATE INDEX ON {table} ({column})")
+        await execute(connection, f"VACUUM ANALYZE {table}")
+
+
+async def measure(name: str, connection: AsyncConnection, call) -> None:
+    wal_before = await scalar(connection, "SELECT pg_current_wal_lsn()::text")
+    started = time.perf_counter()
+    removed = await call()
+    elapsed = time.perf_counter() - started
+    wal = await scalar(
+        connection, f"SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), '{wal_before}')"
+    )
+    print(
+        f"{name:<12} {removed:>10} rows {elapsed * 1000:>10.1f} ms "
+        f"{wal / 1024 / 1024:>8.1f} MiB WAL"
+    )
+
+
+async def main(rows: int, days: int, expired_days: int) -> None:
+    cutoff = f"date_trunc('day', now()) - interval '{days - expired_days} day'"
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            await prepare(connection, rows, days)
+
+            async def delete_rows() -> int:
+                result = await connection.execute(
+                    text(f"DELETE FROM {PLAIN} WHERE expire_at < {cutoff}")
+                )
+                return result.rowcount
+
+            async def drop_partitions() -> int:
+                removed = 0
+                for day in range(expired_days):
+                    partition = f"{PARTITIONED}_{day}"
+                    removed += await scalar(
+                        connection, f"SELECT count(*) FROM {partition}"
+                    )
+                    # При DEFAULT-секции DETACH CONCURRENTLY запрещён
+                    await execute(
+                        connection,
+                        f"ALTER TABLE {PARTITIONED} DETACH PARTITION {partition}",
+                    )
+                    await execute(connection, f"DROP TABLE {partition}")
+                return removed
+
+            await measure("delete", connection, delete_rows)
+            await measure("drop", connection, drop_partitions)
+
+            await execute(connection, f"ANALYZE {PLAIN}")
+            dead = await scalar(
+                connection,
+                "SELECT n_dead_tup FROM pg_stat_user_tables "
+                f"WHERE relname = '{PLAIN}'",
+            )
+            print(f"dead tuples left in {PLAIN} for VACUUM: {dead}")
+        finally:
+            await execute(connection, f"DROP TABLE IF EXISTS {PLAIN}")
+            await execute(connection, f"DROP TABLE IF EXISTS {PARTITIONED}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--expired-days", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.days, args.expired_days))
@@ -0,0 +1,155 @@
+"""Пропускная способность SMTP: соединение на письмо против пула и пачек.
+
+Поднимает локальный SMTP-сервер aiosmtpd (письма никуда не уходят) и
+отправляет --messages писем тремя способами: новое соединение на каждое
+письмо (как FastMail), SMTPPool.send с --concurrency параллельными
+отправками и SMTPPool.send_batch пачками по --batch.
+С --tls сервер работает по SMTPS с самоподписанным сертификатом, что
+ближе к реальному провайдеру: рукопожатие — основная цена соединения.
+
+    uv run --with aiosmtpd python -m benchmarks.smtp_pool --messages 2000 --tls
+"""
+
+import argparse
+import asyncio
+import ssl
+import subprocess
+import tempfile
+import time
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from aiosmtplib import SMTP
+
+from app.services.smtp_pool import SMTPPool
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:  # aiosmtpd нужен только бенчмарку
+    raise SystemExit("benchmark requires aiosmtpd: uv run --with aiosmtpd ...")
+
+HOST = "127.0.0.1"
+PORT = 8025
+
+
+class CountingHandler:
+    def __init__(self) -> None:
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope) -> str:
+        self.received += 1
+        return "250 OK"
+
+
+def make_message(number: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "bench@example.com"
+    message["To"] = f"user{number}@example.com"
+    message["Subject"] = "Подтверждение регистрации"
+    message.set_content(f"<p>Код: {number:06d}</p>", subtype="html")
+    return message
+
+
+def make_tls_context(directory: Path) -> tuple[ssl.SSLContext, ssl.SSLContext]:
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-keyout",
+            key,
+            "-out",
+            cert,
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    server = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server.load_cert_chain(cert, key)
+    client = ssl.create_default_context()
+    client.check_hostname = False
+    client.verify_mode = ssl.CERT_NONE
+    return server, client
+
+
+async def measure(name: str, messages: int, run: Callable[[], Awaitable[None]]):
+    started = time.perf_counter()
+    await run()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<24} {messages / elapsed:>10.0f} msg/s {elapsed:>8.2f} s")
+
+
+async def main(messages: int, concurrency: int, batch: int, tls: bool) -> None:
+    handler = CountingHandler()
+    with tempfile.TemporaryDirectory() as directory:
+        server_tls = client_tls = None
+        if tls:
+            server_tls, client_tls = make_tls_context(Path(directory))
+        controller = Controller(
+            handler, hostname=HOST, port=PORT, ssl_context=server_tls
+        )
+        controller.start()
+        try:
+            limit = asyncio.Semaphore(concurrency)
+
+            async def per_message(number: int) -> None:
+                async with limit:
+                    client = SMTP(
+                        hostname=HOST,
+                        port=PORT,
+                        use_tls=tls,
+                        start_tls=False,
+                        tls_context=client_tls,
+                    )
+                    await client.connect()
+                    await client.send_message(make_message(number))
+                    await client.quit()
+
+            async def connect_per_message() -> None:
+                await asyncio.gather(*(per_message(n) for n in range(messages)))
+
+            pool = SMTPPool(
+                HOST, PORT, use_tls=tls, size=concurrency, tls_context=client_tls
+            )
+
+            async def pooled() -> None:
+                await asyncio.gather(
+                    *(pool.send(make_message(n)) for n in range(messages))
+                )
+
+            async def batched() -> None:
+                chunks = [
+                    [
+                        make_message(n)
+                        for n in range(start, min(start + batch, messages))
+                    ]
+                    for start in range(0, messages, batch)
+                ]
+                await asyncio.gather(*(pool.send_batch(chunk) for chunk in chunks))
+
+            await measure("connect per message", messages, connect_per_message)
+            await measure("pool send", messages, pooled)
+            await measure(f"pool send_batch({batch})", messages, batched)
+            await pool.close()
+            print(f"server received {handler.received} messages")
+        finally:
+            controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.concurrency, args.batch, args.tls))
@@ -0,0 +1,101 @@
+"""Скорость вставки в sessions-подобную таблицу: UUIDv4 против UUIDv7.
+
+Создаёт в настроенной базе временную таблицу с PK и индексом session_id,
+заранее наполняет её --prefill строками и вставляет ещё --rows пачками
+по --batch с ключами v4 или v7. Печатает вставки в секунду и итоговый
+размер индексов (случайные ключи расщепляют страницы и раздувают B-дерево).
+
+    uv run python -m benchmarks.uuid_insert --prefill 2000000 --rows 500000
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.ids import uuid7
+from app.database.session import engine
+
+TABLE = "bench_sessions_uuid"
+
+
+async def create_table(connection: AsyncConnection) -> None:
+    await connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    await connection.execute(
+        text(
+            f"CREATE TABLE {TABLE} ("
+            "id uuid PRIMARY KEY, user_id uuid NOT NULL, session_id uuid NOT NULL, "
+            "user_agent varchar(512) NOT NULL, last_active timestamptz NOT NULL, "
+            "expire_at timestamptz NOT NULL)"
+        )
+    )
+    await connection.execute(text(f"CREATE INDEX ON {TABLE} (session_id)"))
+
+
+async def insert(
+    connection: AsyncConnection,
+    rows: int,
+    batch: int,
+    generate: Callable[[], uuid.UUID],
+) -> float:
+    statement = text(
+        f"INSERT INTO {TABLE} "
+        "(id, user_id, session_id, user_agent, last_active, expire_at) "
+        "VALUES (:id, :user_id, :session_id, 'bench', :now, :expire_at)"
+    )
+    now = datetime.now(timezone.utc)
+    expire_at = now + timedelta(days=7)
+    started = time.perf_counter()
+    for _ in range(0, rows, batch):
+        await connection.execute(
+            statement,
+            [
+                {
+                    "id": generate(),
+                    "user_id": generate(),
+                    "session_id": generate(),
+                    "now": now,
+                    "expire_at": expire_at,
+                }
+                for _ in range(batch)
+            ],
+        )
+    return time.perf_counter() - started
+
+
+async def run(name: str, generate: Callable[[], uuid.UUID], args) -> None:
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await create_table(connection)
+        try:
+            await insert(connection, args.prefill, args.batch, generate)
+            elapsed = await insert(connection, args.rows, args.batch, generate)
+            size = (
+                await connection.execute(text(f"SELECT pg_indexes_size('{TABLE}')"))
+            ).scalar()
+            print(
+                f"{name:<6} {args.rows / elapsed:>10.0f} rows/s "
+                f"indexes {size / 1024 / 1024:>8.1f} MiB"
+            )
+        finally:
+            await connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+
+
+async def main(args) -> None:
+    await run("uuid4", uuid.uuid4, args)
+    await run("uuid7", uuid7, args)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prefill", type=int, default=2_000_000)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -12,14 +12,18 @@ PUBLIC_KEY="app/core/certs/public_key.pem"
 
 if [ ! -f "$PRIVATE_KEY" ]; then
     echo "Generating private key..."
-    openssl genrsa -out "$PRIVATE_KEY" 2048
+    case "${JWT_ALGORITHM:-RS256}" in
+        ES256) openssl genpkey -algorithm EC -pkeyopt ec_paramgen_curve:P-256 -out "$PRIVATE_KEY" ;;
+        EdDSA) openssl genpkey -algorithm ED25519 -out "$PRIVATE_KEY" ;;
+        *) openssl genrsa -out "$PRIVATE_KEY" 2048 ;;
+    esac
 else
     echo "Private key already exists."
 fi
 
 if [ ! -f "$PUBLIC_KEY" ]; then
     echo "Generating public key..."
-    openssl rsa -in "$PRIVATE_KEY" -outform PEM -pubout -out "$PUBLIC_KEY"
+    openssl pkey -in "$PRIVATE_KEY" -outform PEM -pubout -out "$PUBLIC_KEY"
 else
     echo "Public key already exists."
 fi
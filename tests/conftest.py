@@ -0,0 +1,118 @@
+import os
+import tempfile
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+# Настройки читаются при импорте app: задаём обязательные переменные,
+# если их нет ни в окружении, ни в .env
+TEST_ENV = {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_DB_NAME": "test",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_PORT": "5432",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_USER": "default",
+    "REDIS_PASSWORD": "test",
+    "REDIS_DB": "0",
+    "ACCESS_TOKEN_EXPIRE_MS": "900000",
+    "REFRESH_TOKEN_EXPIRE_MS": "604800000",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "465",
+    "SMTP_USERNAME": "test@example.com",
+    "SMTP_PASSWORD": "test",
+    "CONFIRMATION_EMAIL_CODE_LENGTH": "6",
+    "CONFIRMATION_EMAIL_CODE_TTL": "3600000",
+    "CONFIRMATION_EMAIL_CODE_RATE_LIMIT": "300000",
+    "USER_SESSION_LIMIT": "5",
+}
+for name, value in TEST_ENV.items():
+    os.environ.setdefault(name, value)
+
+from app.core.settings import settings  # noqa: E402
+from app.database.models.user import UserRole  # noqa: E402
+from app.repository.records import UserRecord  # noqa: E402
+
+
+def generate_keys(algorithm: str, folder: Path) -> None:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if algorithm == "ES256":
+        key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "EdDSA":
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    (folder / "private.pem").write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    (folder / "public.pem").write_bytes(
+        key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+
+
+# Без ключей в app/core/certs тесты подписывают токены временной парой
+if not settings.jwt.private_key.exists():
+    keys_folder = Path(tempfile.mkdtemp(prefix="sessionvault-keys-"))
+    generate_keys(settings.jwt.algorithm, keys_folder)
+    settings.jwt.private_key = keys_folder / "private.pem"
+    settings.jwt.public_key = keys_folder / "public.pem"
+
+
+@pytest.fixture
+async def redis():
+    """Redis для тестов скриптов: TEST_REDIS_URL или fakeredis с Lua.
+
+    Реальный Redis очищается (FLUSHDB) до и после теста.
+    """
+    url = os.environ.get("TEST_REDIS_URL")
+    if url:
+        from redis.asyncio import Redis
+
+        client = Redis.from_url(url, decode_responses=True)
+    else:
+        from fakeredis import FakeAsyncRedis
+
+        client = FakeAsyncRedis(decode_responses=True)
+    await client.flushdb()
+    yield client
+    await client.flushdb()
+    await client.aclose()
+
+
+class StubUsers:
+    """Подмена UserService: знает одного пользователя."""
+
+    def __init__(self, user: UserRecord) -> None:
+        self.user = user
+
+    async def get_user(self, user_id) -> UserRecord | None:
+        return self.user if str(user_id) == str(self.user.id) else None
+
+
+@pytest.fixture
+def user() -> UserRecord:
+    return UserRecord(
+        id=uuid4(),
+        name="Test",
+        email="test@example.com",
+        role=UserRole.user,
+        is_active=True,
+        is_verified=True,
+    )
+
+
+@pytest.fixture
+def users(user) -> StubUsers:
+    return StubUsers(user)
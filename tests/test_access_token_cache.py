@@ -0,0 +1,79 @@
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.cache import TTLCache
+from app.database.models.user import UserRole
+from app.services.token_service import TokenService
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache("test_cache.lru", maxsize=2)
+    expire_at = time.time() + 60
+    cache.set("a", 1, expire_at)
+    cache.set("b", 2, expire_at)
+    assert cache.get("a") == 1  # "b" теперь самый старый
+    cache.set("c", 3, expire_at)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_cache_drops_expired_entry():
+    cache = TTLCache("test_cache.ttl", maxsize=2)
+    cache.set("a", 1, time.time() - 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_with_zero_size_stores_nothing():
+    cache = TTLCache("test_cache.disabled", maxsize=0)
+    cache.set("a", 1, time.time() + 60)
+
+    assert cache.get("a") is None
+
+
+@pytest.fixture
+def tokens():
+    TokenService.verified_access_tokens.clear()
+    yield TokenService(uuid4(), role=UserRole.user, epoch=2)
+    TokenService.verified_access_tokens.clear()
+
+
+def test_access_token_is_verified_once(tokens, monkeypatch):
+    payload = TokenService.decode_access_token(tokens.access_token)
+    assert payload["sub"] == str(tokens.sub)
+    assert payload["epc"] == 2
+
+    def decode_jwt(token):
+        raise AssertionError("cached token verified again")
+
+    monkeypatch.setattr(TokenService, "decode_jwt", decode_jwt)
+    assert TokenService.decode_access_token(tokens.access_token) == payload
+
+
+def test_refresh_token_is_not_cached(tokens):
+    TokenService.decode_access_token(tokens.refresh_token)
+
+    assert len(TokenService.verified_access_tokens) == 0
+
+
+def test_forgotten_token_is_verified_again(tokens):
+    TokenService.decode_access_token(tokens.access_token)
+    TokenService.forget_access_token(tokens.access_token)
+
+    assert len(TokenService.verified_access_tokens) == 0
+
+
+def test_tampered_token_is_rejected(tokens):
+    header, payload, signature = tokens.access_token.split(".")
+    tampered = f"{header}.{payload}.{signature[::-1]}"
+
+    with pytest.raises(HTTPException):
+        TokenService.decode_access_token(tampered)
+    assert len(TokenService.verified_access_tokens) == 0
@@ -0,0 +1,37 @@
+import time
+import uuid
+
+from app.core import ids
+
+
+def test_uuid7_version_variant_and_timestamp():
+    before = time.time_ns() // 1_000_000
+    value = ids._uuid7()
+    after = time.time_ns() // 1_000_000
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert before <= value.int >> 80 <= after
+
+
+def test_uuid7_is_strictly_increasing():
+    values = [ids._uuid7() for _ in range(10000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_uuid7_counter_overflow_moves_to_next_millisecond(monkeypatch):
+    frozen = time.time_ns()
+    monkeypatch.setattr(ids.time, "time_ns", lambda: frozen)
+
+    # Больше значений, чем вмещает 12-битный счётчик одной миллисекунды
+    values = [ids._uuid7() for _ in range(5000)]
+
+    assert values == sorted(values)
+    assert values[-1].int >> 80 > frozen // 1_000_000
+    assert all(value.version == 7 for value in values)
+
+
+def test_uuid7_prefers_standard_library():
+    assert ids.uuid7 is getattr(uuid, "uuid7", ids._uuid7)
@@ -0,0 +1,57 @@
+import json
+import time
+
+from app.core.redis_service import RedisService
+from app.services.mail_outbox import (
+    MAIL_RETRY_QUEUE,
+    MAIL_STREAM,
+    MailJob,
+    enqueue_mail,
+)
+from app.services.mail_worker import MailWorker
+
+
+def make_worker(redis) -> MailWorker:
+    async def deliver(jobs):
+        return [None] * len(jobs)
+
+    return MailWorker(
+        redis,
+        deliver,
+        concurrency=1,
+        batch_size=10,
+        max_attempts=3,
+        backoff=1,
+        backoff_max=10,
+        claim_idle=60,
+    )
+
+
+def job(number: int) -> MailJob:
+    return MailJob("confirm", "Код", f"user{number}@example.com", {"code": number})
+
+
+async def test_outbox_keeps_undelivered_mail(redis):
+    for number in range(50):
+        await enqueue_mail(RedisService(redis).pipeline(), job(number)).execute()
+
+    entries = await redis.xrange(MAIL_STREAM)
+    assert len(entries) == 50
+    assert MailJob.from_fields(entries[0][1]).recipient == "user0@example.com"
+
+
+async def test_due_retries_return_to_outbox(redis):
+    worker = make_worker(redis)
+    due = {
+        json.dumps({"id": str(number), "fields": job(number).to_fields()}): (
+            time.time() - 1
+        )
+        for number in range(20)
+    }
+    await redis.zadd(MAIL_RETRY_QUEUE, due)
+    # за вызов переносится не больше concurrency * 10 писем
+    await worker.move_due_retries()
+    await worker.move_due_retries()
+
+    assert await redis.xlen(MAIL_STREAM) == 20
+    assert await redis.zcard(MAIL_RETRY_QUEUE) == 0
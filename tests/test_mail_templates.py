@@ -0,0 +1,86 @@
+import os
+from pathlib import Path
+
+import pytest
+from jinja2 import Environment
+
+from app.services.mail_templates import MailTemplates, is_plain_substitution
+
+APP_TEMPLATES = Path(__file__).parent.parent / "app" / "templates"
+CONTEXTS = [
+    {"name": "Анна", "confirmation_code": 123456},
+    {"name": "<script>alert('x')</script> & \"Co\"", "confirmation_code": "0 < 1"},
+    {},
+]
+
+
+@pytest.mark.parametrize(
+    ("source", "plain"),
+    [
+        ("<p>Hello, {{ name }}! Code: {{code}}</p>", True),
+        ("no substitutions", True),
+        ("{{ name | upper }}", False),
+        ("{{ user.name }}", False),
+        ("{% if name %}{{ name }}{% endif %}", False),
+    ],
+)
+def test_is_plain_substitution(source, plain):
+    assert is_plain_substitution(Environment().parse(source)) is plain
+
+
+def make_templates(folder: Path, **options) -> MailTemplates:
+    return MailTemplates(
+        folder,
+        reload=options.get("reload", False),
+        thread_threshold=options.get("thread_threshold", 65536),
+    )
+
+
+@pytest.mark.parametrize(
+    "name", sorted(path.name for path in APP_TEMPLATES.glob("*.html"))
+)
+async def test_shell_matches_jinja_for_app_templates(name):
+    templates = make_templates(APP_TEMPLATES)
+    compiled = templates.get(name)
+
+    assert compiled.parts is not None
+    for context in CONTEXTS:
+        assert await templates.render(name, context) == compiled.render_context(context)
+    templates.shutdown()
+
+
+async def test_template_with_logic_renders_through_jinja(tmp_path):
+    (tmp_path / "logic.html").write_text("{% if name %}<b>{{ name }}</b>{% endif %}")
+    templates = make_templates(tmp_path)
+
+    assert templates.get("logic.html").parts is None
+    assert await templates.render("logic.html", {"name": "<i>"}) == "<b>&lt;i&gt;</b>"
+    templates.shutdown()
+
+
+async def test_large_template_renders_in_thread(tmp_path):
+    (tmp_path / "large.html").write_text("{{ name | upper }}" + "<p>padding</p>" * 100)
+    templates = make_templates(tmp_path, thread_threshold=1024)
+    threaded = templates._threaded.value  # счётчик общий для всех экземпляров
+
+    rendered = await templates.render_batch(
+        "large.html", [{"name": "a"}, {"name": "b"}]
+    )
+
+    assert [html[:1] for html in rendered] == ["A", "B"]
+    assert templates._threaded.value - threaded == 1
+    templates.shutdown()
+
+
+async def test_reload_picks_up_changed_template(tmp_path):
+    path = tmp_path / "mail.html"
+    path.write_text("old {{ name }}")
+    templates = make_templates(tmp_path, reload=True)
+    assert await templates.render("mail.html", {"name": "x"}) == "old x"
+
+    path.write_text("new {{ name }}")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert await templates.render("mail.html", {"name": "x"}) == "new x"
+    templates.shutdown()
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+
+import bcrypt
+import pytest
+from fastapi import HTTPException
+
+from app.core.settings import settings
+from app.services import password_hasher as hasher_module
+from app.services import utils
+from app.services.password_hasher import PasswordHasher
+from app.services.utils import check_password, hash_pasword, password_needs_rehash
+
+needs_argon2 = pytest.mark.skipif(
+    utils.Argon2Hasher is None, reason="argon2-cffi is not installed"
+)
+
+
+@pytest.fixture
+def password_hash(monkeypatch):
+    # Минимальные стоимости, чтобы тесты не тратили время на хеширование
+    monkeypatch.setattr(settings.password_hash, "bcrypt_rounds", 4)
+    monkeypatch.setattr(utils, "_argon2", None)
+    if utils.Argon2Hasher is not None:
+        monkeypatch.setattr(
+            utils,
+            "_argon2",
+            utils.get_argon2_hasher(time_cost=1, memory_cost=8, parallelism=1),
+        )
+    return settings.password_hash
+
+
+def test_bcrypt_cost_change_needs_rehash(password_hash, monkeypatch):
+    hashed = hash_pasword("secret")
+    assert not password_needs_rehash(hashed)
+
+    monkeypatch.setattr(password_hash, "bcrypt_rounds", 5)
+    assert password_needs_rehash(hashed)
+
+    rehashed = hash_pasword("secret")
+    assert rehashed.startswith(b"$2b$05$")
+    assert check_password("secret", rehashed)
+    assert not password_needs_rehash(rehashed)
+
+
+@needs_argon2
+def test_bcrypt_is_upgraded_to_argon2id(password_hash, monkeypatch):
+    old = hash_pasword("secret")
+    monkeypatch.setattr(password_hash, "scheme", "argon2id")
+
+    # Старый bcrypt-хеш по-прежнему проверяется, но требует пересчёта
+    assert check_password("secret", old)
+    assert password_needs_rehash(old)
+
+    new = hash_pasword("secret")
+    assert new.startswith(b"$argon2id$")
+    assert check_password("secret", new)
+    assert not check_password("wrong", new)
+    assert not password_needs_rehash(new)
+
+
+@needs_argon2
+def test_argon2_hash_is_rehashed_back_to_bcrypt(password_hash, monkeypatch):
+    monkeypatch.setattr(password_hash, "scheme", "argon2id")
+    hashed = hash_pasword("secret")
+    monkeypatch.setattr(password_hash, "scheme", "bcrypt")
+
+    assert check_password("secret", hashed)
+    assert password_needs_rehash(hashed)
+
+
+def test_argon2id_without_argon2_cffi(password_hash, monkeypatch):
+    monkeypatch.setattr(utils, "Argon2Hasher", None)
+    monkeypatch.setattr(utils, "_argon2", None)
+    monkeypatch.setattr(password_hash, "scheme", "argon2id")
+
+    with pytest.raises(RuntimeError, match="argon2"):
+        hash_pasword("secret")
+    with pytest.raises(RuntimeError, match="argon2"):
+        check_password("secret", b"$argon2id$v=19$m=8,t=1,p=1$c2FsdA$aGFzaA")
+
+    # bcrypt-хеши проверяются и без argon2-cffi
+    monkeypatch.setattr(password_hash, "scheme", "bcrypt")
+    assert check_password("secret", hash_pasword("secret"))
+
+
+@pytest.fixture
+def blocked(monkeypatch) -> threading.Event:
+    """Хеширование висит, пока тест не выставит событие."""
+    release = threading.Event()
+
+    def slow_hash(password: str) -> bytes:
+        release.wait(5)
+        return password.encode()
+
+    monkeypatch.setattr(hasher_module, "hash_pasword", slow_hash)
+    yield release
+    release.set()
+
+
+async def test_hasher_rejects_when_queue_is_full(blocked):
+    hasher = PasswordHasher("thread", max_workers=1, max_pending=1, timeout=5)
+    rejected = hasher._rejected.value
+    first = asyncio.create_task(hasher.hash("first"))
+    while hasher._pending == 0:
+        await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await hasher.hash("second")
+    assert exc_info.value.status_code == 503
+    assert hasher._rejected.value - rejected == 1
+
+    blocked.set()
+    assert await first == b"first"
+    assert hasher._pending == 0
+    hasher.shutdown()
+
+
+async def test_hasher_times_out(blocked):
+    hasher = PasswordHasher("thread", max_workers=1, max_pending=4, timeout=0.05)
+    timeouts = hasher._timeouts.value
+
+    with pytest.raises(HTTPException) as exc_info:
+        await hasher.hash("secret")
+    assert exc_info.value.status_code == 503
+    assert hasher._timeouts.value - timeouts == 1
+    assert hasher._pending == 0
+    hasher.shutdown()
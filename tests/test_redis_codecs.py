@@ -0,0 +1,97 @@
+import pytest
+
+from app.core import redis_codecs
+from app.core.redis_codecs import (
+    JsonCodec,
+    KeyCodecs,
+    MsgpackCodec,
+    OrjsonCodec,
+    RawCodec,
+    get_codec,
+)
+from app.core.redis_service import RedisService, key_codecs
+
+VALUE = {"access_token": "a.b.c", "refresh_token": "d.e.f", "n": 1, "list": [1, "2"]}
+
+
+def binary_codecs() -> list:
+    codecs = []
+    if redis_codecs.orjson is not None:
+        codecs.append(OrjsonCodec())
+    if redis_codecs.msgpack is not None:
+        codecs.append(MsgpackCodec())
+    return codecs
+
+
+def test_codec_for_key_uses_prefix_up_to_first_colon():
+    json_codec, raw_codec = JsonCodec(), RawCodec()
+    codecs = KeyCodecs(default=json_codec)
+    codecs.register("blacklist:", raw_codec)
+
+    assert codecs.for_key("blacklist:sid:1") is raw_codec
+    assert codecs.for_key("blacklist") is json_codec
+    assert codecs.for_key("user:1") is json_codec
+    assert codecs.for_key("plain") is json_codec
+
+
+def test_prefix_must_end_with_colon():
+    with pytest.raises(ValueError):
+        KeyCodecs(default=JsonCodec()).register("blacklist", RawCodec())
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        get_codec("pickle")
+
+
+def test_missing_extra_is_reported(monkeypatch):
+    monkeypatch.setattr(redis_codecs, "orjson", None)
+    monkeypatch.setattr(redis_codecs, "msgpack", None)
+
+    with pytest.raises(RuntimeError, match="orjson"):
+        get_codec("orjson")
+    with pytest.raises(RuntimeError, match="msgpack"):
+        get_codec("msgpack")
+
+
+@pytest.mark.parametrize(
+    "codec", [JsonCodec(), *binary_codecs()], ids=lambda codec: type(codec).__name__
+)
+def test_codec_round_trip(codec):
+    assert codec.decode(codec.encode(VALUE)) == VALUE
+
+
+def test_orjson_reads_values_written_by_json():
+    if redis_codecs.orjson is None:
+        pytest.skip("orjson is not installed")
+    orjson_codec, json_codec = OrjsonCodec(), JsonCodec()
+
+    assert orjson_codec.decode(json_codec.encode(VALUE)) == VALUE
+    assert json_codec.decode(orjson_codec.encode(VALUE)) == VALUE
+
+
+@pytest.mark.parametrize(
+    "codec", [JsonCodec(), *binary_codecs()], ids=lambda codec: type(codec).__name__
+)
+async def test_service_round_trip_through_redis(redis, codec):
+    prefix = f"test_codec_{type(codec).__name__.lower()}:"
+    key_codecs.register(prefix, codec)
+    service = RedisService(redis)
+
+    await service.set(f"{prefix}value", VALUE, ex=60)
+    await service.set("test_codec_raw:marker", "revoked", ex=60)
+
+    assert await service.get(f"{prefix}value") == VALUE
+    assert await service.mget(
+        [f"{prefix}value", f"{prefix}missing", "test_codec_raw:marker"]
+    ) == [VALUE, None, "revoked"]
+
+
+async def test_raw_values_are_stored_as_is(redis):
+    key_codecs.register("test_codec_raw:", RawCodec())
+    service = RedisService(redis)
+
+    await service.set("test_codec_raw:counter", 17, ex=60)
+
+    assert await redis.get("test_codec_raw:counter") == "17"
+    assert await service.exists("test_codec_raw:counter") == 1
@@ -0,0 +1,78 @@
+import pytest
+
+from app.core.redis_scripts import (
+    COMPARE_AND_DELETE_SCRIPT,
+    SET_REPLACE_SCRIPT,
+    ScriptRegistry,
+    redis_scripts,
+    script_reloads,
+)
+from app.core.redis_service import RedisService
+
+
+async def test_script_is_reloaded_after_flush(redis):
+    reloads = script_reloads.value
+    await redis_scripts.load(redis)
+    assert await redis.script_exists(COMPARE_AND_DELETE_SCRIPT.sha) == [True]
+
+    await redis.script_flush()
+    await redis.set("code", "1")
+    assert await COMPARE_AND_DELETE_SCRIPT(redis, ["code", "code:attempts"], ["1", 3])
+
+    assert script_reloads.value - reloads == 1
+    assert await redis.script_exists(COMPARE_AND_DELETE_SCRIPT.sha) == [True]
+
+
+def test_registry_rejects_duplicate_names():
+    registry = ScriptRegistry()
+    registry.register("test", "return 1")
+
+    with pytest.raises(ValueError):
+        registry.register("test", "return 2")
+
+
+async def test_pipeline_runs_script_source(redis):
+    pipeline = RedisService(redis).pipeline(transaction=True)
+    pipeline.script(SET_REPLACE_SCRIPT, keys=["value"], args=["new", 60000])
+
+    assert await pipeline.execute() == [None]
+    assert await redis.get("value") == "new"
+
+
+async def compare(redis, expected: str, limit: int = 3) -> int:
+    return await COMPARE_AND_DELETE_SCRIPT(
+        redis, keys=["code", "code:attempts"], args=[expected, limit]
+    )
+
+
+async def test_compare_and_delete_outcomes(redis):
+    assert await compare(redis, "1") == -1
+
+    await redis.set("code", "1", px=60000)
+    assert await compare(redis, "2") == 0
+    assert 0 < await redis.pttl("code:attempts") <= 60000
+    assert await compare(redis, "1") == 1
+    assert not await redis.exists("code", "code:attempts")
+
+
+async def test_compare_and_delete_gives_up_after_limit(redis):
+    await redis.set("code", "1", px=60000)
+
+    assert [await compare(redis, "2", limit=3) for _ in range(3)] == [0, 0, -2]
+    # Код удалён: верное значение после исчерпания попыток уже не подходит
+    assert await compare(redis, "1") == -1
+
+
+async def test_set_replace_returns_previous_and_drops_related(redis):
+    await redis.set("value", "old")
+    await redis.set("related:1", "x")
+    await redis.set("related:2", "y")
+
+    previous = await SET_REPLACE_SCRIPT(
+        redis, keys=["value", "related:1", "related:2"], args=["new", 60000]
+    )
+
+    assert previous == "old"
+    assert await redis.get("value") == "new"
+    assert 0 < await redis.pttl("value") <= 60000
+    assert not await redis.exists("related:1", "related:2")
@@ -0,0 +1,241 @@
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.core.redis_service import RedisService
+from app.database.models.user import UserRole
+from app.repository.records import UserRecord
+from app.services.session_store import (
+    ACK_BATCH_SCRIPT,
+    CLAIM_BATCH_SCRIPT,
+    SESSION_PERSIST_BATCH,
+    SESSION_PERSIST_DEAD_LETTER,
+    SESSION_PERSIST_PROCESSING,
+    SESSION_PERSIST_QUEUE,
+    SESSION_PREFIX,
+    SESSION_SID_PREFIX,
+    USER_SESSIONS_PREFIX,
+    RedisSessionStore,
+    SessionPersister,
+)
+
+
+@pytest.fixture
+def store(redis, users) -> RedisSessionStore:
+    return RedisSessionStore(RedisService(redis), users)
+
+
+async def admit(store, user, limit=5, offset=0):
+    family_id, session_id = uuid4(), uuid4()
+    now = datetime.now(timezone.utc) + timedelta(seconds=offset)
+    evicted = await store.admit(
+        family_id=family_id,
+        user_id=user.id,
+        session_id=session_id,
+        user_agent="agent",
+        last_active=now,
+        expire_at=now + timedelta(days=1),
+        limit=limit,
+    )
+    return family_id, session_id, evicted
+
+
+async def rotate(store, user, session_id, family_id):
+    new_session_id = uuid4()
+    now = datetime.now(timezone.utc)
+    rotated = await store.rotate(
+        user_id=user.id,
+        old_session_id=session_id,
+        new_session_id=new_session_id,
+        user_agent="agent",
+        last_active=now,
+        expire_at=now + timedelta(days=1),
+        family_id=family_id,
+    )
+    return new_session_id, rotated
+
+
+async def queued(redis) -> list[dict]:
+    return [
+        json.loads(item) for item in await redis.lrange(SESSION_PERSIST_QUEUE, 0, -1)
+    ]
+
+
+async def test_admit_evicts_oldest_over_limit(redis, store, user):
+    first = await admit(store, user, limit=2, offset=0)
+    await admit(store, user, limit=2, offset=1)
+    family_id, _, evicted = await admit(store, user, limit=2, offset=2)
+
+    assert evicted == [str(first[1])]
+    assert not await redis.exists(f"{SESSION_PREFIX}{first[0]}")
+    assert await redis.zcard(f"{USER_SESSIONS_PREFIX}{user.id}") == 2
+    assert (await queued(redis))[-2] == {"op": "delete", "id": str(first[0])}
+    assert (await queued(redis))[-1]["id"] == str(family_id)
+
+
+async def test_rotation_moves_session_to_new_sid(redis, store, user):
+    family_id, session_id, _ = await admit(store, user)
+
+    new_session_id, rotated = await rotate(store, user, session_id, family_id)
+
+    assert rotated.family_id == family_id
+    assert rotated.role == UserRole.user and rotated.is_active
+    assert await redis.get(f"{SESSION_SID_PREFIX}{new_session_id}") == str(family_id)
+    assert not await redis.exists(f"{SESSION_SID_PREFIX}{session_id}")
+    assert await redis.hget(f"{SESSION_PREFIX}{family_id}", "sid") == str(
+        new_session_id
+    )
+
+
+async def test_replayed_token_deletes_family(redis, store, user):
+    family_id, session_id, _ = await admit(store, user)
+    new_session_id, _ = await rotate(store, user, session_id, family_id)
+
+    _, replayed = await rotate(store, user, session_id, family_id)
+
+    assert replayed.replayed_session_id == str(new_session_id)
+    assert not await redis.exists(
+        f"{SESSION_PREFIX}{family_id}", f"{SESSION_SID_PREFIX}{new_session_id}"
+    )
+    assert (await queued(redis))[-1] == {"op": "delete", "id": str(family_id)}
+    # Семейство удалено: и новый токен больше не ротируется
+    assert (await rotate(store, user, new_session_id, family_id))[1] is None
+
+
+async def test_foreign_family_is_not_deleted(redis, store, user):
+    family_id, session_id, _ = await admit(store, user)
+    await rotate(store, user, session_id, family_id)
+    stranger = UserRecord.from_hash({**user.to_hash(), "id": str(uuid4())})
+    store.users.user = stranger
+
+    assert (
+        await store.rotate(
+            user_id=stranger.id,
+            old_session_id=session_id,
+            new_session_id=uuid4(),
+            user_agent="agent",
+            last_active=datetime.now(timezone.utc),
+            expire_at=datetime.now(timezone.utc) + timedelta(days=1),
+            family_id=family_id,
+        )
+        is None
+    )
+    assert await redis.exists(f"{SESSION_PREFIX}{family_id}")
+
+
+async def test_delete_user_sessions_keeps_current(redis, store, user):
+    _, keep_session_id, _ = await admit(store, user, offset=0)
+    _, other_session_id, _ = await admit(store, user, offset=1)
+
+    deleted = await store.delete_user_sessions(
+        user.id, exclude_session_id=keep_session_id
+    )
+
+    assert deleted == [str(other_session_id)]
+    assert await redis.exists(f"{SESSION_SID_PREFIX}{keep_session_id}")
+    assert await redis.zcard(f"{USER_SESSIONS_PREFIX}{user.id}") == 1
+
+    await store.delete(keep_session_id)
+    assert await redis.zcard(f"{USER_SESSIONS_PREFIX}{user.id}") == 0
+
+
+class FakeDatabase:
+    """Подмена SessionPersister.persist: запоминает записанные изменения."""
+
+    def __init__(self, poison: set[str] = frozenset(), down: bool = False) -> None:
+        self.poison = poison
+        self.down = down
+        self.rows: dict[str, dict] = {}
+
+    async def persist(self, operations: list[dict]) -> None:
+        if self.down or any(operation["id"] in self.poison for operation in operations):
+            raise ValueError("cannot persist")
+        for operation in operations:
+            self.rows[operation["id"]] = operation
+
+
+def make_persister(database: FakeDatabase, monkeypatch, **options) -> SessionPersister:
+    persister = SessionPersister(
+        interval=1, batch_size=options.get("batch_size", 100), max_attempts=2
+    )
+    monkeypatch.setattr(persister, "persist", database.persist)
+    return persister
+
+
+async def enqueue(redis, *ids: str) -> None:
+    await redis.rpush(
+        SESSION_PERSIST_QUEUE, *(json.dumps({"op": "delete", "id": id}) for id in ids)
+    )
+
+
+async def test_flush_claims_batches_in_order(redis, monkeypatch):
+    database = FakeDatabase()
+    persister = make_persister(database, monkeypatch, batch_size=2)
+    await enqueue(redis, "a", "b", "c")
+
+    assert await persister.flush(redis) == 2
+    assert await persister.flush(redis) == 1
+    assert await persister.flush(redis) == 0
+
+    assert list(database.rows) == ["a", "b", "c"]
+    assert not await redis.exists(SESSION_PERSIST_PROCESSING)
+
+
+async def test_failed_batch_stays_claimed_until_written(redis, monkeypatch):
+    database = FakeDatabase(down=True)
+    persister = make_persister(database, monkeypatch)
+    await enqueue(redis, "a")
+
+    with pytest.raises(ValueError):
+        await persister.flush(redis)
+    # Новые изменения не смешиваются с незавершённой пачкой
+    await enqueue(redis, "b")
+    assert await redis.lrange(SESSION_PERSIST_PROCESSING, 0, -1) == [
+        json.dumps({"op": "delete", "id": "a"})
+    ]
+
+    database.down = False
+    assert await persister.flush(redis) == 1
+    assert list(database.rows) == ["a"]
+    assert await persister.flush(redis) == 1
+    assert list(database.rows) == ["a", "b"]
+
+
+async def test_poison_change_is_dead_lettered(redis, monkeypatch):
+    database = FakeDatabase(poison={"bad"})
+    persister = make_persister(database, monkeypatch)
+    await enqueue(redis, "a", "bad", "b")
+
+    for _ in range(2):  # max_attempts неудачных попыток целой пачкой
+        with pytest.raises(ValueError):
+            await persister.flush(redis)
+    assert await persister.flush(redis) == 3
+
+    assert sorted(database.rows) == ["a", "b"]
+    assert await redis.lrange(SESSION_PERSIST_DEAD_LETTER, 0, -1) == [
+        json.dumps({"op": "delete", "id": "bad"})
+    ]
+    assert not await redis.exists(SESSION_PERSIST_PROCESSING)
+
+
+async def test_stale_ack_keeps_current_batch(redis):
+    await enqueue(redis, "a")
+    keys = [SESSION_PERSIST_QUEUE, SESSION_PERSIST_PROCESSING, SESSION_PERSIST_BATCH]
+    batch_id, attempt, _ = await CLAIM_BATCH_SCRIPT(redis, keys=keys, args=[10])
+
+    # Лидер, потерявший блокировку, подтверждает уже чужую пачку
+    acked = await ACK_BATCH_SCRIPT(
+        redis,
+        keys=[
+            SESSION_PERSIST_PROCESSING,
+            SESSION_PERSIST_BATCH,
+            SESSION_PERSIST_DEAD_LETTER,
+        ],
+        args=[batch_id - 1],
+    )
+
+    assert (batch_id, attempt) == (1, 1)
+    assert acked == 0
+    assert await redis.llen(SESSION_PERSIST_PROCESSING) == 1
@@ -0,0 +1,149 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.redis_service import RedisService
+from app.core.settings import settings
+from app.database.models.user import UserRole
+from app.services.auth_service import REFRESH_GRACE_PREFIX, AuthService
+from app.services.revocation import BLACKLIST_PREFIX
+from app.services.session_store import RotatedSession
+from app.services.token_service import TokenService
+
+
+class StubSessions:
+    """Хранилище сессий, возвращающее заданный результат ротации."""
+
+    def __init__(self, result: RotatedSession | None) -> None:
+        self.result = result
+        self.rotations: list[dict] = []
+
+    async def rotate(self, **kwargs) -> RotatedSession | None:
+        self.rotations.append(kwargs)
+        return self.result
+
+
+def make_auth(redis, sessions: StubSessions) -> AuthService:
+    return AuthService(
+        redis=RedisService(redis), db_session=None, users=None, sessions=sessions
+    )
+
+
+def refresh_payload() -> dict:
+    tokens = TokenService(uuid4(), role=UserRole.user)
+    return TokenService.decode_jwt(tokens.refresh_token)
+
+
+async def test_rotation_keeps_family_and_role(redis):
+    payload = refresh_payload()
+    family_id = uuid4()
+    sessions = StubSessions(RotatedSession(family_id, UserRole.admin, True))
+
+    pair = await make_auth(redis, sessions).rotate_refresh_token(payload, "agent")
+
+    (rotation,) = sessions.rotations
+    assert rotation["old_session_id"] == payload["sid"]
+    assert rotation["family_id"] == payload["fam"]
+    access = TokenService.decode_jwt(pair.access_token)
+    refresh = TokenService.decode_jwt(pair.refresh_token)
+    assert access["role"] == UserRole.admin.value
+    assert refresh["fam"] == str(family_id)
+    assert access["sid"] == refresh["sid"] == str(rotation["new_session_id"])
+
+
+async def test_replayed_token_revokes_family_session(redis):
+    replayed_session_id = str(uuid4())
+    sessions = StubSessions(
+        RotatedSession(None, None, False, replayed_session_id=replayed_session_id)
+    )
+
+    with pytest.raises(HTTPException) as error:
+        await make_auth(redis, sessions).rotate_refresh_token(
+            refresh_payload(), "agent"
+        )
+
+    assert error.value.status_code == 401
+    assert await redis.exists(f"{BLACKLIST_PREFIX}{replayed_session_id}")
+
+
+async def test_unknown_session_is_rejected(redis):
+    with pytest.raises(HTTPException) as error:
+        await make_auth(redis, StubSessions(None)).rotate_refresh_token(
+            refresh_payload(), "agent"
+        )
+
+    assert error.value.status_code == 401
+    assert await redis.keys(f"{BLACKLIST_PREFIX}*") == []
+
+
+async def test_inactive_user_is_forbidden(redis):
+    sessions = StubSessions(RotatedSession(None, UserRole.user, False))
+
+    with pytest.raises(HTTPException) as error:
+        await make_auth(redis, sessions).rotate_refresh_token(
+            refresh_payload(), "agent"
+        )
+
+    assert error.value.status_code == 403
+
+
+class SlowSessions(StubSessions):
+    async def rotate(self, **kwargs) -> RotatedSession | None:
+        await asyncio.sleep(0.1)
+        return await super().rotate(**kwargs)
+
+
+class FailingSessions(StubSessions):
+    async def rotate(self, **kwargs) -> RotatedSession | None:
+        await asyncio.sleep(0.1)
+        raise RuntimeError("database is down")
+
+
+@pytest.fixture
+def grace_window(monkeypatch):
+    monkeypatch.setattr(settings.jwt, "refresh_grace_ms", 10000)
+
+
+async def test_concurrent_refreshes_share_one_rotation(redis, grace_window):
+    refresh_token = TokenService(uuid4(), role=UserRole.user).refresh_token
+    sessions = SlowSessions(RotatedSession(uuid4(), UserRole.user, True))
+    auth = make_auth(redis, sessions)
+
+    pairs = await asyncio.gather(
+        *(auth.refresh_tokens(refresh_token, "agent") for _ in range(5))
+    )
+
+    assert len(sessions.rotations) == 1
+    assert all(pair == pairs[0] for pair in pairs)
+    # Повтор в пределах окна получает ту же пару без новой ротации
+    assert await auth.refresh_tokens(refresh_token, "agent") == pairs[0]
+    assert len(sessions.rotations) == 1
+
+
+async def test_failed_rotation_releases_grace_window(redis, grace_window):
+    refresh_token = TokenService(uuid4(), role=UserRole.user).refresh_token
+    sid = TokenService.decode_jwt(refresh_token)["sid"]
+    auth = make_auth(redis, FailingSessions(None))
+
+    leader, waiter = await asyncio.gather(
+        auth.refresh_tokens(refresh_token, "agent"),
+        auth.refresh_tokens(refresh_token, "agent"),
+        return_exceptions=True,
+    )
+
+    assert isinstance(leader, RuntimeError)
+    assert isinstance(waiter, HTTPException) and waiter.status_code == 401
+    assert not await redis.exists(f"{REFRESH_GRACE_PREFIX}{sid}")
+
+
+async def test_access_token_cannot_refresh(redis):
+    access_token = TokenService(uuid4(), role=UserRole.user).access_token
+    sessions = StubSessions(None)
+
+    with pytest.raises(HTTPException) as error:
+        await make_auth(redis, sessions).refresh_tokens(access_token, "agent")
+
+    assert error.value.status_code == 401
+    assert sessions.rotations == []
@@ -0,0 +1,68 @@
+import importlib
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.ids import uuid7
+from app.database.session import get_session
+from app.main import app
+from app.services.mail_service import MailService
+
+# app.api.v1.registration_router — имя модуля и объекта APIRouter в пакете
+registration_module = importlib.import_module("app.api.v1.registration_router")
+
+
+class StubSession:
+    """Сессия БД без Postgres: присваивает id так же, как Base.id default."""
+
+    def __init__(self) -> None:
+        self.added = []
+
+    def add(self, instance) -> None:
+        if instance.id is None:
+            instance.id = uuid7()
+        self.added.append(instance)
+
+    async def commit(self) -> None:
+        pass
+
+
+class StubMail:
+    sent: list[str] = []
+
+    async def send_welcome_email(self, email: str, name: str) -> None:
+        self.sent.append(email)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    session = StubSession()
+
+    async def fetch_user_by_email(db_session, email):
+        return None
+
+    async def override_session():
+        yield session
+
+    monkeypatch.setattr(registration_module, "fetch_user_by_email", fetch_user_by_email)
+    app.dependency_overrides[get_session] = override_session
+    app.dependency_overrides[MailService] = StubMail
+    StubMail.sent = []
+    # Без контекстного менеджера lifespan не запускается: Redis и БД не нужны
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_registration_returns_uuid7_id(client):
+    response = client.post(
+        "/api/v1/registration/",
+        json={"name": "Test", "email": "Test@Example.com", "password": "secret1"},
+    )
+
+    assert response.status_code == 201
+    body = response.json()
+    assert UUID(body["id"]).version == 7
+    assert body["email"] == "test@example.com"
+    assert "password" not in body
+    assert len(StubMail.sent) == 1
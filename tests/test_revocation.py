@@ -0,0 +1,127 @@
+import json
+import time
+
+from app.core.redis_service import RedisService
+from app.services.revocation import (
+    BATCH_REVOKE_SCRIPT,
+    BLACKLIST_PREFIX,
+    BUMP_EPOCH_SCRIPT,
+    EPOCH_REVOCATION_PREFIX,
+    REVOCATION_CHANNEL,
+    USER_EPOCH_PREFIX,
+    RevocationFilter,
+    epoch_revokes,
+)
+
+
+async def next_message(pubsub) -> dict:
+    # get_message возвращает None и на пропущенном подтверждении подписки
+    deadline = time.monotonic() + 1.0
+    while time.monotonic() < deadline:
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+        if message is not None:
+            return json.loads(message["data"])
+    raise AssertionError("no message published")
+
+
+def test_epoch_revokes_older_tokens_except_initiator():
+    assert epoch_revokes(3, "keep", token_epoch=2, session_id="other")
+    assert not epoch_revokes(3, "keep", token_epoch=2, session_id="keep")
+    assert not epoch_revokes(3, "keep", token_epoch=3, session_id="other")
+
+
+async def bump_epoch(redis, user_id: str, exempt: str = "") -> int:
+    return await RedisService(redis).script(
+        BUMP_EPOCH_SCRIPT,
+        keys=[f"{USER_EPOCH_PREFIX}{user_id}", f"{EPOCH_REVOCATION_PREFIX}{user_id}"],
+        args=[user_id, exempt, 60000, time.time() + 60, REVOCATION_CHANNEL],
+    )
+
+
+async def test_bump_epoch_increments_and_publishes(redis):
+    async with redis.pubsub() as pubsub:
+        await pubsub.subscribe(REVOCATION_CHANNEL)
+
+        assert await bump_epoch(redis, "u1") == 1
+        assert await bump_epoch(redis, "u1", exempt="s1") == 2
+
+        assert (await next_message(pubsub))["epoch"] == 1
+        message = await next_message(pubsub)
+
+    assert message["type"] == "epoch"
+    assert message["user_id"] == "u1"
+    assert message["epoch"] == 2
+    assert message["sid"] == "s1"
+    assert await redis.hgetall(f"{EPOCH_REVOCATION_PREFIX}u1") == {
+        "epoch": "2",
+        "sid": "s1",
+    }
+    assert 0 < await redis.pttl(f"{EPOCH_REVOCATION_PREFIX}u1") <= 60000
+
+
+async def test_filter_applies_published_epoch(redis):
+    revocations = RevocationFilter()
+    revocations.ready = True
+    async with redis.pubsub() as pubsub:
+        await pubsub.subscribe(REVOCATION_CHANNEL)
+        await bump_epoch(redis, "u1", exempt="s1")
+        message = await next_message(pubsub)
+    revocations.handle_message(json.dumps(message))
+
+    assert revocations.is_epoch_revoked("u1", token_epoch=0, session_id="s2")
+    assert not revocations.is_epoch_revoked("u1", token_epoch=0, session_id="s1")
+    assert not revocations.is_epoch_revoked("u1", token_epoch=1, session_id="s2")
+    assert not revocations.is_epoch_revoked("u2", token_epoch=0, session_id="s2")
+
+
+async def test_filter_loads_epochs_from_redis(redis):
+    await bump_epoch(redis, "u1")
+    revocations = RevocationFilter()
+    await revocations.load(redis)
+    revocations.ready = True
+
+    assert revocations.is_epoch_revoked("u1", token_epoch=0, session_id="s1")
+
+
+def test_filter_not_ready_defers_to_redis():
+    revocations = RevocationFilter()
+
+    assert revocations.is_epoch_revoked("u1", token_epoch=0, session_id="s1") is None
+
+
+async def test_batch_revoke_blacklists_sessions_and_publishes(redis):
+    session_ids = ["s1", "s2", "s3"]
+    async with redis.pubsub() as pubsub:
+        await pubsub.subscribe(REVOCATION_CHANNEL)
+        revoked = await RedisService(redis).script(
+            BATCH_REVOKE_SCRIPT,
+            keys=[f"{BLACKLIST_PREFIX}{session_id}" for session_id in session_ids],
+            args=[
+                "revoked",
+                60000,
+                REVOCATION_CHANNEL,
+                json.dumps({"sids": session_ids, "exp": time.time() + 60}),
+            ],
+        )
+        message = await next_message(pubsub)
+
+    assert revoked == 3
+    assert await redis.exists(*(f"{BLACKLIST_PREFIX}{sid}" for sid in session_ids)) == 3
+    assert 0 < await redis.pttl(f"{BLACKLIST_PREFIX}s2") <= 60000
+
+    revocations = RevocationFilter()
+    revocations.ready = True
+    revocations.handle_message(json.dumps(message))
+    assert all(revocations.might_be_revoked(sid) for sid in session_ids)
+    assert not revocations.might_be_revoked("s4")
+
+
+async def test_filter_loads_blacklist_from_redis(redis):
+    await redis.set(f"{BLACKLIST_PREFIX}s1", "revoked", px=60000)
+    await redis.set(f"{BLACKLIST_PREFIX}s2", "revoked")  # без TTL не загружается
+    revocations = RevocationFilter()
+    await revocations.load(redis)
+    revocations.ready = True
+
+    assert revocations.might_be_revoked("s1")
+    assert not revocations.might_be_revoked("s2")
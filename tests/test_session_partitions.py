@@ -0,0 +1,109 @@
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.core.ids import uuid7
+from app.database.session import engine
+from app.repository.partitions import (
+    create_partition,
+    get_default_partition,
+    get_partitions,
+    is_partitioned,
+)
+from app.services.session_partitions import (
+    SESSIONS_TABLE,
+    SessionPartitionMaintainer,
+    align,
+    partition_name,
+)
+
+# Тест меняет секции sessions: нужна одноразовая база с применёнными миграциями
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("TEST_POSTGRES"),
+    reason="set TEST_POSTGRES=1 to run against the configured disposable Postgres",
+)
+
+DAY = timedelta(days=1)
+
+
+async def insert_session(connection, user_id, expire_at: datetime) -> None:
+    await connection.execute(
+        text(
+            "INSERT INTO sessions (id, user_id, session_id, user_agent, "
+            "last_active, expire_at) VALUES (:id, :user_id, :sid, 'test', now(), :exp)"
+        ),
+        {"id": uuid7(), "user_id": user_id, "sid": uuid4(), "exp": expire_at},
+    )
+
+
+async def count(connection, table: str) -> int:
+    return (await connection.execute(text(f'SELECT count(*) FROM "{table}"'))).scalar()
+
+
+@pytest.fixture
+async def user_id():
+    user_id = uuid7()
+    async with engine.begin() as connection:
+        if not await is_partitioned(connection, SESSIONS_TABLE):
+            pytest.skip("sessions is not partitioned, run alembic upgrade head")
+        await connection.execute(
+            text(
+                "INSERT INTO users (id, name, email, password, role, is_active, "
+                "is_verified) VALUES (:id, 'test', :email, '', 'user', true, true)"
+            ),
+            {"id": user_id, "email": f"{user_id}@example.com"},
+        )
+    yield user_id
+    async with engine.begin() as connection:
+        await connection.execute(
+            text("DELETE FROM users WHERE id = :id"), {"id": user_id}
+        )
+    await engine.dispose()
+
+
+async def test_maintain_with_default_partition(user_id):
+    now = datetime.now(timezone.utc)
+    expired_lower = align(now, DAY) - 10 * DAY
+    expired = partition_name(expired_lower)
+    async with engine.begin() as connection:
+        default = await get_default_partition(connection, SESSIONS_TABLE)
+        assert default is not None
+        await create_partition(
+            connection,
+            SESSIONS_TABLE,
+            expired,
+            expired_lower,
+            expired_lower + DAY,
+            key="expire_at",
+        )
+        await insert_session(connection, user_id, expired_lower + DAY / 2)
+        # Вне всех секций: строка попадает в DEFAULT и удаляется по retention
+        await insert_session(connection, user_id, expired_lower - 20 * DAY)
+
+        # Секция на будущее пропала: строка её диапазона ждёт в DEFAULT
+        latest = (await get_partitions(connection, SESSIONS_TABLE))[-1]
+        await connection.execute(text(f'DROP TABLE "{latest.name}"'))
+        await insert_session(connection, user_id, latest.lower + DAY / 2)
+        default_rows = await count(connection, default)
+
+    maintainer = SessionPartitionMaintainer(
+        interval=DAY,
+        premake=10,  # горизонт дальше удалённой секции
+        retention=DAY,
+        check_interval=60,
+        lock_timeout_ms=1000,
+    )
+    await maintainer.maintain()
+
+    async with engine.connect() as connection:
+        names = {
+            partition.name
+            for partition in await get_partitions(connection, SESSIONS_TABLE)
+        }
+        assert expired not in names
+        assert latest.name in names
+        assert await count(connection, latest.name) == 1
+        assert await count(connection, default) == default_rows - 2
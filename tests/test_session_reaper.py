@@ -0,0 +1,90 @@
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.redis_lock import LeaderLock
+from app.services import session_reaper as reaper_module
+from app.services.session_reaper import SESSION_REAPER_LOCK, SessionReaper
+
+
+class Database:
+    """Подмена sessions: полные пачки, пока не удалено expired строк."""
+
+    def __init__(self, expired: int) -> None:
+        self.expired = expired
+        self.batches = 0
+        self.on_batch = None
+
+    async def delete_expired_sessions(self, db_session, now, limit) -> int:
+        self.batches += 1
+        if self.on_batch is not None:
+            await self.on_batch(self.batches)
+        deleted = min(limit, self.expired)
+        self.expired -= deleted
+        return deleted
+
+
+@pytest.fixture
+def database(monkeypatch) -> Database:
+    database = Database(expired=100)
+
+    @asynccontextmanager
+    async def connect():
+        yield None
+
+    async def is_partitioned(connection, table) -> bool:
+        return False
+
+    async def get_oldest_expire_at(db_session, now):
+        return None
+
+    monkeypatch.setattr(reaper_module, "engine", SimpleNamespace(connect=connect))
+    monkeypatch.setattr(reaper_module, "session_factory", connect)
+    monkeypatch.setattr(reaper_module, "is_partitioned", is_partitioned)
+    monkeypatch.setattr(reaper_module, "get_oldest_expire_at", get_oldest_expire_at)
+    monkeypatch.setattr(
+        reaper_module, "delete_expired_sessions", database.delete_expired_sessions
+    )
+    return database
+
+
+async def test_reap_stops_after_losing_lock(redis, database):
+    reaper = SessionReaper(interval=1, batch_size=10, batch_pause=0)
+    lock = LeaderLock(redis, SESSION_REAPER_LOCK, ttl_ms=3000)
+    assert await lock.acquire()
+
+    async def on_batch(batch: int) -> None:
+        # Ключ истёк, лидерство забрал другой воркер
+        if batch == 3:
+            await redis.set(SESSION_REAPER_LOCK, "other")
+
+    database.on_batch = on_batch
+
+    assert await reaper.reap(lock) == 30
+    assert database.batches == 3
+    assert await redis.get(SESSION_REAPER_LOCK) == "other"
+
+
+async def test_reap_extends_lock_before_each_batch(redis, database):
+    reaper = SessionReaper(interval=1, batch_size=10, batch_pause=0)
+    lock = LeaderLock(redis, SESSION_REAPER_LOCK, ttl_ms=3000)
+    assert await lock.acquire()
+    ttls = []
+
+    async def on_batch(batch: int) -> None:
+        ttls.append(await redis.pttl(SESSION_REAPER_LOCK))
+        await redis.pexpire(SESSION_REAPER_LOCK, 100)
+
+    database.on_batch = on_batch
+
+    assert await reaper.reap(lock) == 100
+    assert database.batches == 11
+    assert all(ttl > 100 for ttl in ttls)
+
+
+async def test_reap_without_lock_deletes_everything(database):
+    reaper = SessionReaper(interval=1, batch_size=30, batch_pause=0)
+
+    assert await reaper.reap() == 100
+    assert database.batches == 4
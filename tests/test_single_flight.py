@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test_flight.shared")
+    calls = 0
+
+    async def load() -> dict:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": calls}
+
+    results = await asyncio.gather(*(flight.do("key", load) for _ in range(10)))
+
+    assert calls == 1
+    assert all(result == {"value": 1} for result in results)
+    # Следующий вызов после завершения выполняется заново
+    assert await flight.do("key", load) == {"value": 2}
+
+
+async def test_different_keys_run_separately():
+    flight = SingleFlight("test_flight.keys")
+    calls = []
+
+    async def load(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    results = await asyncio.gather(
+        flight.do("a", lambda: load("a")), flight.do("b", lambda: load("b"))
+    )
+
+    assert results == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+async def test_adapt_gives_each_waiter_its_own_copy():
+    flight = SingleFlight("test_flight.adapt")
+
+    async def load() -> list[str]:
+        await asyncio.sleep(0.01)
+        return ["result"]
+
+    def adapt(result: list[str], context: str) -> list[str]:
+        return [*result, context]
+
+    results = await asyncio.gather(
+        *(flight.do("key", load, adapt=adapt, context=str(n)) for n in range(3))
+    )
+
+    # Лидер получает исходный результат, ожидающие — копии по своему context
+    assert results == [["result"], ["result", "1"], ["result", "2"]]
+
+
+async def test_error_is_shared_with_waiters():
+    flight = SingleFlight("test_flight.error")
+
+    async def load() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(flight.do("key", load) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_cancelled_leader_does_not_cancel_waiters():
+    flight = SingleFlight("test_flight.cancel")
+    calls = 0
+
+    async def load() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    leader = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    # Ожидающий сам повторяет вызов вместо отменённого лидера
+    assert await waiter == 2
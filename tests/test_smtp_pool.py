@@ -0,0 +1,146 @@
+import asyncio
+import socket
+import time
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.services.mail_outbox import MAIL_GROUP, MAIL_RETRY_QUEUE, MAIL_STREAM, MailJob
+from app.services.mail_worker import MailWorker
+from app.services.smtp_pool import SMTPPool
+
+HOST = "127.0.0.1"
+
+
+class Handler:
+    """Принимает письма; stall_after — после стольких писем перестаёт отвечать."""
+
+    def __init__(self) -> None:
+        self.received: list[str] = []
+        self.rejected: set[str] = set()
+        self.stall_after: int | None = None
+
+    async def handle_RCPT(self, server, session, envelope, address, options) -> str:
+        if address in self.rejected:
+            return "550 mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope) -> str:
+        if self.stall_after is not None and len(self.received) >= self.stall_after:
+            await asyncio.sleep(10)
+        self.received.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def server():
+    handler = Handler()
+    controller = Controller(handler, hostname=HOST, port=free_port())
+    controller.start()
+    yield handler, controller.port
+    controller.stop()
+
+
+def make_pool(port: int, **options) -> SMTPPool:
+    return SMTPPool(HOST, port, use_tls=False, timeout=5, **options)
+
+
+def make_message(number: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "test@example.com"
+    message["To"] = f"user{number}@example.com"
+    message["Subject"] = "test"
+    message.set_content("test")
+    return message
+
+
+async def test_batch_reuses_one_connection(server):
+    handler, port = server
+    pool = make_pool(port)
+    connects = pool._connects.value  # счётчик общий для всех пулов
+
+    results = await pool.send_batch([make_message(n) for n in range(3)])
+    await pool.send_batch([make_message(3)])
+
+    assert results == [None, None, None]
+    assert len(handler.received) == 4
+    assert pool._connects.value - connects == 1
+    await pool.close()
+
+
+async def test_rejected_recipient_fails_only_its_message(server):
+    handler, port = server
+    handler.rejected.add("user1@example.com")
+    pool = make_pool(port)
+
+    results = await pool.send_batch([make_message(n) for n in range(3)])
+
+    assert results[0] is None and results[2] is None
+    assert results[1] is not None
+    assert handler.received == ["user0@example.com", "user2@example.com"]
+    await pool.close()
+
+
+async def test_timeout_fails_only_unsent_messages(server):
+    handler, port = server
+    handler.stall_after = 2
+    pool = make_pool(port, send_timeout=0.2)
+
+    started = time.monotonic()
+    results = await pool.send_batch([make_message(n) for n in range(4)])
+
+    # Принятые сервером письма остаются успешными и не будут отправлены повторно
+    assert results[:2] == [None, None]
+    assert all(isinstance(error, TimeoutError) for error in results[2:])
+    assert time.monotonic() - started < 2
+    await pool.close()
+
+
+async def test_connect_failure_is_returned_not_raised():
+    pool = make_pool(free_port())
+
+    results = await pool.send_batch([make_message(n) for n in range(2)])
+
+    assert len(results) == 2
+    assert all(isinstance(error, Exception) for error in results)
+    with pytest.raises(Exception):
+        await pool.send(make_message(0))
+
+
+async def test_worker_retries_only_failed_messages(redis):
+    jobs = [MailJob("welcome.html", "test", f"user{n}@example.com") for n in range(3)]
+    sent: list[str] = []
+
+    async def deliver(batch: list[MailJob]) -> list[Exception | None]:
+        sent.extend(job.recipient for job in batch)
+        return [None, TimeoutError(), None]
+
+    worker = MailWorker(
+        redis,
+        deliver,
+        concurrency=1,
+        batch_size=3,
+        max_attempts=3,
+        backoff=1,
+        backoff_max=1,
+        claim_idle=60,
+    )
+    await worker.ensure_group()
+    for job in jobs:
+        await redis.xadd(MAIL_STREAM, job.to_fields())
+
+    await worker.handle(await worker.read(3))
+
+    assert len(sent) == 3
+    assert await redis.xlen(MAIL_STREAM) == 0
+    assert (await redis.xpending(MAIL_STREAM, MAIL_GROUP))["pending"] == 0
+    (retry,) = await redis.zrange(MAIL_RETRY_QUEUE, 0, -1)
+    assert "user1@example.com" in retry
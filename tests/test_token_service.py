@@ -0,0 +1,57 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.database.models.user import UserRole
+from app.services.token_service import TokenService, load_key
+from tests.conftest import generate_keys
+
+
+def use_keys(monkeypatch, tmp_path, algorithm: str, key_id: str | None = None):
+    folder = tmp_path / algorithm
+    folder.mkdir()
+    generate_keys(algorithm, folder)
+    monkeypatch.setattr(TokenService, "algorithm", algorithm)
+    monkeypatch.setattr(TokenService, "key_id", key_id)
+    monkeypatch.setattr(
+        TokenService, "private_key", load_key(algorithm, folder / "private.pem")
+    )
+    monkeypatch.setattr(
+        TokenService, "public_key", load_key(algorithm, folder / "public.pem")
+    )
+    monkeypatch.setattr(TokenService, "headers", {"kid": key_id} if key_id else None)
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "ES256", "EdDSA"])
+def test_round_trip(algorithm, monkeypatch, tmp_path):
+    use_keys(monkeypatch, tmp_path, algorithm, key_id="2025-01")
+    tokens = TokenService(uuid4(), role=UserRole.user, epoch=3)
+
+    access = TokenService.decode_jwt(tokens.access_token)
+    assert access["sub"] == str(tokens.sub)
+    assert access["purpose"] == "access_token"
+    assert access["epc"] == 3
+    refresh = TokenService.decode_jwt(tokens.refresh_token)
+    assert refresh["fam"] == str(tokens.family_id)
+
+
+def test_token_with_other_kid_is_rejected(monkeypatch, tmp_path):
+    use_keys(monkeypatch, tmp_path, "ES256", key_id="2025-01")
+    token = TokenService(uuid4(), role=UserRole.user).access_token
+
+    # Ключ сменили на новый kid, старые токены больше не принимаются
+    monkeypatch.setattr(TokenService, "key_id", "2025-02")
+    with pytest.raises(HTTPException) as exc_info:
+        TokenService.decode_jwt(token)
+    assert exc_info.value.status_code == 401
+
+
+def test_token_of_other_algorithm_is_rejected(monkeypatch, tmp_path):
+    use_keys(monkeypatch, tmp_path, "EdDSA")
+    token = TokenService(uuid4(), role=UserRole.user).access_token
+
+    use_keys(monkeypatch, tmp_path, "ES256")
+    with pytest.raises(HTTPException) as exc_info:
+        TokenService.decode_jwt(token)
+    assert exc_info.value.status_code == 401
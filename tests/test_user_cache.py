@@ -0,0 +1,93 @@
+import asyncio
+from dataclasses import replace
+
+import pytest
+
+from app.core.redis_service import RedisService
+from app.database.session import primary_pinned
+from app.repository.records import UserRecord
+from app.services import user_service
+from app.services.user_service import USER_CACHE_PREFIX, UserService
+
+
+class Database:
+    """Подмена fetch_user_by_id: одна строка users и счётчик чтений."""
+
+    def __init__(self, user: UserRecord) -> None:
+        self.user = user
+        self.reads = 0
+        self.primary_reads = 0
+        self.before_return: asyncio.Event | None = None
+        self.returning = asyncio.Event()
+
+    async def fetch_user_by_id(self, db_session, user_id) -> UserRecord | None:
+        self.reads += 1
+        self.primary_reads += primary_pinned.get()
+        user = self.user
+        if self.before_return is not None:
+            self.returning.set()
+            await self.before_return.wait()
+        return user
+
+
+@pytest.fixture
+def database(user, monkeypatch) -> Database:
+    database = Database(user)
+    monkeypatch.setattr(user_service, "fetch_user_by_id", database.fetch_user_by_id)
+    UserService.local_cache.clear()
+    yield database
+    UserService.local_cache.clear()
+
+
+async def test_user_is_read_from_redis_after_fill(redis, user, database):
+    users = UserService(RedisService(redis), db_session=None)
+    assert await users.get_user(user.id) == user
+
+    UserService.local_cache.clear()
+    assert await users.get_user(user.id) == user
+    assert database.reads == 1
+    assert await redis.hgetall(f"{USER_CACHE_PREFIX}{user.id}") == user.to_hash()
+
+
+async def test_invalidate_drops_both_levels(redis, user, database):
+    users = UserService(RedisService(redis), db_session=None)
+    await users.get_user(user.id)
+    database.user = replace(user, is_active=False)
+
+    await users.invalidate(user.id)
+
+    assert not (await users.get_user(user.id)).is_active
+    assert database.reads == 2
+
+
+async def test_fill_after_invalidate_reads_primary(redis, user, database):
+    users = UserService(RedisService(redis), db_session=None)
+    await users.get_user(user.id)
+    assert database.primary_reads == 0
+
+    # Реплика могла ещё не получить изменение: чтение идёт на primary
+    await users.invalidate(user.id)
+    await users.get_user(user.id)
+
+    assert database.primary_reads == 1
+    assert not primary_pinned.get()
+
+
+async def test_stale_read_is_not_written_back(redis, user, database):
+    users = UserService(RedisService(redis), db_session=None)
+    database.before_return = asyncio.Event()
+
+    # Чтение из Postgres получило старую строку, и тут пользователя
+    # заблокировали: устаревшая запись не должна попасть в Redis
+    reader = asyncio.create_task(users.get_user(user.id))
+    await database.returning.wait()
+    database.user = replace(user, is_active=False)
+    await users.invalidate(user.id)
+    database.before_return.set()
+    assert (await reader).is_active
+
+    assert not await redis.exists(f"{USER_CACHE_PREFIX}{user.id}")
+    UserService.local_cache.clear()
+    database.before_return = None
+    assert not (await users.get_user(user.id)).is_active
+    assert await redis.hget(f"{USER_CACHE_PREFIX}{user.id}", "is_active") == "0"